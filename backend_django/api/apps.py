@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from .metrics import install_query_recorder
+        # Every connection, on every thread, reports to MetricsMiddleware
+        connection_created.connect(install_query_recorder, dispatch_uid='api.metrics.install_query_recorder')
@@ -0,0 +1,130 @@
+"""
+Admin token authentication
+
+Verifies the admin JWT issued by admin_login once per request and hands the
+claims to the permission classes through request.auth. Verified tokens are
+kept in a bounded in-process cache keyed by the token's SHA-256, so repeat
+requests with the same token skip signature verification entirely.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+
+
+TOKEN_CACHE_MAX_ENTRIES = 1024
+
+# Upper bound on how long a verified token is trusted without re-checking
+TOKEN_CACHE_TTL = 300
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of token hash -> (claims, expires_at)"""
+
+    def __init__(self, max_entries=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, key, claims, now=None):
+        if now is None:
+            now = time.time()
+        expires_at = now + self.ttl
+        # Never outlive the token itself
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'])
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+def verify_token(token):
+    """
+    Claims of a valid admin token, or None
+
+    Served from token_cache when the token was verified recently.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    try:
+        claims = jwt.decode(
+            token,
+            settings.SIMPLE_JWT['SIGNING_KEY'],
+            algorithms=[settings.SIMPLE_JWT['ALGORITHM']]
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+    token_cache.set(key, claims)
+    return claims
+
+
+class TokenAdmin:
+    """request.user for a request carrying a valid admin token"""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims):
+        self.id = claims.get('id')
+        self.username = claims.get('username')
+        self.role = claims.get('role')
+
+    def __str__(self):
+        return self.username or ''
+
+
+class AdminJWTAuthentication(BaseAuthentication):
+    """
+    Bearer token authentication for admin JWTs
+
+    Requests without a token, or with an invalid or expired one, stay
+    anonymous; the permission classes decide whether that is acceptable.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = request.headers.get('Authorization', '')
+        if not header.startswith(f'{self.keyword} '):
+            return None
+
+        claims = verify_token(header[len(self.keyword) + 1:].strip())
+        if claims is None:
+            return None
+        return TokenAdmin(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
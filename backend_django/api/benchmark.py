@@ -0,0 +1,370 @@
+"""
+Endpoint Benchmarks
+
+Drives every route in api/urls.py through the Django test client against a
+generated dataset (datagen.py) and records, per endpoint:
+
+- p50/p95 latency over a number of timed runs
+- database queries per request
+- peak Python memory allocated while serving one request (tracemalloc)
+
+Each run happens inside a transaction that is rolled back, so write
+endpoints can be measured repeatedly without changing the dataset. Results
+are plain dicts so they can be written to JSON and compared between
+commits with compare_results.
+"""
+
+import io
+import json
+import logging
+import math
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, redirect_stdout
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .datagen import DATASET_SIZES, generate_dataset, generated_rows_exist
+from .jobs import enqueue
+from .metrics import QueryTimer
+from .models import Admin, Contractor, RoadProject, Complaint
+from .urls import urlpatterns
+
+
+Case = namedtuple(
+    'Case',
+    ['name', 'url_name', 'method', 'args', 'params', 'data', 'admin', 'expect', 'iterations'],
+    defaults=['get', (), None, None, False, 200, None]
+)
+
+# Routes that are deliberately not driven, with the reason
+SKIPPED_ROUTES = {}
+
+# Whole-table exports are slow at the large size; a few runs are enough
+EXPORT_ITERATIONS = 3
+
+BENCHMARK_ADMIN = {'username': 'benchmark-admin', 'password': 'Benchmark@123'}
+
+# Differences below these floors are noise, whatever the percentage
+MIN_DELTAS = {'p50Ms': 1.0, 'p95Ms': 2.0, 'queries': 0, 'peakMemoryKb': 64}
+
+
+@contextmanager
+def benchmark_environment():
+    """
+    Test-client environment with the photo store, QR cache and response cache
+    in a scratch directory, removed afterwards
+    """
+    store_dir = tempfile.TemporaryDirectory(prefix='benchmark-')
+    # The environment variables reach the thumbnail worker processes as well
+    os.environ['PHOTO_STORE_DIR'] = str(Path(store_dir.name) / 'photos')
+    os.environ['QR_CACHE_DIR'] = str(Path(store_dir.name) / 'qr')
+    # cache.clear() between runs must not empty a running server's cache
+    caches = {'default': {**settings.CACHES['default'], 'LOCATION': str(Path(store_dir.name) / 'cache')}}
+
+    setup_test_environment()
+    try:
+        with override_settings(PHOTO_STORE_DIR=Path(os.environ['PHOTO_STORE_DIR']),
+                               QR_CACHE_DIR=Path(os.environ['QR_CACHE_DIR']),
+                               CACHES=caches):
+            yield
+    finally:
+        teardown_test_environment()
+        store_dir.cleanup()
+
+
+@contextmanager
+def benchmark_database(size, seed=42, anchor_date=None, keepdb=False, log=None):
+    """
+    Switch to a separate database holding the named generated dataset
+
+    The database is created (or, with keepdb, reused) next to the real one
+    and dropped afterwards unless keepdb is set. log: optional callable(str).
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite':
+        test_settings['NAME'] = str(settings.BASE_DIR / f'benchmark_{size}.sqlite3')
+    else:
+        test_settings['NAME'] = f"{connection.settings_dict['NAME']}_benchmark_{size}"
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        if not generated_rows_exist():
+            if log:
+                log(f'Generating {size} dataset...')
+            started = time.perf_counter()
+            generate_dataset(seed=seed, anchor_date=anchor_date, **DATASET_SIZES[size])
+            if log:
+                log(f'  done in {time.perf_counter() - started:.1f}s')
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def _png_upload():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (120, 90, 60)).save(buffer, 'PNG')
+    return SimpleUploadedFile('benchmark.png', buffer.getvalue(), content_type='image/png')
+
+
+def prepare_fixture(client):
+    """
+    Pick representative rows from the generated dataset and create the
+    objects some routes need (admin token, stored photo, QR image)
+    """
+    # The second contractor: busy, but not the single largest outlier
+    contractor = Contractor.objects.filter(contractor_id__startswith='GEN-').order_by('id')[1:2].get()
+    road = RoadProject.objects.filter(contractor=contractor, complaints__isnull=False).order_by('id').first()
+    complaint = Complaint.objects.filter(road=road).order_by('id').first()
+
+    admin, _ = Admin.objects.get_or_create(username=BENCHMARK_ADMIN['username'], defaults={
+        'email': 'benchmark-admin@example.com',
+        'password': BENCHMARK_ADMIN['password'],
+        'full_name': 'Benchmark Admin',
+        'role': 'super_admin',
+    })
+    token = client.post(reverse('admin_login'), BENCHMARK_ADMIN, content_type='application/json').json()['token']
+
+    photo_id = client.post(reverse('photo_upload'), {'photo': _png_upload()}).json()['photoId']
+    client.post(reverse('generate_contractor_qr', args=[contractor.contractor_id]))
+    contractor.refresh_from_db()
+    job = enqueue('recompute_contractor_rating', {'contractor_id': contractor.pk})
+
+    return {
+        'contractor': contractor,
+        'road': road,
+        'complaint': complaint,
+        'admin': admin,
+        'token': token,
+        'photoId': photo_id,
+        'job': job,
+        'roadIds': ','.join(
+            RoadProject.objects.filter(contractor=contractor).order_by('id').values_list('road_id', flat=True)[:10]
+        ),
+    }
+
+
+def build_cases(fixture):
+    """One or more Case per route, using rows from prepare_fixture"""
+    contractor = fixture['contractor']
+    road = fixture['road']
+    complaint = fixture['complaint']
+    lat, lng = float(road.latitude), float(road.longitude)
+    bbox = {'minLat': lat - 0.05, 'minLng': lng - 0.05, 'maxLat': lat + 0.05, 'maxLng': lng + 0.05}
+    three_years_ago = (timezone.localdate() - timedelta(days=3 * 365)).isoformat()
+    new_road = {'roadId': 'BENCH-ROAD', 'roadName': 'Benchmark Road', 'contractorId': contractor.id,
+                'latitude': lat, 'longitude': lng}
+
+    return [
+        Case('health', 'health_check'),
+        Case('metrics', 'metrics', admin=True),
+
+        Case('admin_register', 'admin_register', 'post', admin=True, expect=201, data={
+            'username': 'bench-new', 'email': 'bench-new@example.com',
+            'password': 'Benchmark@123', 'full_name': 'New Admin',
+        }),
+        Case('admin_login', 'admin_login', 'post', data=BENCHMARK_ADMIN),
+        Case('admin_profile', 'admin_profile', admin=True),
+        Case('admin_roads_list', 'admin_roads', admin=True),
+        Case('admin_roads_create', 'admin_roads', 'post', admin=True, expect=201, data=new_road),
+        Case('admin_road_update', 'admin_road_detail', 'put', args=[road.id], admin=True,
+             data={'roadName': 'Renamed Road'}),
+        Case('admin_road_delete', 'admin_road_detail', 'delete', args=[road.id], admin=True),
+        Case('admin_assign_contractor', 'admin_assign_contractor', 'post', args=[road.id], admin=True,
+             data={'contractorId': contractor.id}),
+        Case('admin_contractors', 'admin_get_contractors', admin=True),
+
+        Case('contractors_list', 'contractors'),
+        Case('contractors_create', 'contractors', 'post', expect=201, data={
+            'contractorId': 'BENCH-CON', 'name': 'Benchmark Contractor', 'email': 'bench-con@example.com',
+        }),
+        Case('contractor_rate', 'contractor_rate', 'post', expect=201,
+             data={'contractorId': contractor.id, 'ratingValue': 4}),
+        Case('contractor_detail', 'contractor_detail', args=[contractor.id]),
+        Case('contractor_projects', 'contractor_projects', args=[contractor.id]),
+        Case('contractor_rate_by_id', 'contractor_rate_by_id', 'post', args=[contractor.id], expect=201,
+             data={'ratingValue': 4}),
+        Case('contractor_performance', 'contractor_performance', args=[contractor.id]),
+        Case('contractor_dashboard', 'contractor_performance_dashboard'),
+        Case('contractor_trends', 'contractor_trends', args=[contractor.id]),
+        Case('contractor_trends_monthly', 'contractor_trends', args=[contractor.id],
+             params={'from': three_years_ago, 'bucket': 'month'}),
+
+        Case('qr_bulk_enqueue', 'generate_all_contractor_qr', 'post', expect=202),
+        Case('job_status', 'job_status', args=[fixture['job'].pk]),
+        Case('contractor_qr_generate', 'generate_contractor_qr', 'post', args=[contractor.contractor_id]),
+        Case('contractor_qr', 'get_contractor_qr', args=[contractor.contractor_id]),
+        Case('qr_image', 'qr_image', args=[contractor.qr_code]),
+
+        Case('public_contractor', 'get_contractor_public_info', args=[contractor.contractor_id]),
+        Case('public_rating', 'submit_public_rating', 'post', args=[contractor.contractor_id], expect=201,
+             data={'ratingValue': 5, 'comment': 'Smooth road'}),
+        Case('public_complaint', 'submit_public_complaint', 'post', args=[contractor.contractor_id],
+             expect=201, data={'description': 'Pothole near the junction', 'location': 'Junction'}),
+
+        Case('complaints_list', 'complaints'),
+        Case('complaints_filtered', 'complaints', params={'status': 'Open', 'severity': 'High'}),
+        Case('complaints_create', 'complaints', 'post', expect=201, data={
+            'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Deep pothole', 'severity': 'High',
+        }),
+        Case('complaints_nearby', 'complaints_nearby', params={'lat': lat, 'lng': lng, 'radius': 2000}),
+        Case('complaints_bbox', 'complaints_in_bbox', params=bbox),
+        Case('complaints_heatmap', 'complaint_heatmap', params={'zoom': 12, **bbox}),
+        Case('complaints_summary', 'complaints_summary'),
+        Case('photo_upload', 'photo_upload', 'post', expect=201, data=lambda: {'photo': _png_upload()}),
+        Case('photo_image', 'photo_image', args=[fixture['photoId']]),
+        Case('photo_thumbnail', 'photo_thumbnail', args=[fixture['photoId']]),
+        Case('complaints_by_road', 'complaint_detail', args=[road.id]),
+        Case('complaint_update', 'complaint_detail', 'put', args=[complaint.id],
+             data={'status': 'Resolved', 'resolution': {'description': 'Patched'}}),
+
+        Case('road_nearest', 'road_nearest', params={'lat': lat, 'lng': lng}),
+        Case('road_qr_sheet', 'road_qr_sheet', admin=True, params={'roadIds': fixture['roadIds']}),
+        Case('road_qr', 'road_qr', args=[road.road_id]),
+        Case('road_detail', 'road_detail', args=[road.road_id]),
+        Case('road_list', 'road_list'),
+
+        Case('export_complaints', 'export_dataset', args=['complaints'], admin=True,
+             iterations=EXPORT_ITERATIONS),
+        Case('export_roads_csv', 'export_dataset', args=['roads'], admin=True, params={'as': 'csv'},
+             iterations=EXPORT_ITERATIONS),
+    ]
+
+
+def uncovered_routes(cases):
+    """Names of routes in api/urls.py that no case drives and that are not skipped"""
+    covered = {case.url_name for case in cases} | set(SKIPPED_ROUTES)
+    return sorted(pattern.name for pattern in urlpatterns if pattern.name not in covered)
+
+
+def _request(client, case, path, fixture):
+    headers = {'HTTP_AUTHORIZATION': f"Bearer {fixture['token']}"} if case.admin else {}
+    data = case.data() if callable(case.data) else case.data
+
+    if case.method == 'get':
+        response = client.get(path, case.params, **headers)
+    elif callable(case.data):
+        # Multipart upload
+        response = client.post(path, data, **headers)
+    else:
+        response = client.generic(
+            case.method.upper(), path, json.dumps(data or {}), content_type='application/json', **headers
+        )
+    # Streamed bodies are produced while iterating, so that belongs to the request
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response.status_code, len(body)
+
+
+def run_once(client, case, fixture, queries=None):
+    """
+    (status, seconds, queries) for one rolled-back request
+
+    queries: execute wrapper to count (and possibly record) the statements
+    with, a fresh QueryTimer by default
+    """
+    path = reverse(case.url_name, args=case.args() if callable(case.args) else case.args)
+    queries = queries or QueryTimer()
+    with transaction.atomic(), connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        status, _ = _request(client, case, path, fixture)
+        elapsed = time.perf_counter() - started
+        transaction.set_rollback(True)
+    if case.method != 'get':
+        # Cached payloads may now describe rolled-back rows
+        cache.clear()
+    return status, elapsed, queries.count
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+@contextmanager
+def quiet():
+    """Swallow view print()s and the per-request 4xx/5xx log lines; statuses are reported instead"""
+    request_log = logging.getLogger('django.request')
+    level = request_log.level
+    request_log.setLevel(logging.CRITICAL)
+    try:
+        with redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        request_log.setLevel(level)
+
+
+def run_case(client, case, fixture, iterations=20, warmup=2):
+    """Time one case; returns its result dict"""
+    iterations = min(iterations, case.iterations or iterations)
+    with quiet():
+        for _ in range(warmup):
+            run_once(client, case, fixture)
+
+        timings = []
+        query_counts = []
+        statuses = set()
+        for _ in range(iterations):
+            status, elapsed, queries = run_once(client, case, fixture)
+            timings.append(elapsed * 1000)
+            query_counts.append(queries)
+            statuses.add(status)
+
+        # Separate pass: tracemalloc slows Python down too much to time under it
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            run_once(client, case, fixture)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'route': case.url_name,
+        'method': case.method.upper(),
+        'status': sorted(statuses),
+        'ok': statuses == {case.expect},
+        'iterations': iterations,
+        'p50Ms': round(statistics.median(timings), 3),
+        'p95Ms': round(percentile(timings, 0.95), 3),
+        'queries': max(query_counts),
+        'peakMemoryKb': round(peak / 1024, 1),
+    }
+
+
+def compare_results(baseline, current, threshold_percent):
+    """
+    Regressions of current against baseline
+
+    A metric regresses when it grows by more than threshold_percent and by
+    more than its MIN_DELTAS floor. Cases missing from either side are ignored.
+
+    Returns:
+        list of human readable regression descriptions
+    """
+    regressions = []
+    for size, cases in current.items():
+        for name, result in cases.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            for metric, floor in MIN_DELTAS.items():
+                old, new = before.get(metric), result.get(metric)
+                if old is None or new is None:
+                    continue
+                if new - old > floor and new > old * (1 + threshold_percent / 100):
+                    regressions.append(f'{size}/{name}: {metric} {old} -> {new}')
+    return regressions
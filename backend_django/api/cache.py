@@ -0,0 +1,66 @@
+"""
+Response cache for public read endpoints
+
+Payloads of the QR-scan landing endpoints (public contractor info, road
+detail and road list) are cached with Django's cache framework, keyed by
+the public contractor/road id. Views that write ratings, complaints or road
+assignments call the invalidate_* helpers so readers never see stale data
+for longer than the request that changed it.
+"""
+
+from django.core.cache import cache
+
+
+PUBLIC_CACHE_TIMEOUT = 10 * 60
+
+ROAD_LIST_KEY = 'public:roads'
+
+
+def contractor_key(contractor_id):
+    """Key for a contractor's public info, by its public contractorId"""
+    return f'public:contractor:{contractor_id}'
+
+
+def road_key(road_id):
+    """Key for a road's detail payload, by its public roadId"""
+    return f'public:road:{road_id}'
+
+
+def get_or_build(key, build):
+    """Cached payload for key, building and storing it on a miss"""
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, PUBLIC_CACHE_TIMEOUT)
+    return payload
+
+
+async def aget_or_build(key, build):
+    """get_or_build for async views; build is a coroutine function"""
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = await build()
+        await cache.aset(key, payload, PUBLIC_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_contractor(contractor):
+    """Drop cached payloads showing a contractor's rating or counters"""
+    if contractor is not None:
+        cache.delete(contractor_key(contractor.contractor_id))
+
+
+def invalidate_road(road, road_list=False):
+    """
+    Drop a road's cached detail and its contractor's public info
+
+    Pass road_list=True when the change is visible in the road list too
+    (roads added, removed, renamed or reassigned).
+    """
+    keys = [road_key(road.road_id)]
+    if road.contractor_id:
+        contractor_id = road.contractor.contractor_id
+        keys.append(contractor_key(contractor_id))
+    if road_list:
+        keys.append(ROAD_LIST_KEY)
+    cache.delete_many(keys)
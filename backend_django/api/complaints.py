@@ -0,0 +1,100 @@
+"""
+Filing complaints
+
+A new complaint is counted into the project stats (rating_engine), heatmap
+cells, contractor scorecard and daily rollup, bumps the contractor's
+complaint count and queues a recompute of its rating. create_complaint does
+all of it in one transaction, so a failure part way leaves neither the
+complaint nor any of its deltas behind.
+
+Severity and status are checked against the model choices on the way in;
+the aggregates count any other stored value as Medium and Open.
+"""
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .models import Complaint, ProjectComplaintStats, new_complaint_id
+from .cache import invalidate_road
+from .counters import increment_complaint_count
+from .heatmap import record_heatmap_complaint
+from .rating_engine import record_complaint_created
+from .rollups import record_rollup_complaint
+from .scorecards import record_scorecard_complaint, enqueue_rating_recompute
+
+
+SEVERITIES = [value for value, _ in Complaint.SEVERITY_CHOICES]
+STATUSES = [value for value, _ in Complaint.STATUS_CHOICES]
+
+
+def parse_severity(value):
+    """Severity from request data, Medium when absent; raises ValueError for an unknown one"""
+    if value in (None, ''):
+        return 'Medium'
+    if value not in SEVERITIES:
+        raise ValueError(f"severity must be one of: {', '.join(SEVERITIES)}")
+    return value
+
+
+def parse_status(value):
+    """Complaint status from request data; raises ValueError for an unknown one"""
+    if value not in STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(STATUSES)}")
+    return value
+
+
+def create_complaint(road, **fields):
+    """
+    Create a complaint against road and apply it to every aggregate
+
+    Args:
+        road: RoadProject, with its contractor loaded
+        fields: Complaint field values other than complaint_id and road
+
+    Returns:
+        (complaint, the queued rating recompute Job or None when the road has
+        no contractor)
+    """
+    with transaction.atomic():
+        complaint = Complaint.objects.create(complaint_id=new_complaint_id(), road=road, **fields)
+        record_complaint_created(complaint)
+        record_heatmap_complaint(complaint)
+        record_scorecard_complaint(complaint)
+        record_rollup_complaint(complaint)
+
+        # Count the complaint now; a job recalculates the contractor's rating
+        rating_job = None
+        if road.contractor:
+            increment_complaint_count(road.contractor)
+            rating_job = enqueue_rating_recompute(road.contractor)
+    invalidate_road(road)
+    return complaint, rating_job
+
+
+def complaint_summary():
+    """
+    Complaint counts for the dashboards
+
+    Totals, unresolved and severity counts are summed from the per-project
+    aggregates (one row per road); Resolved is a single count down the
+    complaints_status_created index. Whatever is neither is Rejected.
+    """
+    totals = ProjectComplaintStats.objects.aggregate(**{
+        field: Coalesce(Sum(field), 0)
+        for field in ('complaint_count', 'unresolved_count', 'critical_count', 'high_count',
+                      'medium_count', 'low_count')
+    })
+    resolved = Complaint.objects.filter(status='Resolved').count()
+    return {
+        'total': totals['complaint_count'],
+        'unresolved': totals['unresolved_count'],
+        'resolved': resolved,
+        'rejected': totals['complaint_count'] - totals['unresolved_count'] - resolved,
+        'severity': {
+            'Critical': totals['critical_count'],
+            'High': totals['high_count'],
+            'Medium': totals['medium_count'],
+            'Low': totals['low_count'],
+        },
+    }
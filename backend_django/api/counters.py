@@ -0,0 +1,87 @@
+"""
+Atomic contractor counters
+
+Ratings and complaints arrive concurrently (many people scanning the same QR
+code at once), so contractor counters are changed with single UPDATE
+statements built from F() expressions instead of read-modify-write cycles on
+a loaded instance. The database applies each increment to the current row,
+so no submission is lost, and only the touched columns are written.
+"""
+
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Complaint, Contractor, Rating
+
+
+def record_rating(contractor, rating_value):
+    """
+    Add a rating to a contractor's running sum/count and re-average
+
+    current_rating is computed in the same UPDATE from the row's values at
+    the time it is applied, so concurrent submissions never overwrite each
+    other's average.
+
+    Returns:
+        the new current_rating (also refreshed on the instance)
+    """
+    Contractor.objects.filter(pk=contractor.pk).update(
+        rating_sum=F('rating_sum') + rating_value,
+        rating_count=F('rating_count') + 1,
+        current_rating=(F('rating_sum') + rating_value) / (F('rating_count') + 1),
+        updated_at=timezone.now()
+    )
+    contractor.refresh_from_db(fields=['rating_sum', 'rating_count', 'current_rating', 'updated_at'])
+    return contractor.current_rating
+
+
+def increment_complaint_count(contractor, amount=1):
+    """Bump total_complaints in the database and refresh it on the instance"""
+    Contractor.objects.filter(pk=contractor.pk).update(
+        total_complaints=F('total_complaints') + amount,
+        updated_at=timezone.now()
+    )
+    contractor.refresh_from_db(fields=['total_complaints', 'updated_at'])
+    return contractor.total_complaints
+
+
+def recount_complaints(*contractor_ids):
+    """
+    Recount total_complaints of the given contractors from the complaints table
+
+    For changes that move or delete complaints in bulk (road reassignment or
+    deletion) instead of one at a time.
+    """
+    complaints = Complaint.objects.filter(road__contractor=OuterRef('pk')).order_by() \
+        .values('road__contractor').annotate(total=Count('id')).values('total')[:1]
+    return Contractor.objects.filter(id__in=contractor_ids).update(
+        total_complaints=Coalesce(Subquery(complaints), Value(0), output_field=IntegerField()),
+        updated_at=timezone.now()
+    )
+
+
+def set_current_rating(contractor, rating):
+    """Persist a recalculated rating without rewriting the rest of the row"""
+    contractor.current_rating = rating
+    contractor.save(update_fields=['current_rating', 'updated_at'])
+
+
+def rebuild_rating_totals():
+    """
+    Recount rating_sum/rating_count for every contractor from the ratings table
+
+    For scripts that insert Rating rows directly instead of going through
+    record_rating. Leaves current_rating alone.
+    """
+    totals = Rating.objects.filter(contractor=OuterRef('pk')).order_by().values('contractor')
+    return Contractor.objects.update(
+        rating_sum=Coalesce(
+            Subquery(totals.annotate(total=Sum('rating_value')).values('total')[:1]),
+            Value(0.0), output_field=FloatField()
+        ),
+        rating_count=Coalesce(
+            Subquery(totals.annotate(total=Count('id')).values('total')[:1]),
+            Value(0), output_field=IntegerField()
+        ),
+    )
@@ -0,0 +1,404 @@
+"""
+Synthetic Dataset Generator
+
+Builds large, reproducible datasets for performance work: contractors, road
+projects clustered around a few city centres, complaints with skewed
+severity/status/age distributions and ratings. Everything is drawn from one
+seeded random.Random, and dates are laid out relative to an anchor day, so
+the same seed and anchor always produce the same rows.
+
+Contractors and roads are streamed in chunks through bulk_create;
+complaints and ratings, the tables that reach millions of rows, are
+inserted as prepared tuples with executemany. Afterwards the derived data
+that the views normally keep up to date (contractor counters, rating totals,
+ProjectComplaintStats, heatmap cells) is rebuilt in bulk.
+
+Generated rows carry the GENERATED_PREFIX in their public ids so they can be
+told apart from, and cleared without touching, real data.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate, islice
+from operator import itemgetter
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import geohash
+from .counters import rebuild_rating_totals
+from .heatmap import rebuild_heatmap
+from .models import Contractor, RoadProject, Complaint, Rating
+from .rating_batch import recompute_all_ratings
+from .scorecards import rebuild_scorecards
+from .rollups import rebuild_rollups
+
+
+GENERATED_PREFIX = 'GEN-'
+
+# Named sizes shared by the generate_dataset and benchmark commands
+DATASET_SIZES = {
+    'small': {'contractors': 10, 'roads': 200, 'complaints': 2000, 'ratings': 500},
+    'medium': {'contractors': 50, 'roads': 2000, 'complaints': 50000, 'ratings': 10000},
+    'large': {'contractors': 200, 'roads': 10000, 'complaints': 1000000, 'ratings': 100000},
+}
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# (name, latitude, longitude, spread in degrees)
+CITY_CENTRES = [
+    ('Bengaluru', 12.9716, 77.5946, 0.12),
+    ('Mumbai', 19.0760, 72.8777, 0.10),
+    ('Delhi', 28.6139, 77.2090, 0.15),
+    ('Chennai', 13.0827, 80.2707, 0.10),
+    ('Hyderabad', 17.3850, 78.4867, 0.12),
+    ('Pune', 18.5204, 73.8567, 0.08),
+]
+
+# Relative weights
+SEVERITY_WEIGHTS = {'Low': 30, 'Medium': 40, 'High': 20, 'Critical': 10}
+DAMAGE_TYPE_WEIGHTS = {'Pothole': 45, 'Crack': 25, 'Erosion': 10, 'Flooding': 10, 'Other': 10}
+RATING_WEIGHTS = {1: 8, 2: 10, 3: 22, 4: 35, 5: 25}
+ROAD_STATUS_WEIGHTS = {'Active': 60, 'Completed': 30, 'Under Maintenance': 10}
+
+# Complaint ages follow an exponential distribution with this mean (days),
+# truncated at COMPLAINT_HISTORY_DAYS, so recent complaints dominate
+COMPLAINT_MEAN_AGE_DAYS = 120
+COMPLAINT_HISTORY_DAYS = 730
+
+# Complaints are scattered around their road with this standard deviation
+COMPLAINT_SPREAD_DEGREES = 0.002
+
+ROAD_KINDS = ['Road', 'Street', 'Avenue', 'Main Road', 'Cross', 'Highway', 'Ring Road', 'Layout Road']
+ROAD_AREAS = [
+    'Market', 'Station', 'Lake', 'Temple', 'Industrial', 'University', 'Airport',
+    'Harbour', 'Garden', 'Fort', 'Hospital', 'Colony', 'Bazaar', 'Hill', 'River',
+]
+CONTRACTOR_WORDS = [
+    'Apex', 'Metro', 'Prime', 'Urban', 'Highway', 'Summit', 'Global', 'Royal',
+    'Unity', 'Vertex', 'Delta', 'Pioneer', 'Crown', 'Sterling', 'Allied',
+]
+CONTRACTOR_SUFFIXES = ['Constructions', 'Infra', 'Roadways', 'Builders', 'Engineering', 'Projects']
+
+# Complaints and ratings are written as plain tuples (see _insert_rows); the
+# other columns are nullable and left empty
+COMPLAINT_COLUMNS = [
+    'complaint_id', 'road', 'user_id', 'damage_type', 'description', 'latitude', 'longitude',
+    'geohash', 'status', 'severity', 'resolved_date', 'resolution_description', 'created_at', 'updated_at',
+]
+RATING_COLUMNS = ['contractor', 'road', 'user_id', 'rating_value', 'comment', 'created_at', 'updated_at']
+COMPLAINT_GEOHASH_INDEX = COMPLAINT_COLUMNS.index('geohash')
+
+# Complaint tuples are cheap to hold, and larger sorted chunks insert faster
+COMPLAINT_CHUNK_FACTOR = 5
+
+
+def _sampler(rng, population, weights, block=1024):
+    """Callable returning one weighted pick from population, drawn in blocks"""
+    cumulative = list(accumulate(weights))
+    pending = []
+
+    def draw():
+        if not pending:
+            pending.extend(rng.choices(population, cum_weights=cumulative, k=block))
+            pending.reverse()
+        return pending.pop()
+    return draw
+
+
+def _weighted(rng, weights):
+    """Sampler over the keys of a {value: weight} dict"""
+    return _sampler(rng, list(weights), list(weights.values()))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep explicit created_at/updated_at values
+
+    auto_now/auto_now_add would otherwise stamp every row with the insert time.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def anchor_time(anchor_date=None):
+    """Midnight UTC of anchor_date (default today); all generated dates hang off it"""
+    anchor_date = anchor_date or timezone.now().date()
+    return datetime.combine(anchor_date, time.min, tzinfo=dt_timezone.utc)
+
+
+def generated_rows_exist():
+    return Contractor.objects.filter(contractor_id__startswith=GENERATED_PREFIX).exists()
+
+
+def clear_generated():
+    """Delete previously generated rows; complaints first so no ORM cascade walks them"""
+    with transaction.atomic():
+        Complaint.objects.filter(complaint_id__startswith=GENERATED_PREFIX).delete()
+        Rating.objects.filter(contractor__contractor_id__startswith=GENERATED_PREFIX).delete()
+        RoadProject.objects.filter(road_id__startswith=GENERATED_PREFIX).delete()
+        Contractor.objects.filter(contractor_id__startswith=GENERATED_PREFIX).delete()
+
+
+def _contractor_rows(rng, count, created_at):
+    password = make_password('contractor123')
+    for number in range(1, count + 1):
+        name = f'{rng.choice(CONTRACTOR_WORDS)} {rng.choice(CONTRACTOR_SUFFIXES)} {number}'
+        yield Contractor(
+            contractor_id=f'{GENERATED_PREFIX}CON-{number:05d}',
+            name=name,
+            email=f'gen-con-{number:05d}@example.com',
+            password=password,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+
+def _road_rows(rng, count, contractor_ids, anchor):
+    status = _weighted(rng, ROAD_STATUS_WEIGHTS)
+    # Zipf-like ownership: a few contractors hold most of the roads
+    owner_weights = [1 / rank for rank in range(1, len(contractor_ids) + 1)]
+    for number in range(1, count + 1):
+        city, centre_lat, centre_lng, spread = rng.choice(CITY_CENTRES)
+        latitude = round(rng.gauss(centre_lat, spread), 6)
+        longitude = round(rng.gauss(centre_lng, spread), 6)
+        contractor_id = rng.choices(contractor_ids, weights=owner_weights)[0] if contractor_ids else None
+
+        construction_date = anchor - timedelta(days=rng.randint(120, 365 * 12))
+        completion_date = construction_date + timedelta(days=rng.randint(60, 540))
+        warranty_years = rng.choice((3, 5, 5, 10, 10, 10))
+        road_id = f'{GENERATED_PREFIX}ROAD-{number:07d}'
+        road_name = f'{rng.choice(ROAD_AREAS)} {rng.choice(ROAD_KINDS)} {number}'
+
+        yield RoadProject(
+            road_id=road_id,
+            road_name=road_name,
+            contractor_id=contractor_id,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=geohash.encode(latitude, longitude),
+            address=f'{road_name}, {city}',
+            construction_date=construction_date,
+            completion_date=completion_date,
+            warranty_period_years=warranty_years,
+            warranty_end_date=completion_date + timedelta(days=365 * warranty_years),
+            qr_code_data=f'{{"roadId": "{road_id}", "roadName": "{road_name}"}}',
+            project_cost=round(rng.uniform(5e5, 5e7), 2),
+            road_length=round(rng.uniform(0.2, 25), 2),
+            status=status(),
+            created_at=construction_date,
+            updated_at=completion_date,
+        )
+
+
+def _resolution(rng, age_days):
+    """(status, days to resolution or None); older complaints are more likely closed"""
+    closed_probability = min(0.9, 0.1 + age_days / 200)
+    if rng.random() >= closed_probability:
+        return ('Under Review' if rng.random() < 0.3 else 'Open'), None
+    days = min(age_days, rng.expovariate(1 / 14))
+    return ('Rejected' if rng.random() < 0.1 else 'Resolved'), days
+
+
+def _complaint_rows(rng, count, roads, anchor):
+    """Complaint value tuples in COMPLAINT_COLUMNS order, ready for the database"""
+    adapt = connection.ops.adapt_datetimefield_value
+    severity = _weighted(rng, SEVERITY_WEIGHTS)
+    damage_type = _weighted(rng, DAMAGE_TYPE_WEIGHTS)
+    # Lognormal road weights give a realistic mix of hotspots and quiet roads
+    road = _sampler(rng, roads, [rng.lognormvariate(0, 1.2) for _ in roads])
+
+    for number in range(1, count + 1):
+        road_pk, road_lat, road_lng, road_name = road()
+
+        age_days = min(rng.expovariate(1 / COMPLAINT_MEAN_AGE_DAYS), COMPLAINT_HISTORY_DAYS)
+        created_at = anchor - timedelta(days=age_days)
+        status, resolved_after = _resolution(rng, age_days)
+        created = adapt(created_at)
+        resolved = adapt(created_at + timedelta(days=resolved_after)) if resolved_after is not None else None
+
+        latitude = round(rng.gauss(road_lat, COMPLAINT_SPREAD_DEGREES), 6)
+        longitude = round(rng.gauss(road_lng, COMPLAINT_SPREAD_DEGREES), 6)
+        kind = damage_type()
+
+        yield (
+            f'{GENERATED_PREFIX}C-{number:08d}',
+            road_pk,
+            f'user-{rng.randint(1, max(1, count // 5))}',
+            kind,
+            f'{kind} reported on {road_name}',
+            latitude,
+            longitude,
+            geohash.encode(latitude, longitude),
+            status,
+            severity(),
+            resolved,
+            'Repaired by contractor' if status == 'Resolved' else None,
+            created,
+            resolved or created,
+        )
+
+
+def _rating_rows(rng, count, roads_by_contractor, anchor):
+    """Rating value tuples in RATING_COLUMNS order, ready for the database"""
+    adapt = connection.ops.adapt_datetimefield_value
+    value = _weighted(rng, RATING_WEIGHTS)
+    contractor_ids = list(roads_by_contractor)
+    for number in range(1, count + 1):
+        contractor_id = rng.choice(contractor_ids)
+        created = adapt(anchor - timedelta(days=rng.uniform(0, COMPLAINT_HISTORY_DAYS)))
+        yield (
+            contractor_id,
+            rng.choice(roads_by_contractor[contractor_id]),
+            f'user-{rng.randint(1, max(1, count // 3))}',
+            value(),
+            None if rng.random() < 0.6 else 'Generated rating',
+            created,
+            created,
+        )
+
+
+def _insert_rows(model, columns, rows, chunk_size, progress=None, sort_key=None):
+    """
+    executemany() prepared value tuples into model's table
+
+    Skips model instantiation and per-field preparation in bulk_create, which
+    dominate the cost at millions of rows. Sorting each chunk by the key of
+    the most scattered index keeps its B-tree pages hot while inserting.
+    """
+    fields = [model._meta.get_field(name) for name in columns]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields))
+    )
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        if sort_key:
+            chunk.sort(key=sort_key)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, chunk)
+        written += len(chunk)
+        if progress:
+            progress(model, written)
+    return written
+
+
+def _bulk_insert(model, rows, chunk_size, progress=None):
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk, batch_size=chunk_size)
+        written += len(chunk)
+        if progress:
+            progress(model, written)
+    return written
+
+
+def sync_contractor_counters():
+    """Set total_projects/total_complaints from the road and complaint tables"""
+    projects = RoadProject.objects.filter(contractor=OuterRef('pk')).order_by() \
+        .values('contractor').annotate(total=Count('id')).values('total')[:1]
+    complaints = Complaint.objects.filter(road__contractor=OuterRef('pk')).order_by() \
+        .values('road__contractor').annotate(total=Count('id')).values('total')[:1]
+    return Contractor.objects.update(
+        total_projects=Coalesce(Subquery(projects), Value(0), output_field=IntegerField()),
+        total_complaints=Coalesce(Subquery(complaints), Value(0), output_field=IntegerField()),
+    )
+
+
+def generate_dataset(contractors, roads, complaints, ratings, seed=42, anchor_date=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE, derived=True, progress=None):
+    """
+    Generate and insert a synthetic dataset
+
+    Args:
+        contractors, roads, complaints, ratings: row counts
+        seed: random seed; the same seed and anchor give identical data
+        anchor_date: date that "now" is taken to be (default today)
+        chunk_size: rows built and inserted per transaction
+        derived: rebuild counters, rating aggregates, scorecards, rollups and heatmap afterwards
+        progress: optional callable(model, rows_written_so_far)
+
+    Returns:
+        dict of rows written per table
+    """
+    rng = random.Random(seed)
+    anchor = anchor_time(anchor_date)
+    history_start = anchor - timedelta(days=365 * 12)
+
+    with explicit_timestamps(Contractor, RoadProject):
+        written = {'contractors': _bulk_insert(
+            Contractor, _contractor_rows(rng, contractors, history_start), chunk_size, progress
+        )}
+        contractor_ids = list(
+            Contractor.objects.filter(contractor_id__startswith=GENERATED_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+        written['roads'] = _bulk_insert(
+            RoadProject, _road_rows(rng, roads, contractor_ids, anchor), chunk_size, progress
+        )
+        road_rows = list(
+            RoadProject.objects.filter(road_id__startswith=GENERATED_PREFIX)
+            .order_by('id').values_list('id', 'latitude', 'longitude', 'road_name', 'contractor_id')
+        )
+
+        written['complaints'] = 0
+        if road_rows and complaints:
+            roads_for_complaints = [
+                (pk, float(latitude), float(longitude), name) for pk, latitude, longitude, name, _ in road_rows
+            ]
+            written['complaints'] = _insert_rows(
+                Complaint, COMPLAINT_COLUMNS,
+                _complaint_rows(rng, complaints, roads_for_complaints, anchor),
+                chunk_size * COMPLAINT_CHUNK_FACTOR, progress, sort_key=itemgetter(COMPLAINT_GEOHASH_INDEX)
+            )
+
+        roads_by_contractor = {}
+        for pk, _, _, _, contractor_id in road_rows:
+            if contractor_id is not None:
+                roads_by_contractor.setdefault(contractor_id, []).append(pk)
+        written['ratings'] = 0
+        if roads_by_contractor and ratings:
+            written['ratings'] = _insert_rows(
+                Rating, RATING_COLUMNS, _rating_rows(rng, ratings, roads_by_contractor, anchor), chunk_size, progress
+            )
+
+    if derived:
+        rebuild_derived_data()
+    return written
+
+
+def rebuild_derived_data(batch_size=1000):
+    """Bring counters and aggregate tables in line after a bulk load"""
+    sync_contractor_counters()
+    rebuild_rating_totals()
+    ratings = recompute_all_ratings(batch_size=batch_size)['ratings']
+    rebuild_scorecards(ratings, batch_size=batch_size)
+    rebuild_rollups(batch_size=batch_size)
+    rebuild_heatmap(batch_size=batch_size)
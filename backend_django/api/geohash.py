@@ -0,0 +1,154 @@
+"""
+Geohash encoding and cell geometry
+
+Roads and complaints store a geohash of their coordinates in an indexed
+column. Every point inside a geohash cell shares the cell's string as a
+prefix, so "points in this cell" becomes a B-tree range scan
+(prefix <= geohash < prefix + '~') on any database backend. spatial.py
+builds the radius, bbox and nearest-road queries on top of these helpers.
+"""
+
+import math
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Stored precision: cells of roughly 4.8m x 4.8m
+GEOHASH_PRECISION = 9
+
+# Sorts after every BASE32 character, closing a prefix range
+PREFIX_END = '~'
+
+EARTH_RADIUS_METRES = 6371008.8
+METRES_PER_DEGREE_LAT = 111320.0
+
+
+def _cell_index(value, low, span, bits):
+    """
+    Index of the cell holding value after `bits` bisections of [low, low + span)
+
+    Cell edges are exact binary fractions, so the float estimate is corrected
+    against them; the result is what bit-by-bit bisection would produce.
+    """
+    count = 1 << bits
+    step = span / count
+    index = min(max(int((value - low) / step), 0), count - 1)
+    while index > 0 and value < low + index * step:
+        index -= 1
+    while index < count - 1 and value >= low + (index + 1) * step:
+        index += 1
+    return index
+
+
+def _spread_bits(value):
+    """Move bit i of a 32-bit value to bit 2i"""
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point (precision up to 12), or None when either coordinate is missing"""
+    if latitude is None or longitude is None:
+        return None
+
+    bit_count = precision * 5
+    lng_bits = (bit_count + 1) // 2
+    lat_bits = bit_count // 2
+    lng_index = _cell_index(float(longitude), -180.0, 360.0, lng_bits)
+    lat_index = _cell_index(float(latitude), -90.0, 180.0, lat_bits)
+
+    # Bits alternate longitude, latitude starting from the most significant
+    odd = bit_count % 2
+    code = (_spread_bits(lng_index) << (1 - odd)) | (_spread_bits(lat_index) << odd)
+    return ''.join([BASE32[(code >> shift) & 31] for shift in range(bit_count - 5, -1, -5)])
+
+
+def decode_bounds(geohash):
+    """(min_lat, min_lng, max_lat, max_lng) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            target[1 - bit] = mid
+            even = not even
+
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def cell_size(precision):
+    """(height, width) of a cell at a precision, in degrees"""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def prefix_range(prefix):
+    """Inclusive/exclusive string bounds matching every geohash under prefix"""
+    return prefix, prefix + PREFIX_END
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells=32):
+    """
+    Geohash cells that together cover a bounding box
+
+    Picks the finest precision whose covering needs at most max_cells cells,
+    so callers get a small, fixed number of range scans whatever the box
+    size. Boxes crossing the antimeridian are not supported.
+    """
+    min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+    min_lng, max_lng = max(-180.0, min_lng), min(180.0, max_lng)
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+        if rows * columns <= max_cells:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    latitudes = _steps(min_lat, max_lat, height)
+    longitudes = _steps(min_lng, max_lng, width)
+    return sorted({encode(lat, lng, precision) for lat in latitudes for lng in longitudes})
+
+
+def _steps(start, stop, step):
+    # One sample per cell row/column, always including the far edge
+    values = []
+    value = start
+    while value < stop:
+        values.append(value)
+        value += step
+    values.append(stop)
+    return values
+
+
+def haversine_metres(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in metres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METRES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude, longitude, radius_metres):
+    """Bounding box (min_lat, min_lng, max_lat, max_lng) around a circle"""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_delta = radius_metres / METRES_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    lng_delta = radius_metres / (METRES_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_delta, longitude - lng_delta, latitude + lat_delta, longitude + lng_delta
@@ -0,0 +1,183 @@
+"""
+Complaint density heatmap
+
+Complaint counts are pre-aggregated per geohash cell at several precisions
+(one per map zoom band) in ComplaintGeoCell, broken down by severity and
+status. Rows are adjusted by delta when a complaint is created or changes
+status, so serving a map tile is a single range read on the
+(precision, cell) index: every cell inside a tile shares the tile's geohash
+as a prefix.
+"""
+
+import operator
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from .geohash import decode_bounds, prefix_range
+from .models import Complaint, ComplaintGeoCell
+from .rating_engine import severity_count_field
+
+
+# Roughly 156km, 39km, 4.9km, 1.2km and 150m cells
+HEATMAP_PRECISIONS = (3, 4, 5, 6, 7)
+DEFAULT_HEATMAP_PRECISION = 5
+
+# A tile may be at most this many characters shorter than the precision
+# asked for (32 ** 2 = 1024 cells), and no response exceeds MAX_TILE_CELLS
+MAX_TILE_DEPTH = 2
+MAX_TILE_CELLS = 4096
+
+STATUS_COUNT_FIELDS = {
+    'Open': 'open_count',
+    'Under Review': 'under_review_count',
+    'Resolved': 'resolved_count',
+    'Rejected': 'rejected_count',
+}
+
+SEVERITY_LABELS = {
+    'critical_count': 'Critical',
+    'high_count': 'High',
+    'medium_count': 'Medium',
+    'low_count': 'Low',
+}
+
+
+def precision_for_zoom(zoom):
+    """Heatmap precision matching a web map zoom level (0-20)"""
+    if zoom <= 5:
+        return 3
+    if zoom <= 8:
+        return 4
+    if zoom <= 11:
+        return 5
+    if zoom <= 14:
+        return 6
+    return 7
+
+
+def _apply_deltas(geohash, deltas):
+    """Add deltas (field -> change) to the complaint's cell at every precision"""
+    now = timezone.now()
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    for precision in HEATMAP_PRECISIONS:
+        cell = geohash[:precision]
+        cells = ComplaintGeoCell.objects.filter(precision=precision, cell=cell)
+        if cells.update(updated_at=now, **updates):
+            continue
+        try:
+            with transaction.atomic():
+                ComplaintGeoCell.objects.create(precision=precision, cell=cell, **deltas)
+        except IntegrityError:
+            # Another request created the row first; apply on top of it
+            cells.update(updated_at=now, **updates)
+
+
+def record_heatmap_complaint(complaint):
+    """Count a new complaint into its heatmap cells"""
+    if not complaint.geohash:
+        return
+    _apply_deltas(complaint.geohash, {
+        'complaint_count': 1,
+        severity_count_field(complaint.severity): 1,
+        STATUS_COUNT_FIELDS.get(complaint.status, 'open_count'): 1,
+    })
+
+
+def record_heatmap_status_change(complaint, old_status):
+    """Move a complaint between status counts after its status changed"""
+    old_field = STATUS_COUNT_FIELDS.get(old_status, 'open_count')
+    new_field = STATUS_COUNT_FIELDS.get(complaint.status, 'open_count')
+    if not complaint.geohash or old_field == new_field:
+        return
+    _apply_deltas(complaint.geohash, {old_field: -1, new_field: 1})
+
+
+def _cell_counts(complaints, precision):
+    """
+    Per-cell counts of complaints at precision, as rows of cell and count fields
+
+    Like the incremental path, an unknown severity counts as Medium and an
+    unknown status as Open.
+    """
+    other_severities = [label for field, label in SEVERITY_LABELS.items() if field != 'medium_count']
+    other_statuses = [label for label, field in STATUS_COUNT_FIELDS.items() if field != 'open_count']
+    counts = {'complaint_count': Count('id')}
+    for field, severity in SEVERITY_LABELS.items():
+        match = ~Q(severity__in=other_severities) if field == 'medium_count' else Q(severity=severity)
+        counts[field] = Count('id', filter=match)
+    for status_value, field in STATUS_COUNT_FIELDS.items():
+        match = ~Q(status__in=other_statuses) if field == 'open_count' else Q(status=status_value)
+        counts[field] = Count('id', filter=match)
+    return (
+        complaints.filter(geohash__isnull=False)
+        .annotate(cell=Substr('geohash', 1, precision))
+        .order_by()
+        .values('cell')
+        .annotate(**counts)
+    )
+
+
+def remove_heatmap_complaints(complaints):
+    """
+    Subtract complaints that are about to be deleted from their cells
+
+    For deletions that bypass the views' per-complaint hooks, such as a road
+    deletion cascading to its complaints. Call it in the same transaction as
+    the delete.
+    """
+    now = timezone.now()
+    for precision in HEATMAP_PRECISIONS:
+        for row in _cell_counts(complaints, precision):
+            cell = row.pop('cell')
+            ComplaintGeoCell.objects.filter(precision=precision, cell=cell).update(
+                updated_at=now, **{field: F(field) - count for field, count in row.items()}
+            )
+
+
+def rebuild_heatmap(batch_size=1000):
+    """
+    Recompute every heatmap cell from the complaints table
+
+    One grouped query per precision. Needed after complaints are inserted or
+    deleted outside the views (bulk loads, direct database edits).
+
+    Returns:
+        number of cells written
+    """
+    written = 0
+    with transaction.atomic():
+        ComplaintGeoCell.objects.all().delete()
+        for precision in HEATMAP_PRECISIONS:
+            rows = _cell_counts(Complaint.objects.all(), precision)
+            cells = [ComplaintGeoCell(precision=precision, **row) for row in rows.iterator(chunk_size=2000)]
+            ComplaintGeoCell.objects.bulk_create(cells, batch_size=batch_size)
+            written += len(cells)
+    return written
+
+
+def tile_cells(precision, prefixes):
+    """Heatmap cells at precision lying under any of the given geohash prefixes"""
+    ranges = (Q(cell__gte=low, cell__lt=high) for low, high in map(prefix_range, prefixes))
+    return ComplaintGeoCell.objects.filter(
+        reduce(operator.or_, ranges),
+        precision=precision,
+        complaint_count__gt=0
+    ).order_by('cell')[:MAX_TILE_CELLS]
+
+
+def cell_data(geo_cell):
+    """JSON payload for one heatmap cell"""
+    min_lat, min_lng, max_lat, max_lng = decode_bounds(geo_cell.cell)
+    return {
+        'cell': geo_cell.cell,
+        'latitude': round((min_lat + max_lat) / 2, 6),
+        'longitude': round((min_lng + max_lng) / 2, 6),
+        'bounds': [min_lat, min_lng, max_lat, max_lng],
+        'count': geo_cell.complaint_count,
+        'severity': {label: getattr(geo_cell, field) for field, label in SEVERITY_LABELS.items()},
+        'status': {label: getattr(geo_cell, field) for label, field in STATUS_COUNT_FIELDS.items()},
+    }
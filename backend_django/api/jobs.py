@@ -0,0 +1,246 @@
+"""
+Database-backed job queue
+
+Requests enqueue work as Job rows and return at once; `manage.py run_jobs`
+workers, on any number of hosts, claim and run them:
+
+- Claiming is a conditional UPDATE of one row (queued and due, or running
+  with an expired lease), so two workers never both win the same job, on
+  SQLite or PostgreSQL alike.
+- A claimed job is leased to its worker for lease_seconds. Progress reports
+  renew the lease; a worker that dies stops renewing it and another worker
+  picks the job up once it expires.
+- A failed attempt is retried after an exponential backoff until the job
+  has used max_attempts.
+
+Handlers are listed in JOB_HANDLERS by dotted path. Each is called as
+handler(progress=progress, **payload), where progress(done, total) reports
+progress, and returns a JSON-serializable result.
+"""
+
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+JOB_HANDLERS = {
+    'generate_contractor_qr_codes': 'api.qr_bulk.generate_contractor_qr_codes',
+    'recompute_contractor_rating': 'api.scorecards.recompute_contractor_rating',
+    'rebuild_contractor_aggregates': 'api.scorecards.rebuild_contractor_aggregates',
+    'refresh_stale_ratings': 'api.rating_refresh.refresh_stale_ratings',
+}
+
+QUEUED, RUNNING, COMPLETED, FAILED = 'queued', 'running', 'completed', 'failed'
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Retry n waits RETRY_BASE_SECONDS * 2**(n-1), at most RETRY_MAX_SECONDS
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 60 * 60
+
+# Finished jobs are kept this long for the status API, then pruned
+JOB_RETENTION = timedelta(days=7)
+PRUNE_INTERVAL_SECONDS = 60 * 60
+
+# Candidates read per claim attempt; others may win some of them
+CLAIM_CANDIDATES = 10
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker has claimed it"""
+
+
+def enqueue(name, payload=None, dedupe_key=None, delay=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Queue a job for the workers
+
+    Args:
+        name: key of JOB_HANDLERS
+        payload: keyword arguments for the handler (JSON-serializable)
+        dedupe_key: while a job with this key is still queued, return that
+            job instead of queueing another
+        delay: optional timedelta before the job may run
+
+    Returns:
+        the Job
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job: {name}')
+    run_at = timezone.now() + (delay or timedelta())
+    while True:
+        if dedupe_key:
+            queued = Job.objects.filter(dedupe_key=dedupe_key, status=QUEUED).first()
+            if queued is not None:
+                return queued
+        try:
+            with transaction.atomic():
+                return Job.objects.create(name=name, payload=payload or {}, dedupe_key=dedupe_key,
+                                          run_at=run_at, max_attempts=max_attempts)
+        except IntegrityError:
+            # Another request queued the same key first; return its job
+            if not dedupe_key:
+                raise
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _claimable(now):
+    return Q(status=QUEUED, run_at__lte=now) | Q(status=RUNNING, locked_until__lt=now)
+
+
+def claim_job(worker_id, names=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Lease the next due job to worker_id; None when there is nothing to do"""
+    now = timezone.now()
+    candidates = Job.objects.filter(_claimable(now))
+    if names:
+        candidates = candidates.filter(name__in=names)
+    for job_id in candidates.order_by('run_at').values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        # Re-checked in the UPDATE itself: only one worker can match the row
+        claimed = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status=RUNNING, locked_by=worker_id, locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1, started_at=now, updated_at=now
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _leased(job, worker_id):
+    return Job.objects.filter(pk=job.pk, status=RUNNING, locked_by=worker_id)
+
+
+def retry_delay(attempts):
+    """Backoff before retry number attempts, with up to 10% jitter"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * (1 + random.random() / 10))
+
+
+def _finish(job, worker_id, result):
+    now = timezone.now()
+    return _leased(job, worker_id).update(
+        status=COMPLETED, result=result, error=None, locked_by=None, locked_until=None,
+        finished_at=now, updated_at=now
+    )
+
+
+def _fail(job, worker_id, error):
+    """Queue the job for a retry, or fail it after its last attempt; returns the new status"""
+    now = timezone.now()
+    released = {'locked_by': None, 'locked_until': None, 'updated_at': now}
+    if job.attempts < job.max_attempts:
+        try:
+            with transaction.atomic():
+                _leased(job, worker_id).update(
+                    status=QUEUED, error=error, run_at=now + retry_delay(job.attempts), **released
+                )
+            return QUEUED
+        except IntegrityError:
+            # A newer job with the same dedupe_key is queued and will do the work
+            error = f'{error} (superseded by a queued job with the same key)'
+    _leased(job, worker_id).update(status=FAILED, error=error, finished_at=now, **released)
+    return FAILED
+
+
+def run_job(job, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Run a claimed job and record its outcome; returns the final status"""
+    if job.attempts > job.max_attempts:
+        # Claimed again after its last attempt's lease expired (worker died)
+        return _fail(job, worker_id, 'Lease expired on the final attempt')
+
+    def progress(done, total):
+        # Doubles as the heartbeat that keeps the lease
+        now = timezone.now()
+        renewed = _leased(job, worker_id).update(
+            done=done, total=total, locked_until=now + timedelta(seconds=lease_seconds), updated_at=now
+        )
+        if not renewed:
+            raise LeaseLost(f'Lease on job {job.pk} lost')
+
+    try:
+        handler = import_string(JOB_HANDLERS[job.name])
+        result = handler(progress=progress, **job.payload)
+    except LeaseLost:
+        return None
+    except Exception as e:
+        traceback.print_exc()
+        return _fail(job, worker_id, str(e) or e.__class__.__name__)
+    _finish(job, worker_id, result)
+    return COMPLETED
+
+
+def prune_finished_jobs(retention=JOB_RETENTION):
+    """Delete completed and failed jobs finished more than retention ago"""
+    cutoff = timezone.now() - retention
+    deleted, _ = Job.objects.filter(status__in=[COMPLETED, FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(worker_id=None, names=None, burst=False, lease_seconds=DEFAULT_LEASE_SECONDS,
+         poll_interval=DEFAULT_POLL_INTERVAL, should_stop=lambda: False, log=None):
+    """
+    Claim and run jobs until should_stop() returns true
+
+    burst: return as soon as no job is due instead of polling for more.
+    log: optional callable(str), told about every finished job.
+
+    Returns:
+        number of jobs run
+    """
+    worker_id = worker_id or default_worker_id()
+    ran = 0
+    last_prune = None
+    while not should_stop():
+        # Between jobs as between requests: drop broken or expired connections
+        close_old_connections()
+        if last_prune is None or time.monotonic() - last_prune > PRUNE_INTERVAL_SECONDS:
+            prune_finished_jobs()
+            last_prune = time.monotonic()
+
+        job = claim_job(worker_id, names, lease_seconds)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        started = time.perf_counter()
+        outcome = run_job(job, worker_id, lease_seconds)
+        ran += 1
+        if log:
+            log(f'{job.name} {job.pk} attempt {job.attempts}: '
+                f'{outcome or "lease lost"} in {time.perf_counter() - started:.2f}s')
+    return ran
+
+
+def job_data(job):
+    """Status API representation of a job"""
+    return {
+        'id': job.pk.hex,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'maxAttempts': job.max_attempts,
+        'done': job.done,
+        'total': job.total,
+        'result': job.result,
+        'error': job.error,
+        'runAt': job.run_at.isoformat(),
+        'createdAt': job.created_at.isoformat(),
+        'updatedAt': job.updated_at.isoformat(),
+        'startedAt': job.started_at.isoformat() if job.started_at else None,
+        'finishedAt': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,283 @@
+"""
+Legacy Database Import
+
+Copies the Node.js/Sequelize SQLite database (Admins, contractors,
+road_projects, complaints, ratings) into the Django tables. The Django models
+kept the Sequelize column names, so legacy columns are matched to model
+fields by name rather than by position, and columns either side lacks are
+left out.
+
+Each legacy table is streamed in id order with fetchmany(). Every batch is
+written with bulk_create in one transaction together with the table's
+ImportCheckpoint, so an interrupted import loses at most the batch in flight
+and the next run carries on after the last committed id. A batch that breaks
+a constraint is retried row by row; the offending rows are skipped and
+reported instead of aborting the import.
+"""
+
+import sqlite3
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import geohash
+from .datagen import explicit_timestamps, rebuild_derived_data
+from .models import Admin, Contractor, RoadProject, Complaint, Rating, Photo, ImportCheckpoint
+from .photo_store import InvalidPhoto, store_photo_data_uri
+
+
+DEFAULT_BATCH_SIZE = 2000
+
+# derived_fields: model fields not copied even when the legacy table has the
+# column, because the import computes them or their meaning has changed
+LegacyTable = namedtuple('LegacyTable', 'name model derived_fields')
+
+# In dependency order: a table's foreign keys point at tables before it
+LEGACY_TABLES = [
+    LegacyTable('Admins', Admin, ()),
+    # qrCode held a data URI before QR images moved to the QR cache
+    LegacyTable('contractors', Contractor, ('rating_sum', 'rating_count', 'qr_code')),
+    LegacyTable('road_projects', RoadProject, ('geohash', 'qr_image')),
+    LegacyTable('complaints', Complaint, ('geohash', 'photo')),
+    LegacyTable('ratings', Rating, ()),
+]
+
+TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+# Errors that mean "this row is bad", as opposed to the database being unavailable
+ROW_ERRORS = (IntegrityError, DataError, ValidationError, ValueError, TypeError)
+
+
+class SkipRow(Exception):
+    """A legacy row that cannot be imported; the message says why"""
+
+
+def _store_inline_photo(data_uri):
+    """Move a base64 photo into the photo store; the Photo digest, or None if unreadable"""
+    try:
+        # No size limit here: these photos were already accepted once
+        stored = store_photo_data_uri(data_uri, max_bytes=2 ** 40)
+    except InvalidPhoto:
+        return None
+    photo, _ = Photo.objects.get_or_create(digest=stored['digest'], defaults={
+        'content_type': stored['contentType'],
+        'size': stored['size'],
+        'width': stored['width'],
+        'height': stored['height'],
+    })
+    return photo.digest
+
+
+def _prepare_road(values, context):
+    if values.get('contractor_id') not in context['contractors']:
+        values['contractor_id'] = None
+    values['geohash'] = geohash.encode(values.get('latitude'), values.get('longitude'))
+
+
+def _prepare_complaint(values, context):
+    if values.get('road_id') not in context['roads']:
+        raise SkipRow(f"road {values.get('road_id')} was not imported")
+    values['geohash'] = geohash.encode(values.get('latitude'), values.get('longitude'))
+    photo_url = values.get('photo_url')
+    if photo_url and photo_url.startswith('data:'):
+        values['photo_url'] = None
+        values['photo_id'] = _store_inline_photo(photo_url)
+
+
+def _prepare_rating(values, context):
+    if values.get('contractor_id') not in context['contractors']:
+        raise SkipRow(f"contractor {values.get('contractor_id')} was not imported")
+    if values.get('road_id') not in context['roads']:
+        values['road_id'] = None
+
+
+PREPARERS = {
+    'road_projects': _prepare_road,
+    'complaints': _prepare_complaint,
+    'ratings': _prepare_rating,
+}
+
+
+def _mapped_fields(table, columns):
+    """Model fields whose column the legacy table has, minus the derived ones"""
+    present = set(columns)
+    return [
+        field for field in table.model._meta.concrete_fields
+        if field.column in present and field.name not in table.derived_fields
+    ]
+
+
+def _build_instance(table, fields, record, context, now):
+    values = {}
+    for field in fields:
+        value = record[field.column]
+        if value is None and not field.null:
+            if field.has_default():
+                value = field.get_default()
+            elif field.name in TIMESTAMP_FIELDS:
+                value = now
+        values[field.attname] = value
+    prepare = PREPARERS.get(table.name)
+    if prepare:
+        prepare(values, context)
+    return table.model(**values)
+
+
+def _write_batch(model, instances, on_skip):
+    """bulk_create instances, falling back to one row at a time to isolate bad rows"""
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+        return len(instances)
+    except ROW_ERRORS:
+        pass
+
+    written = 0
+    for instance in instances:
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([instance])
+            written += 1
+        except ROW_ERRORS as e:
+            on_skip(instance.pk, str(e))
+    return written
+
+
+def _legacy_table_exists(source, name):
+    row = source.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def import_table(source, table, batch_size=DEFAULT_BATCH_SIZE, progress=None, on_skip=None):
+    """
+    Copy one legacy table, resuming from its checkpoint
+
+    Args:
+        source: sqlite3 connection to the legacy database
+        table: LegacyTable
+        batch_size: rows fetched, written and checkpointed per transaction
+        progress: optional callable(table_name, copied, skipped, elapsed_seconds),
+            called after every batch with this run's running totals
+        on_skip: optional callable(table_name, legacy_id, reason)
+
+    Returns:
+        dict with state ('imported', 'already imported' or 'missing'),
+        resumedFrom (legacy id), copied, skipped, seconds and rowsPerSecond
+        for this run
+    """
+    result = {'state': 'imported', 'resumedFrom': 0, 'copied': 0, 'skipped': 0, 'seconds': 0.0, 'rowsPerSecond': 0.0}
+    if not _legacy_table_exists(source, table.name):
+        result['state'] = 'missing'
+        return result
+
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(source_table=table.name)
+    result['resumedFrom'] = checkpoint.last_id
+    if checkpoint.completed:
+        result['state'] = 'already imported'
+        return result
+
+    def skip(legacy_id, reason):
+        result['skipped'] += 1
+        if on_skip:
+            on_skip(table.name, legacy_id, reason)
+
+    # Targets of the foreign keys, which earlier tables have finished filling
+    context = {
+        'contractors': set(Contractor.objects.values_list('id', flat=True)),
+        'roads': set(RoadProject.objects.values_list('id', flat=True)),
+    }
+
+    started = time.perf_counter()
+    cursor = source.execute(f'SELECT * FROM "{table.name}" WHERE id > ? ORDER BY id', (checkpoint.last_id,))
+    columns = [description[0] for description in cursor.description]
+    fields = _mapped_fields(table, columns)
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        now = timezone.now()
+        skipped_before = result['skipped']
+        instances = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            try:
+                instances.append(_build_instance(table, fields, record, context, now))
+            except SkipRow as e:
+                skip(record['id'], str(e))
+
+        with transaction.atomic():
+            written = _write_batch(table.model, instances, skip) if instances else 0
+            checkpoint.last_id = rows[-1][columns.index('id')]
+            checkpoint.copied += written
+            checkpoint.skipped += result['skipped'] - skipped_before
+            checkpoint.save()
+        result['copied'] += written
+
+        if progress:
+            progress(table.name, result['copied'], result['skipped'], time.perf_counter() - started)
+
+    checkpoint.completed = True
+    checkpoint.save(update_fields=['completed', 'updated_at'])
+
+    result['seconds'] = time.perf_counter() - started
+    if result['seconds'] > 0:
+        result['rowsPerSecond'] = (result['copied'] + result['skipped']) / result['seconds']
+    return result
+
+
+def clear_target_tables():
+    """Delete everything the import writes; dependants first so no ORM cascade walks them"""
+    with transaction.atomic():
+        for table in reversed(LEGACY_TABLES):
+            table.model.objects.all().delete()
+
+
+def reset_sequences():
+    """Move id sequences past the copied ids (no-op on SQLite)"""
+    statements = connection.ops.sequence_reset_sql(no_style(), [table.model for table in LEGACY_TABLES])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def import_legacy_database(source_path, batch_size=DEFAULT_BATCH_SIZE, restart=False, clear=True,
+                           derived=True, progress=None, on_skip=None):
+    """
+    Import every legacy table, resuming an interrupted run
+
+    Args:
+        source_path: path of the Node.js SQLite database (opened read-only)
+        batch_size: rows per fetch/bulk_create/checkpoint transaction
+        restart: forget earlier checkpoints and start from the first row
+        clear: empty the target tables before a fresh (not resumed) import
+        derived: rebuild counters, rating aggregates, scorecards, rollups and heatmap afterwards
+        progress, on_skip: see import_table
+
+    Returns:
+        dict of import_table results per legacy table
+    """
+    source = sqlite3.connect(f'{Path(source_path).resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        if restart:
+            ImportCheckpoint.objects.all().delete()
+        if clear and not ImportCheckpoint.objects.exists():
+            clear_target_tables()
+
+        with explicit_timestamps(*(table.model for table in LEGACY_TABLES)):
+            results = {
+                table.name: import_table(source, table, batch_size, progress, on_skip)
+                for table in LEGACY_TABLES
+            }
+    finally:
+        source.close()
+
+    reset_sequences()
+    if derived:
+        rebuild_derived_data()
+    return results
@@ -0,0 +1,218 @@
+"""
+Concurrency Benchmark
+
+Serves the app with gunicorn as the deploy configs do and drives it with
+many concurrent clients over real sockets, once per server type:
+
+- wsgi: sync workers, one request in flight per worker process
+- asgi: uvicorn workers, where the async read views (views_async.py) of a
+  worker share its event loop
+
+Both servers get the same number of worker processes and, with cpus, the
+same CPUs, so the difference in throughput and latency is what the async
+views gain on the same core count. Clients request the read endpoints that
+have async versions in turn (QR-scan landing pages, road list, complaints
+feed, contractors list) and open a new connection per request, since sync workers do not
+keep connections alive.
+
+Against a local SQLite file every query returns at once and both servers
+are bound by CPU alone; query_latency adds a wait to each query in the
+servers (load_test_gunicorn.py) to model a database across the network.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from .benchmark import percentile
+from .models import Contractor, RoadProject
+
+
+SERVERS = {
+    'wsgi': ('smart_road_system.wsgi:application', 'sync'),
+    'asgi': ('smart_road_system.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+HOST = '127.0.0.1'
+
+STARTUP_TIMEOUT = 30
+
+
+def read_paths():
+    """Paths of the read endpoints with async versions, for rows of the generated dataset"""
+    contractor = Contractor.objects.filter(contractor_id__startswith='GEN-').order_by('id')[1:2].get()
+    road = RoadProject.objects.filter(contractor=contractor).order_by('id').first()
+    return [
+        reverse('get_contractor_public_info', args=[contractor.contractor_id]),
+        reverse('road_detail', args=[road.road_id]),
+        reverse('road_list'),
+        reverse('complaints') + '?' + urlencode({'limit': 50}),
+        reverse('contractors'),
+    ]
+
+
+def _database_url(db):
+    credentials = f"{quote(db['USER'])}:{quote(db['PASSWORD'])}@" if db['USER'] else ''
+    port = f":{db['PORT']}" if db['PORT'] else ''
+    return f"postgres://{credentials}{db['HOST']}{port}/{quote(db['NAME'])}"
+
+
+def server_environment(query_latency=0, cache_dir=None):
+    """
+    Environment pointing a server process at the current (benchmark) database,
+    and with cache_dir, at an empty file cache of its own
+    """
+    env = dict(os.environ)
+    env['BENCHMARK_QUERY_LATENCY_MS'] = str(query_latency)
+    if cache_dir and 'CACHE_BACKEND' not in env:
+        env['CACHE_LOCATION'] = str(cache_dir)
+    db = connection.settings_dict
+    if connection.vendor == 'sqlite':
+        env.pop('DATABASE_URL', None)
+        env['DATABASE_NAME'] = str(db['NAME'])
+    elif connection.vendor == 'postgresql':
+        env['DATABASE_URL'] = _database_url(db)
+    else:
+        raise ValueError(f'Unsupported database vendor: {connection.vendor}')
+    env['DEBUG'] = 'False'
+    env['ALLOWED_HOSTS'] = HOST
+    return env
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port, path):
+    """(status, seconds) of one GET over a new connection; status 0 on a socket error"""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        # Drain the body; the server closes the connection after it
+        while await reader.read(65536):
+            pass
+        writer.close()
+        status = int(status_line.split()[1])
+    except (OSError, IndexError, ValueError):
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def _wait_until_ready(process, port):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    path = reverse('health_check')
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        if asyncio.run(fetch(port, path))[0] == 200:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'Server not ready after {STARTUP_TIMEOUT}s')
+
+
+@contextmanager
+def run_server(kind, workers, cpus=None, query_latency=0, log=None):
+    """
+    Start gunicorn serving kind ('wsgi' or 'asgi') and yield its port
+
+    query_latency: milliseconds added to every database query.
+    cpus: pin the server's processes to the first cpus CPUs (Linux only).
+    log: file object for the server's output (default discarded).
+    """
+    app, worker_class = SERVERS[kind]
+    port = _free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', app,
+        '--config', 'python:api.load_test_gunicorn',
+        '--worker-class', worker_class,
+        '--workers', str(workers),
+        '--bind', f'{HOST}:{port}',
+        '--backlog', '4096',
+    ]
+    preexec_fn = None
+    if cpus:
+        preexec_fn = lambda: os.sched_setaffinity(0, range(cpus))  # noqa: E731
+    # Each server starts cold, so the second one measured gains nothing from the first
+    cache_dir = tempfile.TemporaryDirectory(prefix='load-test-cache-')
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env=server_environment(query_latency, cache_dir.name),
+        preexec_fn=preexec_fn, stdout=log or subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_until_ready(process, port)
+        yield port
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=STARTUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        cache_dir.cleanup()
+
+
+async def _client(port, paths, offset, stop_at, record_from, samples):
+    index = offset
+    while time.perf_counter() < stop_at:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        status, seconds = await fetch(port, path)
+        if started >= record_from:
+            samples.append((path, status, seconds))
+
+
+async def _drive(port, paths, concurrency, duration, warmup):
+    started = time.perf_counter()
+    record_from = started + warmup
+    stop_at = record_from + duration
+    samples = []
+    await asyncio.gather(*(
+        _client(port, paths, offset, stop_at, record_from, samples) for offset in range(concurrency)
+    ))
+    return samples, time.perf_counter() - record_from
+
+
+def _summary(samples, elapsed):
+    timings = sorted(seconds * 1000 for _, _, seconds in samples)
+    if not timings:
+        return {'requests': 0, 'errors': 0, 'requestsPerSecond': 0.0}
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status != 200),
+        'requestsPerSecond': round(len(samples) / elapsed, 1),
+        'p50Ms': round(percentile(timings, 0.50), 2),
+        'p95Ms': round(percentile(timings, 0.95), 2),
+        'p99Ms': round(percentile(timings, 0.99), 2),
+    }
+
+
+def load_test(port, paths, concurrency=64, duration=10.0, warmup=2.0):
+    """
+    Keep concurrency clients requesting paths in turn for warmup + duration
+    seconds; requests started during the warmup are not counted
+
+    Returns:
+        dict with the overall summary and one per path
+    """
+    samples, elapsed = asyncio.run(_drive(port, paths, concurrency, duration, warmup))
+    result = _summary(samples, elapsed)
+    result['paths'] = {
+        path: _summary([sample for sample in samples if sample[0] == path], elapsed) for path in paths
+    }
+    return result
@@ -0,0 +1,28 @@
+"""
+gunicorn configuration for the servers load_test.run_server starts
+
+With BENCHMARK_QUERY_LATENCY_MS set, every worker waits that long before
+each database query, standing in for the network round trip to a database
+server that a local SQLite file does not have.
+"""
+
+import os
+import time
+
+
+def post_worker_init(worker):
+    latency = float(os.environ.get('BENCHMARK_QUERY_LATENCY_MS') or 0) / 1000
+    if not latency:
+        return
+
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
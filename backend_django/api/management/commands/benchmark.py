@@ -0,0 +1,115 @@
+import json
+import platform
+import subprocess
+from datetime import date
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from api.benchmark import (
+    SKIPPED_ROUTES, benchmark_environment, benchmark_database, prepare_fixture, build_cases,
+    uncovered_routes, run_case, compare_results
+)
+from api.datagen import DATASET_SIZES
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every API route against generated datasets and compares with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='small,medium',
+                            help=f"Comma separated dataset sizes ({', '.join(DATASET_SIZES)})")
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed runs per endpoint first')
+        parser.add_argument('--cases', help='Comma separated case names to run (default all)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor', type=date.fromisoformat,
+                            help='Dataset anchor date (YYYY-MM-DD), default today')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark databases and reuse them on the next run')
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the results')
+        parser.add_argument('--baseline', help='Earlier results file to compare against')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Allowed growth in percent before a metric counts as a regression')
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options['sizes'].split(',') if size.strip()]
+        unknown = [size for size in sizes if size not in DATASET_SIZES]
+        if unknown:
+            raise CommandError(f"Unknown dataset size: {', '.join(unknown)}")
+        selected = {name.strip() for name in options['cases'].split(',')} if options['cases'] else None
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['results']
+
+        with benchmark_environment():
+            results = {size: self.benchmark_size(size, selected, options) for size in sizes}
+
+        report = {
+            'meta': {
+                'commit': self.git_commit(),
+                'createdAt': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': {
+                    'vendor': connection.vendor,
+                    'engine': connection.settings_dict['ENGINE'],
+                    'connMaxAge': connection.settings_dict['CONN_MAX_AGE'],
+                    'options': connection.settings_dict['OPTIONS'],
+                },
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'sizes': {size: DATASET_SIZES[size] for size in sizes},
+                'skipped': SKIPPED_ROUTES,
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        failures = [
+            f"{size}/{name}: unexpected status {result['status']}"
+            for size, cases in results.items() for name, result in cases.items() if not result['ok']
+        ]
+        if baseline is not None:
+            failures += compare_results(baseline, results, options['threshold'])
+        if failures:
+            raise CommandError('Benchmark failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('✓ No regressions'))
+
+    def benchmark_size(self, size, selected, options):
+        """Create (or reuse) the size's database, generate data and run every case"""
+        with benchmark_database(size, options['seed'], options['anchor'], options['keepdb'], self.stdout.write):
+            client = Client(raise_request_exception=False)
+            fixture = prepare_fixture(client)
+            cases = build_cases(fixture)
+            missing = uncovered_routes(cases)
+            if missing:
+                self.stdout.write(self.style.WARNING(f"Routes without a benchmark case: {', '.join(missing)}"))
+
+            results = {}
+            self.stdout.write(f'\n{size}: {"case":<28}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}{"peak KB":>10}')
+            for case in cases:
+                if selected and case.name not in selected:
+                    continue
+                result = run_case(client, case, fixture, options['iterations'], options['warmup'])
+                results[case.name] = result
+                line = (f"{'':<{len(size) + 2}}{case.name:<28}{result['p50Ms']:>10.2f}{result['p95Ms']:>10.2f}"
+                        f"{result['queries']:>9}{result['peakMemoryKb']:>10.0f}")
+                self.stdout.write(line if result['ok'] else self.style.ERROR(f"{line}  status {result['status']}"))
+            return results
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
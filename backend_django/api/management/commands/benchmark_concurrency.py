@@ -0,0 +1,95 @@
+import json
+import os
+import platform
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmark import benchmark_database
+from api.datagen import DATASET_SIZES
+from api.load_test import SERVERS, read_paths, run_server, load_test
+
+
+class Command(BaseCommand):
+    help = 'Compares sync (WSGI) and async (ASGI) gunicorn workers under concurrent load on the read endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', default='small', choices=list(DATASET_SIZES),
+                            help='Generated dataset to serve')
+        parser.add_argument('--servers', default='wsgi,asgi',
+                            help=f"Comma separated server types to run ({', '.join(SERVERS)})")
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+        parser.add_argument('--cpus', type=int, help='Pin each server to its first N CPUs (Linux only)')
+        parser.add_argument('--query-latency', type=float, default=0,
+                            help='Milliseconds added to every query in the servers, as for a database across the network')
+        parser.add_argument('--concurrency', type=int, default=64, help='Clients with a request in flight')
+        parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per server')
+        parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds per server first')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor', type=date.fromisoformat,
+                            help='Dataset anchor date (YYYY-MM-DD), default today')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database and reuse it on the next run')
+        parser.add_argument('--output', default='concurrency-results.json', help='Where to write the results')
+
+    def handle(self, *args, **options):
+        servers = [kind.strip() for kind in options['servers'].split(',') if kind.strip()]
+        unknown = [kind for kind in servers if kind not in SERVERS]
+        if unknown:
+            raise CommandError(f"Unknown server type: {', '.join(unknown)}")
+        if options['cpus'] and not hasattr(os, 'sched_setaffinity'):
+            raise CommandError('--cpus needs a platform with sched_setaffinity (Linux)')
+
+        results = {}
+        with benchmark_database(options['size'], options['seed'], options['anchor'],
+                                options['keepdb'], self.stdout.write):
+            paths = read_paths()
+            # The servers open the database themselves
+            connection.close()
+            for kind in servers:
+                self.stdout.write(f"{kind}: {options['workers']} workers, {options['concurrency']} clients...")
+                try:
+                    with run_server(kind, options['workers'], options['cpus'], options['query_latency']) as port:
+                        results[kind] = load_test(
+                            port, paths, options['concurrency'], options['duration'], options['warmup']
+                        )
+                except RuntimeError as e:
+                    raise CommandError(f'{kind} server failed to start: {e}')
+
+        self.print_table(results)
+        report = {
+            'meta': {
+                'createdAt': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'cpuCount': os.cpu_count(),
+                'database': connection.vendor,
+                'size': options['size'],
+                'workers': options['workers'],
+                'cpus': options['cpus'],
+                'queryLatencyMs': options['query_latency'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'paths': paths,
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        failed = {kind: result['errors'] for kind, result in results.items() if result['errors']}
+        if failed:
+            raise CommandError('Failed requests: ' + ', '.join(f'{kind} {count}' for kind, count in failed.items()))
+        if 'wsgi' in results and 'asgi' in results and results['wsgi']['requestsPerSecond']:
+            gain = results['asgi']['requestsPerSecond'] / results['wsgi']['requestsPerSecond']
+            self.stdout.write(self.style.SUCCESS(f'✓ ASGI served {gain:.2f}x the requests per second of WSGI'))
+
+    def print_table(self, results):
+        self.stdout.write(f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for kind, result in results.items():
+            self.stdout.write(
+                f"{kind:<8}{result['requestsPerSecond']:>10}{result.get('p50Ms', '-'):>10}"
+                f"{result.get('p95Ms', '-'):>10}{result.get('p99Ms', '-'):>10}{result['errors']:>8}"
+            )
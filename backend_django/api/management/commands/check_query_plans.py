@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from api.benchmark import benchmark_environment, benchmark_database, prepare_fixture, build_cases
+from api.datagen import DATASET_SIZES
+from api.query_plans import supported, check_case
+
+
+class Command(BaseCommand):
+    help = 'Explains the queries of every benchmarked endpoint and fails on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', default='small', choices=list(DATASET_SIZES),
+                            help='Generated dataset to plan against')
+        parser.add_argument('--cases', help='Comma separated case names to check (default all)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor', type=date.fromisoformat,
+                            help='Dataset anchor date (YYYY-MM-DD), default today')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database and reuse it on the next run')
+        parser.add_argument('--verbose-sql', action='store_true', help='Print the statement behind each scan')
+
+    def handle(self, *args, **options):
+        if not supported():
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}')
+        selected = {name.strip() for name in options['cases'].split(',')} if options['cases'] else None
+
+        with benchmark_environment(), benchmark_database(
+            options['size'], options['seed'], options['anchor'], options['keepdb'], self.stdout.write
+        ):
+            client = Client(raise_request_exception=False)
+            fixture = prepare_fixture(client)
+            scans = []
+            checked = 0
+            for case in build_cases(fixture):
+                if selected and case.name not in selected:
+                    continue
+                found = check_case(client, case, fixture)
+                checked += 1
+                scans.extend(found)
+                for scan in found:
+                    self.stdout.write(self.style.ERROR(f'{case.name}: full scan of {scan.table} ({scan.detail})'))
+                    if options['verbose_sql']:
+                        self.stdout.write(f'    {scan.sql}')
+
+        if scans:
+            raise CommandError(f'{len(scans)} full table scans in {len({scan.case for scan in scans})} endpoints')
+        self.stdout.write(self.style.SUCCESS(f'✓ No full table scans in {checked} endpoints'))
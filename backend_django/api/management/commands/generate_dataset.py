@@ -0,0 +1,71 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.datagen import (
+    DATASET_SIZES, DEFAULT_CHUNK_SIZE, generate_dataset, generated_rows_exist, clear_generated,
+    rebuild_derived_data
+)
+
+
+class Command(BaseCommand):
+    help = 'Generates a reproducible synthetic dataset (contractors, roads, complaints, ratings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=sorted(DATASET_SIZES), default='small',
+                            help='Preset row counts; the options below override single tables')
+        parser.add_argument('--contractors', type=int)
+        parser.add_argument('--roads', type=int)
+        parser.add_argument('--complaints', type=int)
+        parser.add_argument('--ratings', type=int)
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed and anchor give identical data')
+        parser.add_argument('--anchor', type=date.fromisoformat,
+                            help='Date (YYYY-MM-DD) generated ages are measured from, default today')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Rows inserted per transaction')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated rows first')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Do not rebuild counters, rating aggregates, scorecards, rollups and heatmap afterwards')
+
+    def handle(self, *args, **options):
+        counts = dict(DATASET_SIZES[options['size']])
+        for table in counts:
+            if options[table] is not None:
+                counts[table] = options[table]
+
+        if generated_rows_exist():
+            if not options['clear']:
+                raise CommandError('Generated rows already exist; rerun with --clear to replace them')
+            self.stdout.write('Clearing previously generated rows...')
+            clear_generated()
+
+        self.stdout.write(
+            f"Generating {counts['contractors']} contractors, {counts['roads']} roads, "
+            f"{counts['complaints']} complaints and {counts['ratings']} ratings (seed {options['seed']})..."
+        )
+        started = time.perf_counter()
+
+        def progress(model, written):
+            self.stdout.write(f'  {model._meta.db_table}: {written}')
+
+        written = generate_dataset(
+            seed=options['seed'],
+            anchor_date=options['anchor'],
+            chunk_size=options['chunk_size'],
+            derived=False,
+            progress=progress if options['verbosity'] > 1 else None,
+            **counts
+        )
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {table}' for table, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f'✓ Wrote {summary} in {elapsed:.2f}s'))
+
+        if not options['skip_derived']:
+            self.stdout.write('Rebuilding counters, rating aggregates, scorecards, rollups and heatmap...')
+            started = time.perf_counter()
+            rebuild_derived_data()
+            self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt derived data in {time.perf_counter() - started:.2f}s'))
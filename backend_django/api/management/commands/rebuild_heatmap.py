@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.heatmap import rebuild_heatmap
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the complaint heatmap cells from the complaints table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk INSERT statement')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding complaint heatmap...')
+        started = time.perf_counter()
+
+        written = rebuild_heatmap(batch_size=options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {written} heatmap cells in {elapsed:.2f}s"))
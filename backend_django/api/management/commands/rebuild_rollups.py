@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-contractor daily rollups from the ratings, complaints and road projects tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk INSERT statement')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding contractor daily rollups...')
+        started = time.perf_counter()
+
+        written = rebuild_rollups(batch_size=options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {written} daily rollup rows in {elapsed:.2f}s"))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.scorecards import rebuild_scorecards
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every contractor scorecard from the ratings, complaints and road projects tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk INSERT statement')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding contractor scorecards...')
+        started = time.perf_counter()
+
+        written = rebuild_scorecards(batch_size=options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {written} contractor scorecards in {elapsed:.2f}s"))
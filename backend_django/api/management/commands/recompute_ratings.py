@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.rating_batch import recompute_all_ratings
+from api.scorecards import store_rating_results
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the rating of every contractor in a single batch pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk UPDATE/INSERT statement')
+        parser.add_argument('--no-stats', action='store_true',
+                            help='Do not resync the per-project complaint aggregates')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Compute ratings without writing them')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recomputing contractor ratings...')
+        started = time.perf_counter()
+
+        result = recompute_all_ratings(
+            batch_size=options['batch_size'],
+            sync_stats=not options['no_stats'],
+            dry_run=options['dry_run']
+        )
+        if not options['dry_run']:
+            store_rating_results(result['ratings'], options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: {result['changed']} of {result['contractors']} ratings would change")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rated {result['contractors']} contractors ({result['changed']} changed, "
+            f"{result['projects']} project aggregates synced) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import work
+from api.rating_refresh import sweep_stale_ratings
+
+
+class Command(BaseCommand):
+    help = ('Queues a rating recompute for the contractors whose complaints left the recency window '
+            'or whose warranties ended since the last sweep')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', action='store_true',
+                            help='Run the queued recomputes in this process instead of leaving them to run_jobs')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Sweeping for stale contractor ratings...')
+        started = time.perf_counter()
+
+        result = sweep_stale_ratings()
+        if result['from'] is None:
+            self.stdout.write('No earlier sweep: queued every contractor')
+        if options['run']:
+            work(names=['recompute_contractor_rating'], burst=True)
+
+        elapsed = time.perf_counter() - started
+        action = 'Recomputed' if options['run'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {action} {result['contractors']} contractor ratings up to {result['to']:%Y-%m-%d %H:%M:%S} "
+            f"in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,73 @@
+import signal
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.jobs import JOB_HANDLERS, DEFAULT_LEASE_SECONDS, DEFAULT_POLL_INTERVAL, work
+from api.rating_refresh import schedule_rating_refresh
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs (QR generation, rating recalculation, the hourly rating refresh) from the jobs table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes to run on this host')
+        parser.add_argument('--jobs', help=f"Comma separated job names to run ({', '.join(JOB_HANDLERS)}), default all")
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due instead of waiting for more')
+        parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS,
+                            help='Seconds a claimed job stays leased without a progress report')
+        parser.add_argument('--poll', type=float, default=DEFAULT_POLL_INTERVAL,
+                            help='Seconds between checks for new jobs when idle')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['jobs'].split(',')] if options['jobs'] else None
+        unknown = [name for name in names or [] if name not in JOB_HANDLERS]
+        if unknown:
+            raise CommandError(f"Unknown job: {', '.join(unknown)}")
+        if options['processes'] > 1:
+            return self.supervise(options)
+
+        stopping = []
+
+        def stop(signum, frame):
+            # Finish the current job, then exit
+            stopping.append(signum)
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        if not options['burst'] and (names is None or 'refresh_stale_ratings' in names):
+            # Keeps itself scheduled from here on; a no-op while a run is queued
+            schedule_rating_refresh()
+
+        mode = 'until idle' if options['burst'] else 'until stopped'
+        self.stdout.write(f"Running {', '.join(names) if names else 'all'} jobs {mode}...")
+        ran = work(
+            names=names, burst=options['burst'], lease_seconds=options['lease'],
+            poll_interval=options['poll'], should_stop=lambda: bool(stopping), log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Ran {ran} jobs'))
+
+    def supervise(self, options):
+        """Start one single-process worker per --processes and wait for them"""
+        command = [sys.executable, '-m', 'django', 'run_jobs', '--processes', '1',
+                   '--lease', str(options['lease']), '--poll', str(options['poll'])]
+        if options['jobs']:
+            command += ['--jobs', options['jobs']]
+        if options['burst']:
+            command.append('--burst')
+
+        workers = [subprocess.Popen(command) for _ in range(options['processes'])]
+
+        def forward(signum, frame):
+            for worker in workers:
+                worker.send_signal(signum)
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        failed = [worker.pid for worker in workers if worker.wait() != 0]
+        if failed:
+            raise CommandError(f"Workers exited with an error: {', '.join(map(str, failed))}")
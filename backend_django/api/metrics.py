@@ -0,0 +1,269 @@
+"""
+Request metrics
+
+MetricsMiddleware records, for every request and labelled by the URL name
+from api/urls.py:
+
+- request latency
+- number and total time of database queries
+- time spent rendering the JSON body (via TimedJSONRenderer)
+- response size
+
+Queries are counted by an execute wrapper installed on every database
+connection (install_query_recorder) that reports to the current request's
+QueryTimer through a context variable. Async views run their queries on
+worker threads with connections of their own, and the context variable
+follows them there.
+
+Values are kept as Prometheus-style histograms in an in-process registry and
+exposed in the Prometheus text format by the metrics view, to a scraper
+sending METRICS_TOKEN or to an admin. Each worker process keeps its own
+registry, so scrape every worker (or run one) when running several.
+
+Methods outside the standard HTTP set are recorded as "other", so clients
+cannot grow the label space with made-up methods.
+"""
+
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import verify_token
+from .permissions import ADMIN_ROLES
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+UNMATCHED_VIEW = 'unmatched'
+
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'])
+OTHER_METHOD = 'other'
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        # Caller holds the registry lock
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['buckets'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            base = _format_labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series["count"]}')
+            lines.append(f'{self.name}_sum{{{base}}} {series["sum"]:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {series["count"]}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label tuple"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{{_format_labels(self.label_names, labels)}}} {value}')
+        return lines
+
+
+def _format_labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class MetricsRegistry:
+    """The set of request metrics, safe to update from concurrent threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            'http_requests_total', 'Requests served', ('view', 'method', 'status'))
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Time from request to response',
+            ('view', 'method'), LATENCY_BUCKETS)
+        self.query_count = Histogram(
+            'db_queries_per_request', 'Database queries executed per request',
+            ('view', 'method'), QUERY_COUNT_BUCKETS)
+        self.query_time = Histogram(
+            'db_query_duration_seconds', 'Total database time per request',
+            ('view', 'method'), LATENCY_BUCKETS)
+        self.serialization_time = Histogram(
+            'http_serialization_duration_seconds', 'Time spent rendering the response body',
+            ('view', 'method'), LATENCY_BUCKETS)
+        self.response_size = Histogram(
+            'http_response_size_bytes', 'Size of non-streaming response bodies',
+            ('view', 'method'), SIZE_BUCKETS)
+
+    def record(self, view, method, status, duration, queries, query_time, serialization_time, size):
+        labels = (view, method)
+        with self._lock:
+            self.requests.inc((view, method, str(status)))
+            self.latency.observe(labels, duration)
+            self.query_count.observe(labels, queries)
+            self.query_time.observe(labels, query_time)
+            if serialization_time is not None:
+                self.serialization_time.observe(labels, serialization_time)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.query_count, self.query_time,
+                           self.serialization_time, self.response_size):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# QueryTimer of the request being served in this context, if any
+_request_timer = ContextVar('request_query_timer', default=None)
+
+
+def record_request_queries(execute, sql, params, many, context):
+    """Execute wrapper timing queries into the current request's QueryTimer"""
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver adding record_request_queries to a connection"""
+    if record_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_request_queries)
+
+
+class MetricsMiddleware:
+    """Record latency, query and size metrics for every request (sync or async)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def _record(self, request, response, duration, timer):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else UNMATCHED_VIEW
+        method = request.method if request.method in HTTP_METHODS else OTHER_METHOD
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, method, response.status_code, duration,
+            timer.count, timer.duration, getattr(request, 'serialization_time', None), size
+        )
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its rendering time to MetricsMiddleware"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        body = super().render(data, accepted_media_type, renderer_context)
+        request = (renderer_context or {}).get('request')
+        if request is not None:
+            # Attach to the underlying HttpRequest, which the middleware sees
+            http_request = getattr(request, '_request', request)
+            http_request.serialization_time = time.perf_counter() - started
+        return body
+
+
+def may_read_metrics(request):
+    """True when the request's bearer token is METRICS_TOKEN or a valid admin token"""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    token = header[len('Bearer '):].strip()
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return True
+    claims = verify_token(token)
+    return claims is not None and claims.get('role') in ADMIN_ROLES
+
+
+@require_GET
+def metrics(request):
+    """Current metrics in the Prometheus text exposition format (scrape token or admin only)"""
+    if not may_read_metrics(request):
+        response = HttpResponse('Authentication required\n', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_contractor_qr_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectComplaintStats',
+            fields=[
+                ('project', models.OneToOneField(db_column='roadId', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='complaint_stats', serialize=False, to='api.roadproject')),
+                ('complaint_count', models.IntegerField(db_column='complaintCount', default=0)),
+                ('critical_count', models.IntegerField(db_column='criticalCount', default=0)),
+                ('high_count', models.IntegerField(db_column='highCount', default=0)),
+                ('medium_count', models.IntegerField(db_column='mediumCount', default=0)),
+                ('low_count', models.IntegerField(db_column='lowCount', default=0)),
+                ('unresolved_count', models.IntegerField(db_column='unresolvedCount', default=0)),
+                ('recent_count', models.IntegerField(db_column='recentCount', default=0)),
+                ('recent_expires_at', models.DateTimeField(blank=True, db_column='recentExpiresAt', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+            ],
+            options={
+                'db_table': 'project_complaint_stats',
+            },
+        ),
+    ]
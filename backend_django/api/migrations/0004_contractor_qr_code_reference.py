@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+def clear_inline_qr_codes(apps, schema_editor):
+    """Drop base64 data URIs; they are re-rendered into the QR cache on demand"""
+    Contractor = apps.get_model('api', 'Contractor')
+    Contractor.objects.filter(qr_code__startswith='data:').update(qr_code=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_project_complaint_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_inline_qr_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='contractor',
+            name='qr_code',
+            field=models.CharField(blank=True, db_column='qrCode', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_contractor_qr_code_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roadproject',
+            name='qr_image',
+            field=models.CharField(blank=True, db_column='qrImage', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:30
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_totals(apps, schema_editor):
+    """Seed the running totals from the existing ratings"""
+    Contractor = apps.get_model('api', 'Contractor')
+    Rating = apps.get_model('api', 'Rating')
+    totals = Rating.objects.filter(contractor=OuterRef('pk')).order_by().values('contractor')
+    Contractor.objects.update(
+        rating_sum=Coalesce(
+            Subquery(totals.annotate(total=Sum('rating_value')).values('total')[:1]),
+            Value(0.0), output_field=FloatField()
+        ),
+        rating_count=Coalesce(
+            Subquery(totals.annotate(total=Count('id')).values('total')[:1]),
+            Value(0), output_field=IntegerField()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_roadproject_qr_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contractor',
+            name='rating_count',
+            field=models.IntegerField(db_column='ratingCount', default=0),
+        ),
+        migrations.AddField(
+            model_name='contractor',
+            name='rating_sum',
+            field=models.FloatField(db_column='ratingSum', default=0),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+from api.geohash import encode
+
+
+def backfill_geohashes(apps, schema_editor):
+    """Index existing roads and complaints that have coordinates"""
+    for model_name in ('RoadProject', 'Complaint'):
+        model = apps.get_model('api', model_name)
+        rows = model.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            row.geohash = encode(row.latitude, row.longitude)
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['geohash'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_contractor_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='roadproject',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohashes, migrations.RunPython.noop),
+    ]
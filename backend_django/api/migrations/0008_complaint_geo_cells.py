@@ -0,0 +1,74 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:40
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
+
+
+def backfill_geo_cells(apps, schema_editor):
+    """
+    Count the existing complaints into their cells at every heatmap precision
+
+    As in api.heatmap, an unknown severity counts as Medium and an unknown
+    status as Open.
+    """
+    Complaint = apps.get_model('api', 'Complaint')
+    ComplaintGeoCell = apps.get_model('api', 'ComplaintGeoCell')
+    counts = {
+        'complaint_count': Count('id'),
+        'medium_count': Count('id', filter=~Q(severity__in=['Critical', 'High', 'Low'])),
+        'open_count': Count('id', filter=~Q(status__in=['Under Review', 'Resolved', 'Rejected'])),
+    }
+    for field, severity in (('critical_count', 'Critical'), ('high_count', 'High'), ('low_count', 'Low')):
+        counts[field] = Count('id', filter=Q(severity=severity))
+    for field, status in (('under_review_count', 'Under Review'), ('resolved_count', 'Resolved'),
+                          ('rejected_count', 'Rejected')):
+        counts[field] = Count('id', filter=Q(status=status))
+    for precision in (3, 4, 5, 6, 7):
+        rows = (
+            Complaint.objects.filter(geohash__isnull=False)
+            .annotate(cell=Substr('geohash', 1, precision))
+            .order_by()
+            .values('cell')
+            .annotate(**counts)
+        )
+        ComplaintGeoCell.objects.bulk_create(
+            [ComplaintGeoCell(precision=precision, **row) for row in rows.iterator(chunk_size=2000)],
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_geohash_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintGeoCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('cell', models.CharField(max_length=12)),
+                ('complaint_count', models.IntegerField(db_column='complaintCount', default=0)),
+                ('critical_count', models.IntegerField(db_column='criticalCount', default=0)),
+                ('high_count', models.IntegerField(db_column='highCount', default=0)),
+                ('medium_count', models.IntegerField(db_column='mediumCount', default=0)),
+                ('low_count', models.IntegerField(db_column='lowCount', default=0)),
+                ('open_count', models.IntegerField(db_column='openCount', default=0)),
+                ('under_review_count', models.IntegerField(db_column='underReviewCount', default=0)),
+                ('resolved_count', models.IntegerField(db_column='resolvedCount', default=0)),
+                ('rejected_count', models.IntegerField(db_column='rejectedCount', default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+            ],
+            options={
+                'db_table': 'complaint_geo_cells',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='complaintgeocell',
+            constraint=models.UniqueConstraint(fields=('precision', 'cell'), name='complaint_geo_cells_precision_cell'),
+        ),
+        migrations.RunPython(backfill_geo_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.photo_store import store_photo_data_uri, InvalidPhoto
+
+
+def move_inline_photos(apps, schema_editor):
+    """Move base64 photos out of photoUrl into the photo store"""
+    Complaint = apps.get_model('api', 'Complaint')
+    Photo = apps.get_model('api', 'Photo')
+    inline = Complaint.objects.filter(photo_url__startswith='data:').only('id', 'photo_url')
+    for complaint in inline.iterator(chunk_size=100):
+        try:
+            # No size limit here: these photos were already accepted once
+            stored = store_photo_data_uri(complaint.photo_url, max_bytes=2 ** 40)
+        except InvalidPhoto:
+            Complaint.objects.filter(pk=complaint.pk).update(photo_url=None)
+            continue
+        photo, _ = Photo.objects.get_or_create(digest=stored['digest'], defaults={
+            'content_type': stored['contentType'],
+            'size': stored['size'],
+            'width': stored['width'],
+            'height': stored['height'],
+        })
+        Complaint.objects.filter(pk=complaint.pk).update(photo=photo, photo_url=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_complaint_geo_cells'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Photo',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content_type', models.CharField(db_column='contentType', max_length=50)),
+                ('size', models.IntegerField()),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='createdAt')),
+            ],
+            options={
+                'db_table': 'photos',
+            },
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='photo',
+            field=models.ForeignKey(blank=True, db_column='photoId', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='complaints', to='api.photo'),
+        ),
+        migrations.RunPython(move_inline_photos, migrations.RunPython.noop),
+    ]
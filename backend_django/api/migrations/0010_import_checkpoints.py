@@ -0,0 +1,28 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_complaint_photos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_table', models.CharField(db_column='sourceTable', max_length=100, unique=True)),
+                ('last_id', models.BigIntegerField(db_column='lastId', default=0)),
+                ('copied', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+            ],
+            options={
+                'db_table': 'import_checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaint',
+            name='road',
+            field=models.ForeignKey(db_column='roadId', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='complaints', to='api.roadproject'),
+        ),
+        migrations.AlterField(
+            model_name='rating',
+            name='contractor',
+            field=models.ForeignKey(db_column='contractorId', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='api.contractor'),
+        ),
+        migrations.AlterField(
+            model_name='roadproject',
+            name='contractor',
+            field=models.ForeignKey(blank=True, db_column='contractorId', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='projects', to='api.contractor'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['created_at', 'id'], name='complaints_created'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['road', 'created_at'], name='complaints_road_created'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'created_at'], name='complaints_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['severity', 'created_at'], name='complaints_severity_created'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['contractor', 'created_at'], name='ratings_contractor_created'),
+        ),
+        migrations.AddIndex(
+            model_name='roadproject',
+            index=models.Index(fields=['contractor', '-created_at'], name='roads_contractor_created'),
+        ),
+        migrations.AddIndex(
+            model_name='roadproject',
+            index=models.Index(fields=['-created_at'], name='roads_created'),
+        ),
+    ]
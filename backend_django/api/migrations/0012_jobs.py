@@ -0,0 +1,47 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:39
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('dedupe_key', models.CharField(blank=True, db_column='dedupeKey', max_length=255, null=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(db_column='maxAttempts', default=5)),
+                ('run_at', models.DateTimeField(db_column='runAt', default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, db_column='lockedBy', max_length=255, null=True)),
+                ('locked_until', models.DateTimeField(blank=True, db_column='lockedUntil', null=True)),
+                ('done', models.IntegerField(default=0)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='createdAt')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+                ('started_at', models.DateTimeField(blank=True, db_column='startedAt', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, db_column='finishedAt', null=True)),
+            ],
+            options={
+                'db_table': 'jobs',
+                'indexes': [models.Index(fields=['status', 'run_at'], name='jobs_status_run_at')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('dedupe_key',), name='jobs_queued_dedupe_key'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorScorecard',
+            fields=[
+                ('contractor', models.OneToOneField(db_column='contractorId', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scorecard', serialize=False, to='api.contractor')),
+                ('rating_sum', models.FloatField(db_column='ratingSum', default=0)),
+                ('rating_count', models.IntegerField(db_column='ratingCount', default=0)),
+                ('star1_count', models.IntegerField(db_column='star1Count', default=0)),
+                ('star2_count', models.IntegerField(db_column='star2Count', default=0)),
+                ('star3_count', models.IntegerField(db_column='star3Count', default=0)),
+                ('star4_count', models.IntegerField(db_column='star4Count', default=0)),
+                ('star5_count', models.IntegerField(db_column='star5Count', default=0)),
+                ('complaint_count', models.IntegerField(db_column='complaintCount', default=0)),
+                ('resolved_count', models.IntegerField(db_column='resolvedCount', default=0)),
+                ('pending_count', models.IntegerField(db_column='pendingCount', default=0)),
+                ('project_count', models.IntegerField(db_column='projectCount', default=0)),
+                ('average_rating', models.FloatField(db_column='averageRating', default=0)),
+                ('performance_score', models.FloatField(db_column='performanceScore', default=0)),
+                ('performance_rank', models.CharField(db_column='performanceRank', default='Poor', max_length=20)),
+                ('performance_status', models.CharField(db_column='performanceStatus', default='BOTTOM', max_length=10)),
+                ('final_rating', models.FloatField(db_column='finalRating', default=5.0)),
+                ('rating_category', models.CharField(db_column='ratingCategory', default='Excellent', max_length=20)),
+                ('risk_level', models.CharField(db_column='riskLevel', default='Very Low', max_length=20)),
+                ('recommendation', models.CharField(default='Approve for future contracts', max_length=100)),
+                ('deductions', models.JSONField(default=list)),
+                ('rated_at', models.DateTimeField(blank=True, db_column='ratedAt', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+            ],
+            options={
+                'db_table': 'contractor_scorecards',
+                'indexes': [models.Index(fields=['-performance_score', 'contractor'], name='scorecards_performance')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_contractor_scorecards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rating_sum', models.FloatField(db_column='ratingSum', default=0)),
+                ('rating_count', models.IntegerField(db_column='ratingCount', default=0)),
+                ('complaint_count', models.IntegerField(db_column='complaintCount', default=0)),
+                ('critical_count', models.IntegerField(db_column='criticalCount', default=0)),
+                ('high_count', models.IntegerField(db_column='highCount', default=0)),
+                ('medium_count', models.IntegerField(db_column='mediumCount', default=0)),
+                ('low_count', models.IntegerField(db_column='lowCount', default=0)),
+                ('resolved_count', models.IntegerField(db_column='resolvedCount', default=0)),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+                ('contractor', models.ForeignKey(db_column='contractorId', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='api.contractor')),
+            ],
+            options={
+                'db_table': 'contractor_daily_rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contractordailyrollup',
+            constraint=models.UniqueConstraint(fields=('contractor', 'day'), name='contractor_daily_rollups_contractor_day'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_contractor_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweepCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('swept_until', models.DateTimeField(db_column='sweptUntil')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updatedAt')),
+            ],
+            options={
+                'db_table': 'sweep_checkpoints',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='roadproject',
+            index=models.Index(fields=['warranty_end_date'], name='roads_warranty_end'),
+        ),
+    ]
@@ -1,6 +1,26 @@
+import secrets
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from . import geohash
+
+
+def sync_geohash(instance, save_kwargs):
+    """Recompute instance.geohash from its coordinates before a save"""
+    instance.geohash = geohash.encode(instance.latitude, instance.longitude)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+        save_kwargs['update_fields'] = set(update_fields) | {'geohash'}
+
+
+def new_complaint_id():
+    """COMPLAINT-<epoch ms>-<random>; the suffix keeps simultaneous submissions apart"""
+    return f"COMPLAINT-{int(timezone.now().timestamp() * 1000)}-{secrets.token_hex(3)}"
 
 
 class Admin(models.Model):
@@ -50,7 +70,11 @@ class Contractor(models.Model):
     )
     total_complaints = models.IntegerField(default=0, db_column='totalComplaints')
     total_projects = models.IntegerField(default=0, db_column='totalProjects')
-    qr_code = models.TextField(null=True, blank=True, db_column='qrCode')
+    # Running totals of submitted ratings, maintained with F() updates (counters.py)
+    rating_sum = models.FloatField(default=0, db_column='ratingSum')
+    rating_count = models.IntegerField(default=0, db_column='ratingCount')
+    # SHA-256 key of the QR image in the QR cache (see qr_store.py)
+    qr_code = models.CharField(max_length=64, null=True, blank=True, db_column='qrCode')
     created_at = models.DateTimeField(auto_now_add=True, db_column='createdAt')
     updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
     
@@ -81,17 +105,23 @@ class RoadProject(models.Model):
         null=True,
         blank=True,
         related_name='projects',
-        db_column='contractorId'
+        db_column='contractorId',
+        # Leading column of roads_contractor_created
+        db_index=False
     )
     contractor_name = models.CharField(max_length=255, null=True, blank=True, db_column='contractorName')
     latitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
     longitude = models.DecimalField(max_digits=11, decimal_places=8, null=True, blank=True)
+    # Spatial index key, derived from latitude/longitude on save (see geohash.py)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     address = models.CharField(max_length=500, null=True, blank=True)
     construction_date = models.DateTimeField(db_column='constructionDate')
     completion_date = models.DateTimeField(db_column='completionDate')
     warranty_period_years = models.IntegerField(default=10, db_column='warrantyPeriodYears')
     warranty_end_date = models.DateTimeField(null=True, blank=True, db_column='warrantyEndDate')
     qr_code_data = models.TextField(null=True, blank=True, db_column='qrCodeData')
+    # SHA-256 key of the rendered qr_code_data image in the QR cache
+    qr_image = models.CharField(max_length=64, null=True, blank=True, db_column='qrImage')
     project_cost = models.DecimalField(
         max_digits=15,
         decimal_places=2,
@@ -112,11 +142,39 @@ class RoadProject(models.Model):
     
     class Meta:
         db_table = 'road_projects'
+        indexes = [
+            # A contractor's roads, newest first; and every road, newest first
+            models.Index(fields=['contractor', '-created_at'], name='roads_contractor_created'),
+            models.Index(fields=['-created_at'], name='roads_created'),
+            # Roads whose warranty ended within a window (rating refresh sweep)
+            models.Index(fields=['warranty_end_date'], name='roads_warranty_end'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        sync_geohash(self, kwargs)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.road_name
 
 
+class Photo(models.Model):
+    """A complaint photo held in the content-addressed photo store (see photo_store.py)"""
+    # SHA-256 of the file, so a complaint's photoId column is the store key itself
+    digest = models.CharField(max_length=64, primary_key=True)
+    content_type = models.CharField(max_length=50, db_column='contentType')
+    size = models.IntegerField()
+    width = models.IntegerField()
+    height = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_column='createdAt')
+    
+    class Meta:
+        db_table = 'photos'
+    
+    def __str__(self):
+        return self.digest
+
+
 class Complaint(models.Model):
     """Complaint model"""
     DAMAGE_TYPE_CHOICES = [
@@ -146,16 +204,29 @@ class Complaint(models.Model):
         RoadProject,
         on_delete=models.CASCADE,
         related_name='complaints',
-        db_column='roadId'
+        db_column='roadId',
+        # Leading column of complaints_road_created
+        db_index=False
     )
     user_id = models.CharField(max_length=255, default='anonymous', db_column='userId')
     user_email = models.EmailField(null=True, blank=True, db_column='userEmail')
     user_phone = models.CharField(max_length=20, null=True, blank=True, db_column='userPhone')
     damage_type = models.CharField(max_length=50, choices=DAMAGE_TYPE_CHOICES, db_column='damageType')
     description = models.TextField()
+    # Legacy external photo links; uploaded photos are referenced through `photo`
     photo_url = models.TextField(null=True, blank=True, db_column='photoUrl')
+    photo = models.ForeignKey(
+        Photo,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='complaints',
+        db_column='photoId'
+    )
     latitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
     longitude = models.DecimalField(max_digits=11, decimal_places=8, null=True, blank=True)
+    # Spatial index key, derived from latitude/longitude on save (see geohash.py)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Open')
     severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES, default='Medium')
     resolved_date = models.DateTimeField(null=True, blank=True, db_column='resolvedDate')
@@ -165,6 +236,19 @@ class Complaint(models.Model):
     
     class Meta:
         db_table = 'complaints'
+        indexes = [
+            # Complaint lists are ordered by (created_at, id) for keyset
+            # pagination (pagination.py), optionally filtered by road, status
+            # or severity
+            models.Index(fields=['created_at', 'id'], name='complaints_created'),
+            models.Index(fields=['road', 'created_at'], name='complaints_road_created'),
+            models.Index(fields=['status', 'created_at'], name='complaints_status_created'),
+            models.Index(fields=['severity', 'created_at'], name='complaints_severity_created'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        sync_geohash(self, kwargs)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.complaint_id} - {self.damage_type}"
@@ -176,7 +260,9 @@ class Rating(models.Model):
         Contractor,
         on_delete=models.CASCADE,
         related_name='ratings',
-        db_column='contractorId'
+        db_column='contractorId',
+        # Leading column of ratings_contractor_created
+        db_index=False
     )
     road = models.ForeignKey(
         RoadProject,
@@ -198,6 +284,219 @@ class Rating(models.Model):
     
     class Meta:
         db_table = 'ratings'
+        indexes = [
+            models.Index(fields=['contractor', 'created_at'], name='ratings_contractor_created'),
+        ]
     
     def __str__(self):
         return f"Rating {self.rating_value} for {self.contractor.name}"
+
+
+class ProjectComplaintStats(models.Model):
+    """Running complaint aggregates for one road project, maintained by delta"""
+    project = models.OneToOneField(
+        RoadProject,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='complaint_stats',
+        db_column='roadId'
+    )
+    complaint_count = models.IntegerField(default=0, db_column='complaintCount')
+    critical_count = models.IntegerField(default=0, db_column='criticalCount')
+    high_count = models.IntegerField(default=0, db_column='highCount')
+    medium_count = models.IntegerField(default=0, db_column='mediumCount')
+    low_count = models.IntegerField(default=0, db_column='lowCount')
+    unresolved_count = models.IntegerField(default=0, db_column='unresolvedCount')
+    recent_count = models.IntegerField(default=0, db_column='recentCount')
+    # Earliest moment one of the recent complaints ages out of the window
+    recent_expires_at = models.DateTimeField(null=True, blank=True, db_column='recentExpiresAt')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'project_complaint_stats'
+    
+    def __str__(self):
+        return f"Complaint stats for road {self.project_id}"
+
+
+class ContractorScorecard(models.Model):
+    """Materialized performance figures for one contractor, maintained by delta (see scorecards.py)"""
+    contractor = models.OneToOneField(
+        Contractor,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='scorecard',
+        db_column='contractorId'
+    )
+    rating_sum = models.FloatField(default=0, db_column='ratingSum')
+    rating_count = models.IntegerField(default=0, db_column='ratingCount')
+    # Ratings histogram by whole stars, as get_rating_distribution counts them
+    star1_count = models.IntegerField(default=0, db_column='star1Count')
+    star2_count = models.IntegerField(default=0, db_column='star2Count')
+    star3_count = models.IntegerField(default=0, db_column='star3Count')
+    star4_count = models.IntegerField(default=0, db_column='star4Count')
+    star5_count = models.IntegerField(default=0, db_column='star5Count')
+    complaint_count = models.IntegerField(default=0, db_column='complaintCount')
+    resolved_count = models.IntegerField(default=0, db_column='resolvedCount')
+    pending_count = models.IntegerField(default=0, db_column='pendingCount')
+    project_count = models.IntegerField(default=0, db_column='projectCount')
+    # Derived from the counts above whenever they change
+    average_rating = models.FloatField(default=0, db_column='averageRating')
+    performance_score = models.FloatField(default=0, db_column='performanceScore')
+    performance_rank = models.CharField(max_length=20, default='Poor', db_column='performanceRank')
+    performance_status = models.CharField(max_length=10, default='BOTTOM', db_column='performanceStatus')
+    # Complaint-based rating (calculate_contractor_rating) as of rated_at
+    final_rating = models.FloatField(default=5.0, db_column='finalRating')
+    rating_category = models.CharField(max_length=20, default='Excellent', db_column='ratingCategory')
+    risk_level = models.CharField(max_length=20, default='Very Low', db_column='riskLevel')
+    recommendation = models.CharField(max_length=100, default='Approve for future contracts')
+    deductions = models.JSONField(default=list)
+    rated_at = models.DateTimeField(null=True, blank=True, db_column='ratedAt')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'contractor_scorecards'
+        indexes = [
+            # Performance dashboard: every contractor, best score first
+            models.Index(fields=['-performance_score', 'contractor'], name='scorecards_performance'),
+        ]
+    
+    def __str__(self):
+        return f"Scorecard for contractor {self.contractor_id}"
+
+
+class ContractorDailyRollup(models.Model):
+    """One contractor's activity and end-of-day rating on one day, maintained by delta (see rollups.py)"""
+    contractor = models.ForeignKey(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        db_column='contractorId',
+        # Leading column of contractor_daily_rollups_contractor_day
+        db_index=False
+    )
+    day = models.DateField()
+    rating_sum = models.FloatField(default=0, db_column='ratingSum')
+    rating_count = models.IntegerField(default=0, db_column='ratingCount')
+    complaint_count = models.IntegerField(default=0, db_column='complaintCount')
+    critical_count = models.IntegerField(default=0, db_column='criticalCount')
+    high_count = models.IntegerField(default=0, db_column='highCount')
+    medium_count = models.IntegerField(default=0, db_column='mediumCount')
+    low_count = models.IntegerField(default=0, db_column='lowCount')
+    resolved_count = models.IntegerField(default=0, db_column='resolvedCount')
+    # calculate_contractor_rating at the end of the day; null when it did not change that day
+    score = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'contractor_daily_rollups'
+        constraints = [
+            # Also the index serving trend range reads: contractor = ? AND day BETWEEN ? AND ?
+            models.UniqueConstraint(fields=['contractor', 'day'], name='contractor_daily_rollups_contractor_day'),
+        ]
+    
+    def __str__(self):
+        return f"Rollup for contractor {self.contractor_id} on {self.day}"
+
+
+class ComplaintGeoCell(models.Model):
+    """Complaint counts for one geohash cell at one heatmap precision, maintained by delta"""
+    precision = models.PositiveSmallIntegerField()
+    cell = models.CharField(max_length=12)
+    complaint_count = models.IntegerField(default=0, db_column='complaintCount')
+    critical_count = models.IntegerField(default=0, db_column='criticalCount')
+    high_count = models.IntegerField(default=0, db_column='highCount')
+    medium_count = models.IntegerField(default=0, db_column='mediumCount')
+    low_count = models.IntegerField(default=0, db_column='lowCount')
+    open_count = models.IntegerField(default=0, db_column='openCount')
+    under_review_count = models.IntegerField(default=0, db_column='underReviewCount')
+    resolved_count = models.IntegerField(default=0, db_column='resolvedCount')
+    rejected_count = models.IntegerField(default=0, db_column='rejectedCount')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'complaint_geo_cells'
+        constraints = [
+            # Also the index serving tile lookups: precision = ? AND cell in a prefix range
+            models.UniqueConstraint(fields=['precision', 'cell'], name='complaint_geo_cells_precision_cell'),
+        ]
+    
+    def __str__(self):
+        return f"Heatmap cell {self.cell}"
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of the legacy database import through one source table (see legacy_import.py)"""
+    source_table = models.CharField(max_length=100, unique=True, db_column='sourceTable')
+    # Highest legacy id copied so far; the import resumes after it
+    last_id = models.BigIntegerField(default=0, db_column='lastId')
+    copied = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'import_checkpoints'
+    
+    def __str__(self):
+        return f"Import of {self.source_table} at id {self.last_id}"
+
+
+class SweepCheckpoint(models.Model):
+    """How far a periodic sweep has processed time (see rating_refresh.py)"""
+    name = models.CharField(max_length=100, unique=True)
+    # The next run covers (swept_until, now]
+    swept_until = models.DateTimeField(db_column='sweptUntil')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    
+    class Meta:
+        db_table = 'sweep_checkpoints'
+    
+    def __str__(self):
+        return f"{self.name} swept until {self.swept_until}"
+
+
+class Job(models.Model):
+    """Unit of background work, run by `manage.py run_jobs` workers (see jobs.py)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Enqueueing a key that is already queued returns the queued job instead
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, db_column='dedupeKey')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5, db_column='maxAttempts')
+    # Not claimed before this time (set further out after each failed attempt)
+    run_at = models.DateTimeField(default=timezone.now, db_column='runAt')
+    # Lease: a running job whose lease has expired is claimable again
+    locked_by = models.CharField(max_length=255, null=True, blank=True, db_column='lockedBy')
+    locked_until = models.DateTimeField(null=True, blank=True, db_column='lockedUntil')
+    done = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_column='createdAt')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updatedAt')
+    started_at = models.DateTimeField(null=True, blank=True, db_column='startedAt')
+    finished_at = models.DateTimeField(null=True, blank=True, db_column='finishedAt')
+    
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            # Claiming: queued jobs that are due, running jobs with expired leases
+            models.Index(fields=['status', 'run_at'], name='jobs_status_run_at'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['dedupe_key'], condition=models.Q(status='queued'),
+                                    name='jobs_queued_dedupe_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
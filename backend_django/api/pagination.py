@@ -0,0 +1,141 @@
+"""
+Keyset pagination for the complaints feed
+
+Pages are addressed by an opaque cursor holding the (created_at, id) of the
+last row served, so every page is an indexed range read no matter how deep
+the client scrolls, and rows inserted meanwhile never shift a page.
+"""
+
+import base64
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Query parameter -> Complaint field; values may be comma separated
+COMPLAINT_FILTERS = {
+    'status': 'status',
+    'severity': 'severity',
+    'damageType': 'damage_type',
+    'roadId': 'road__road_id',
+}
+
+
+def encode_cursor(created_at, pk):
+    """Opaque, URL-safe cursor for the row (created_at, pk)"""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        parsed = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if parsed is None:
+        raise ValueError('Invalid cursor')
+    return parsed, pk
+
+
+def _parse_bound(value, end_of_day=False):
+    """Parse a from/to bound given as an ISO date or datetime"""
+    # A bare date first: parse_datetime would also accept it, as midnight
+    try:
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+        else:
+            parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_complaints(queryset, params):
+    """
+    Apply the feed's server-side filters
+
+    Supported parameters: status, severity, damageType, roadId (each accepts a
+    comma separated list) and from/to (ISO date or datetime, inclusive).
+    Raises ValueError for unparseable dates.
+    """
+    for param, field in COMPLAINT_FILTERS.items():
+        value = params.get(param)
+        if value:
+            values = [v.strip() for v in value.split(',') if v.strip()]
+            queryset = queryset.filter(**{f'{field}__in': values})
+
+    if params.get('from'):
+        queryset = queryset.filter(created_at__gte=_parse_bound(params['from']))
+    if params.get('to'):
+        queryset = queryset.filter(created_at__lte=_parse_bound(params['to'], end_of_day=True))
+    return queryset
+
+
+def get_page_size(params):
+    """Page size from the limit parameter, clamped to MAX_PAGE_SIZE"""
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _keyset_page(queryset, params):
+    """(queryset sliced to one page plus one row, page size)"""
+    limit = get_page_size(params)
+    descending = params.get('order', 'desc') != 'asc'
+
+    if descending:
+        queryset = queryset.order_by('-created_at', '-id')
+    else:
+        queryset = queryset.order_by('created_at', 'id')
+
+    cursor = params.get('cursor')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        if descending:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    # Fetch one extra row to learn whether another page exists
+    return queryset[:limit + 1], limit
+
+
+def _split_page(rows, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def paginate_keyset(queryset, params):
+    """
+    Slice one page of queryset ordered by (created_at, id)
+
+    Newest first by default; pass order=asc for oldest first. Returns
+    (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    page, limit = _keyset_page(queryset, params)
+    return _split_page(list(page), limit)
+
+
+async def apaginate_keyset(queryset, params):
+    """paginate_keyset for async views"""
+    page, limit = _keyset_page(queryset, params)
+    return _split_page([row async for row in page], limit)
@@ -0,0 +1,197 @@
+"""
+Content-addressed complaint photo store
+
+Uploaded photos are streamed chunk by chunk into PHOTO_STORE_DIR while being
+hashed, then renamed to their SHA-256 digest, so identical photos are kept
+once however many complaints reference them. Complaints store only the
+digest (via the Photo model); the bytes are served by the photo endpoints,
+which can cache forever because a digest's content never changes.
+
+JPEG thumbnails are rendered off the request path in a process pool and
+re-rendered on demand if missing. This module does not touch the ORM so the
+pool workers can import it without setting up Django.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Pillow format -> Content-Type of the accepted upload formats
+PHOTO_FORMATS = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+}
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 80
+
+# Larger images are almost certainly not phone photos (decompression bombs)
+MAX_PHOTO_PIXELS = 50_000_000
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+DATA_URI_PATTERN = re.compile(r'^data:(?P<type>[\w/+.-]+)?(;[\w=-]+)*;base64,', re.IGNORECASE)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class InvalidPhoto(ValueError):
+    """Upload is not an accepted image or exceeds the size limit"""
+
+
+def is_photo_reference(value):
+    """Whether a value looks like a photo digest"""
+    return bool(value) and bool(DIGEST_PATTERN.match(value))
+
+
+def photo_path(digest):
+    """Location of an original photo, fanned out by its first two characters"""
+    return Path(settings.PHOTO_STORE_DIR) / digest[:2] / digest
+
+
+def thumbnail_path(digest):
+    """Location of a photo's JPEG thumbnail"""
+    return Path(settings.PHOTO_STORE_DIR) / digest[:2] / f"{digest}.thumb.jpg"
+
+
+def _inspect(path):
+    """(format, width, height) of an image file; raises InvalidPhoto"""
+    try:
+        with Image.open(path) as image:
+            if image.format not in PHOTO_FORMATS:
+                raise InvalidPhoto(f'Unsupported image format: {image.format}')
+            if image.width * image.height > MAX_PHOTO_PIXELS:
+                raise InvalidPhoto('Image dimensions are too large')
+            image.verify()
+            return image.format, image.width, image.height
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise InvalidPhoto('File is not a valid image')
+
+
+def store_photo_chunks(chunks, max_bytes=None):
+    """
+    Stream chunks of an upload into the store
+
+    Args:
+        chunks: iterable of bytes, e.g. UploadedFile.chunks()
+        max_bytes: reject the upload once it grows past this size
+
+    Returns:
+        dict with digest, contentType, size, width and height
+
+    Raises:
+        InvalidPhoto when the data is too large or not an accepted image
+    """
+    max_bytes = max_bytes or settings.PHOTO_MAX_UPLOAD_BYTES
+    store_dir = Path(settings.PHOTO_STORE_DIR)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise InvalidPhoto(f'Photo exceeds {max_bytes // (1024 * 1024)} MB')
+                sha.update(chunk)
+                tmp.write(chunk)
+        if size == 0:
+            raise InvalidPhoto('Photo is empty')
+
+        image_format, width, height = _inspect(tmp_path)
+        digest = sha.hexdigest()
+        path = photo_path(digest)
+        if path.exists():
+            # Same bytes already stored
+            os.unlink(tmp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return {
+        'digest': digest,
+        'contentType': PHOTO_FORMATS[image_format],
+        'size': size,
+        'width': width,
+        'height': height,
+    }
+
+
+def store_photo_data_uri(data_uri, max_bytes=None):
+    """Store a base64 data URI (as sent by older clients); see store_photo_chunks"""
+    match = DATA_URI_PATTERN.match(data_uri)
+    if not match:
+        raise InvalidPhoto('Photo must be a base64 data URI')
+    try:
+        raw = base64.b64decode(data_uri[match.end():], validate=False)
+    except (binascii.Error, ValueError):
+        raise InvalidPhoto('Photo data is not valid base64')
+    return store_photo_chunks([raw], max_bytes=max_bytes)
+
+
+def render_thumbnail(digest):
+    """Write the JPEG thumbnail for a stored photo; returns its digest"""
+    path = thumbnail_path(digest)
+    if path.exists():
+        return digest
+
+    with Image.open(photo_path(digest)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+    return digest
+
+
+def _thumbnail_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: callers run inside threaded web workers
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PHOTO_THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def schedule_thumbnail(digest):
+    """Render a thumbnail in the worker pool without waiting for it"""
+    if thumbnail_path(digest).exists():
+        return None
+    return _thumbnail_pool().submit(render_thumbnail, digest)
+
+
+def read_thumbnail(digest):
+    """JPEG thumbnail bytes, rendering them now if the pool has not yet"""
+    path = thumbnail_path(digest)
+    if not path.exists():
+        render_thumbnail(digest)
+    return path.read_bytes()
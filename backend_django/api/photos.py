@@ -0,0 +1,77 @@
+"""
+Complaint photo records
+
+Ties files in the photo store (photo_store.py) to Photo rows, resolves the
+photo of a new complaint from its request data and builds the URLs clients
+fetch photos and thumbnails from.
+"""
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import Photo
+from .photo_store import (
+    InvalidPhoto, store_photo_chunks, store_photo_data_uri, schedule_thumbnail, is_photo_reference
+)
+
+
+def _record(stored):
+    photo, _ = Photo.objects.get_or_create(digest=stored['digest'], defaults={
+        'content_type': stored['contentType'],
+        'size': stored['size'],
+        'width': stored['width'],
+        'height': stored['height'],
+    })
+    schedule_thumbnail(photo.digest)
+    return photo
+
+
+def save_uploaded_photo(uploaded_file):
+    """Stream an UploadedFile into the store; raises InvalidPhoto"""
+    if uploaded_file.size and uploaded_file.size > settings.PHOTO_MAX_UPLOAD_BYTES:
+        raise InvalidPhoto(f'Photo exceeds {settings.PHOTO_MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+    return _record(store_photo_chunks(uploaded_file.chunks()))
+
+
+def save_data_uri_photo(data_uri):
+    """Store a base64 data URI photo; raises InvalidPhoto"""
+    return _record(store_photo_data_uri(data_uri))
+
+
+def resolve_complaint_photo(data):
+    """
+    Photo reference for a new complaint
+
+    Accepts photoId (digest returned by the upload endpoint) or, for older
+    clients, photoUrl holding a data URI, which is moved into the store.
+    Other photoUrl values are kept as plain links.
+
+    Returns:
+        (photo, photo_url) where at most one is set
+    """
+    photo_id = data.get('photoId')
+    if photo_id:
+        photo = Photo.objects.filter(digest=photo_id).first() if is_photo_reference(photo_id) else None
+        if photo is None:
+            raise InvalidPhoto('Unknown photoId')
+        return photo, None
+
+    photo_url = data.get('photoUrl')
+    if photo_url and photo_url.startswith('data:'):
+        return save_data_uri_photo(photo_url), None
+    return None, photo_url or None
+
+
+def photo_urls(request, digest):
+    """(photoUrl, thumbnailUrl) for a stored photo"""
+    return (
+        request.build_absolute_uri(reverse('photo_image', args=[digest])),
+        request.build_absolute_uri(reverse('photo_thumbnail', args=[digest])),
+    )
+
+
+def complaint_photo_urls(request, complaint):
+    """(photoUrl, thumbnailUrl) for a complaint; legacy links have no thumbnail"""
+    if complaint.photo_id:
+        return photo_urls(request, complaint.photo_id)
+    return complaint.photo_url, None
@@ -0,0 +1,69 @@
+"""
+Bulk QR generation pipeline
+
+Renders QR images for many contractors across a process pool (PNG encoding
+is CPU bound and holds the GIL) and persists the resulting digests with
+batched bulk_update calls that touch only the qr_code column.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .models import Contractor
+from .qr_store import store_qr
+
+
+QR_BULK_BATCH_SIZE = 500
+QR_BULK_CHUNK_SIZE = 32
+
+
+def default_worker_count():
+    """One worker per CPU, leaving one for the web process"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def generate_contractor_qr_codes(progress=None, workers=None, batch_size=QR_BULK_BATCH_SIZE):
+    """
+    Render and store QR codes for every contractor
+
+    Args:
+        progress: optional callback progress(done, total)
+        workers: process pool size, defaults to default_worker_count()
+        batch_size: contractors per bulk UPDATE
+
+    Returns:
+        dict with generated and total counts
+    """
+    rows = list(Contractor.objects.order_by('id').values_list('id', 'contractor_id'))
+    total = len(rows)
+    if progress:
+        progress(0, total)
+    if not rows:
+        return {'generated': 0, 'total': 0}
+
+    # Build payloads through the model so the URL format has one definition
+    payloads = [Contractor(contractor_id=contractor_id).get_qr_url() for _, contractor_id in rows]
+
+    done = 0
+    pending = []
+    # spawn rather than fork: children must not inherit the job worker's database connection
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers or default_worker_count(), mp_context=context) as pool:
+        digests = pool.map(store_qr, payloads, chunksize=QR_BULK_CHUNK_SIZE)
+        for (pk, _), digest in zip(rows, digests):
+            pending.append(Contractor(id=pk, qr_code=digest))
+            if len(pending) >= batch_size:
+                Contractor.objects.bulk_update(pending, ['qr_code'])
+                done += len(pending)
+                pending = []
+                if progress:
+                    progress(done, total)
+
+    if pending:
+        Contractor.objects.bulk_update(pending, ['qr_code'])
+        done += len(pending)
+        if progress:
+            progress(done, total)
+
+    return {'generated': done, 'total': total}
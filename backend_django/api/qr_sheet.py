@@ -0,0 +1,72 @@
+"""
+Printable QR sheet pages
+
+Composes A4 pages of road QR codes from images in the QR cache. Kept free
+of models and the ORM so that the spawn process pool in road_qr.py can
+import it in child processes where Django's apps are not loaded.
+"""
+
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .qr_store import read_qr
+
+
+# A4 portrait at 150 DPI
+SHEET_DPI = 150
+SHEET_SIZE = (1240, 1754)
+SHEET_MARGIN = 60
+SHEET_COLUMNS = 3
+SHEET_ROWS = 4
+SHEET_LABEL_HEIGHT = 70
+ROADS_PER_PAGE = SHEET_COLUMNS * SHEET_ROWS
+
+
+def _label_font():
+    try:
+        return ImageFont.load_default(size=22)
+    except TypeError:
+        # Pillow without FreeType only ships the fixed bitmap font
+        return ImageFont.load_default()
+
+
+def render_sheet_page(entries):
+    """
+    Compose one sheet page
+
+    Args:
+        entries: list of (digest, label) tuples, at most ROADS_PER_PAGE
+
+    Returns:
+        PNG bytes of the page
+    """
+    page = Image.new('L', SHEET_SIZE, 255)
+    draw = ImageDraw.Draw(page)
+    font = _label_font()
+
+    cell_width = (SHEET_SIZE[0] - 2 * SHEET_MARGIN) // SHEET_COLUMNS
+    cell_height = (SHEET_SIZE[1] - 2 * SHEET_MARGIN) // SHEET_ROWS
+    qr_size = min(cell_width, cell_height - SHEET_LABEL_HEIGHT) - 20
+
+    for index, (digest, label) in enumerate(entries):
+        column, row = index % SHEET_COLUMNS, index // SHEET_COLUMNS
+        left = SHEET_MARGIN + column * cell_width
+        top = SHEET_MARGIN + row * cell_height
+
+        png = read_qr(digest)
+        if png is not None:
+            qr_image = Image.open(io.BytesIO(png)).convert('L').resize((qr_size, qr_size), Image.NEAREST)
+            page.paste(qr_image, (left + (cell_width - qr_size) // 2, top))
+
+        for line_number, line in enumerate(label.splitlines()[:2]):
+            text_width = draw.textlength(line, font=font)
+            draw.text(
+                (left + max(0, (cell_width - text_width) / 2), top + qr_size + 8 + line_number * 28),
+                line, fill=0, font=font
+            )
+        draw.rectangle([left, top - 10, left + cell_width - 1, top + cell_height - 11], outline=200)
+
+    buffer = io.BytesIO()
+    page.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
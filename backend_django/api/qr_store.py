@@ -0,0 +1,90 @@
+"""
+Content-addressed QR image store
+
+QR PNGs are rendered once per payload and written to QR_CACHE_DIR under the
+SHA-256 of the payload and render options. Database rows keep only that
+digest; the image itself is served by the qr_image endpoint, which can use
+the digest as a strong ETag because the bytes behind it never change.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from django.urls import reverse
+
+
+# Bump when the rendering below changes so old digests are not reused
+QR_RENDER_VERSION = 1
+
+QR_RENDER_OPTIONS = {
+    'version': 1,
+    'error_correction': qrcode.constants.ERROR_CORRECT_L,
+    'box_size': 10,
+    'border': 4,
+}
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def qr_digest(payload):
+    """Storage key for the QR image of a payload"""
+    return hashlib.sha256(f"qr-v{QR_RENDER_VERSION}:{payload}".encode()).hexdigest()
+
+
+def is_qr_reference(value):
+    """Whether a stored qr_code value is a digest (as opposed to a legacy blob)"""
+    return bool(value) and bool(DIGEST_PATTERN.match(value))
+
+
+def qr_path(digest):
+    """Location of a digest in the cache, fanned out by its first two characters"""
+    return Path(settings.QR_CACHE_DIR) / digest[:2] / f"{digest}.png"
+
+
+def render_qr_png(payload):
+    """Render a payload to PNG bytes"""
+    qr = qrcode.QRCode(**QR_RENDER_OPTIONS)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def write_qr(digest, png):
+    """Atomically place PNG bytes in the cache under digest"""
+    path = qr_path(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(png)
+    os.replace(tmp_path, path)
+
+
+def store_qr(payload):
+    """Render payload into the cache unless already present; returns its digest"""
+    digest = qr_digest(payload)
+    if not qr_path(digest).exists():
+        write_qr(digest, render_qr_png(payload))
+    return digest
+
+
+def read_qr(digest):
+    """PNG bytes for a digest, or None when it is not cached"""
+    try:
+        return qr_path(digest).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def qr_image_url(request, digest):
+    """Absolute URL of the image endpoint for a digest"""
+    return request.build_absolute_uri(reverse('qr_image', args=[digest]))
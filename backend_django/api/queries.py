@@ -0,0 +1,68 @@
+"""
+Aggregated read queries
+
+Builds querysets that carry per-contractor statistics as annotations so list
+endpoints can render every row from a single SELECT instead of issuing
+follow-up queries per contractor.
+"""
+
+from django.db.models import (
+    BooleanField, Case, Count, ExpressionWrapper, F, FloatField, IntegerField,
+    OuterRef, Q, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce
+
+from .models import Contractor, RoadProject, Complaint
+
+
+# sortBy query parameter -> annotation it orders by
+CONTRACTOR_SORT_FIELDS = {
+    'rating': 'avg_rating',
+    'complaints': 'complaint_count',
+}
+
+
+def _count_subquery(queryset):
+    """Correlated COUNT(*) subquery over an already filtered queryset"""
+    counted = queryset.order_by().annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def contractors_with_stats(sort_by=None, order='desc'):
+    """
+    All contractors annotated with rating and workload statistics
+
+    Annotations:
+        avg_rating: mean rating from the rating_sum/rating_count counters, 0 when unrated
+        project_count: number of RoadProject rows assigned
+        complaint_count: number of complaints across those projects
+        has_qr_code: whether a QR code has been generated
+
+    Args:
+        sort_by: 'rating' or 'complaints' to order in SQL, anything else keeps id order
+        order: 'desc' or 'asc'
+    """
+    # rating_count is a maintained column (counters.py), so no Rating subquery is needed
+    avg_rating = Case(
+        When(rating_count__gt=0, then=F('rating_sum') / F('rating_count')),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+    queryset = Contractor.objects.defer('qr_code', 'password').annotate(
+        avg_rating=avg_rating,
+        project_count=_count_subquery(RoadProject.objects.filter(contractor=OuterRef('pk')).values('contractor')),
+        complaint_count=_count_subquery(
+            Complaint.objects.filter(road__contractor=OuterRef('pk')).values('road__contractor')
+        ),
+        has_qr_code=ExpressionWrapper(
+            Q(qr_code__isnull=False) & ~Q(qr_code=''),
+            output_field=BooleanField()
+        ),
+    )
+
+    sort_field = CONTRACTOR_SORT_FIELDS.get(sort_by)
+    if sort_field:
+        ordering = F(sort_field).desc() if order == 'desc' else F(sort_field).asc()
+        return queryset.order_by(ordering, 'id')
+    return queryset.order_by('id')
@@ -0,0 +1,130 @@
+"""
+Query Plan Checks
+
+Runs each benchmark case (benchmark.py) once, records the SQL the endpoint
+executes and asks the database how it would run every statement (EXPLAIN
+QUERY PLAN on SQLite, EXPLAIN on PostgreSQL). A statement that reads a whole
+table instead of going through an index is reported, unless the case is
+listed in EXPECTED_SCANS as reading that table in full by design. A dropped
+or unusable index thus fails the check before it shows up as latency.
+"""
+
+import re
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+
+from .benchmark import quiet, run_once
+from .metrics import QueryTimer
+
+
+# SQLite: "SCAN t" reads the table; "SCAN t USING [COVERING] INDEX i" walks
+# an index in order, which only reads everything when the rows still need a
+# separate sort ("USE TEMP B-TREE FOR ORDER BY"), otherwise a LIMIT stops it early
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)(?: AS (?P<alias>\w+))?(?P<index> USING (?:COVERING )?INDEX \w+)?$')
+SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (?P<table>\w+)(?: (?P<alias>\w+))?')
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+# Whole-table reads that are the point of the endpoint, per case
+EXPECTED_SCANS = {
+    # Streamed in id order, which is the table's own order
+    'export_complaints': {'complaints'},
+    'export_roads_csv': {'road_projects'},
+    # Sums one aggregate row per road instead of counting complaints
+    'complaints_summary': {'project_complaint_stats'},
+}
+
+# Tables that stay a few hundred rows at every dataset size
+SMALL_TABLES = {'Admins', 'contractors'}
+
+# "FROM "complaints" U0" / "JOIN "road_projects" T3": Django's subquery aliases
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?"?([A-Z]\d+)"?(?=[\s,)]|$)')
+
+FullScan = namedtuple('FullScan', ['case', 'table', 'detail', 'sql'])
+
+
+class QueryRecorder(QueryTimer):
+    """QueryTimer that also keeps each statement with its parameters"""
+
+    def __init__(self):
+        super().__init__()
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.statements.append((sql, params))
+        return super().__call__(execute, sql, params, many, context)
+
+
+def supported():
+    return connection.vendor in EXPLAIN_PREFIXES
+
+
+def _plan(sql, params):
+    """Plan lines for one statement"""
+    with connection.cursor() as cursor:
+        cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql, params)
+        rows = cursor.fetchall()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: (line,)
+    return [row[-1] for row in rows]
+
+
+def _scan_lines(lines):
+    """(table or alias, line) for the whole-table reads among plan lines"""
+    if connection.vendor == 'sqlite':
+        sorted_separately = any(line.startswith(SQLITE_SORT) for line in lines)
+        for line in lines:
+            match = SQLITE_SCAN.match(line)
+            if match and (not match.group('index') or sorted_separately):
+                yield match.group('alias') or match.group('table'), line
+    else:
+        for line in lines:
+            match = POSTGRESQL_SCAN.search(line)
+            if match:
+                yield match.group('alias') or match.group('table'), line
+
+
+def full_scans(sql, params):
+    """(table, plan line) for every whole-table read in the plan of sql"""
+    if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+        return []
+    aliases = {alias: table for table, alias in TABLE_ALIAS.findall(sql)}
+    lines = [line.strip() for line in _plan(sql, params)]
+    return [(aliases.get(name, name), line) for name, line in _scan_lines(lines)]
+
+
+def check_case(client, case, fixture):
+    """
+    Full scans in the statements one request of case executes
+
+    Statements are explained after the request's transaction has been rolled
+    back; plans depend on the schema, not on the rows written.
+
+    Returns:
+        list of FullScan not allowed by SMALL_TABLES or EXPECTED_SCANS
+    """
+    recorder = QueryRecorder()
+    # A cached response would hide the endpoint's queries
+    cache.clear()
+    with quiet():
+        run_once(client, case, fixture, recorder)
+
+    allowed = SMALL_TABLES | EXPECTED_SCANS.get(case.name, set())
+    found = []
+    seen = set()
+    for sql, params in recorder.statements:
+        if sql in seen:
+            continue
+        seen.add(sql)
+        for table, detail in full_scans(sql, params):
+            if table not in allowed:
+                found.append(FullScan(case.name, table, detail, sql))
+    return found
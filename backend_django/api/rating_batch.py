@@ -0,0 +1,153 @@
+"""
+Batch Rating Recomputation
+
+Re-rates every contractor in one pass. Projects are loaded as plain column
+tuples and complaints are reduced to per-road aggregates with a single
+GROUP BY query, so the cost is one scan of each table instead of one
+complaint scan per project per contractor.
+"""
+
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import Contractor, RoadProject, Complaint, ProjectComplaintStats
+from .rating_engine import RECENT_WINDOW
+from .utils import (
+    SEVERITY_SCORES, UNRESOLVED_STATUSES,
+    get_project_deductions, build_rating_result
+)
+
+
+ProjectRow = namedtuple('ProjectRow', ['id', 'contractor_id', 'road_name', 'warranty_end_date'])
+
+STATS_FIELDS = [
+    'complaint_count', 'critical_count', 'high_count', 'medium_count', 'low_count',
+    'unresolved_count', 'recent_count', 'recent_expires_at',
+]
+
+
+def load_project_rows():
+    """All contractor-owned projects as lightweight tuples, ordered by id"""
+    rows = RoadProject.objects.filter(contractor__isnull=False) \
+        .order_by('id') \
+        .values_list('id', 'contractor_id', 'road_name', 'warranty_end_date')
+    return [ProjectRow(*row) for row in rows.iterator(chunk_size=2000)]
+
+
+def load_complaint_aggregates(now):
+    """Per-road complaint aggregates keyed by road id, computed in the database"""
+    recent = Q(created_at__gt=now - RECENT_WINDOW)
+    rows = Complaint.objects.order_by().values('road_id').annotate(
+        complaint_count=Count('id'),
+        critical_count=Count('id', filter=Q(severity='Critical')),
+        high_count=Count('id', filter=Q(severity='High')),
+        low_count=Count('id', filter=Q(severity='Low')),
+        unresolved_count=Count('id', filter=Q(status__in=UNRESOLVED_STATUSES)),
+        recent_count=Count('id', filter=recent),
+        oldest_recent=Min('created_at', filter=recent),
+    )
+
+    aggregates = {}
+    for row in rows.iterator(chunk_size=2000):
+        row['medium_count'] = (
+            row['complaint_count'] - row['critical_count'] -
+            row['high_count'] - row['low_count']
+        )
+        oldest_recent = row.pop('oldest_recent')
+        row['recent_expires_at'] = oldest_recent + RECENT_WINDOW if oldest_recent else None
+        aggregates[row.pop('road_id')] = row
+    return aggregates
+
+
+def compute_all_ratings(now=None):
+    """
+    Compute every contractor's rating without touching the database rows
+
+    Returns:
+        (ratings, aggregates) where ratings maps contractor id to the same
+        payload as calculate_contractor_rating, and aggregates maps road id
+        to its complaint counts
+    """
+    now = now or timezone.now()
+    aggregates = load_complaint_aggregates(now)
+
+    deductions_by_contractor = defaultdict(list)
+    for project in load_project_rows():
+        counts = aggregates.get(project.id)
+        if not counts:
+            continue
+        severity_deduction = (
+            counts['critical_count'] * SEVERITY_SCORES['Critical'] +
+            counts['high_count'] * SEVERITY_SCORES['High'] +
+            counts['medium_count'] * SEVERITY_SCORES['Medium'] +
+            counts['low_count'] * SEVERITY_SCORES['Low']
+        )
+        deductions_by_contractor[project.contractor_id].extend(get_project_deductions(
+            project, counts['complaint_count'], severity_deduction,
+            counts['unresolved_count'], counts['recent_count'], now
+        ))
+
+    ratings = {}
+    for contractor_id in Contractor.objects.values_list('id', flat=True).iterator(chunk_size=2000):
+        ratings[contractor_id] = build_rating_result(deductions_by_contractor.get(contractor_id, []), now)
+    return ratings, aggregates
+
+
+def sync_project_stats(aggregates, batch_size=1000):
+    """Overwrite the incremental engine's per-project aggregates in bulk"""
+    project_ids = RoadProject.objects.values_list('id', flat=True)
+    empty = dict.fromkeys(STATS_FIELDS, 0)
+    empty['recent_expires_at'] = None
+
+    rows = [
+        ProjectComplaintStats(project_id=project_id, **aggregates.get(project_id, empty))
+        for project_id in project_ids.iterator(chunk_size=2000)
+    ]
+    ProjectComplaintStats.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=STATS_FIELDS
+    )
+    return len(rows)
+
+
+def recompute_all_ratings(now=None, batch_size=1000, sync_stats=True, dry_run=False):
+    """
+    Re-rate every contractor and persist current_rating in batches
+
+    Args:
+        now: reference time for warranty and recency rules
+        batch_size: rows per bulk UPDATE / INSERT statement
+        sync_stats: also rewrite ProjectComplaintStats from the same aggregates
+        dry_run: compute only, write nothing
+
+    Returns:
+        dict with contractors, changed and projects counts plus the ratings map
+    """
+    ratings, aggregates = compute_all_ratings(now)
+
+    current = dict(Contractor.objects.values_list('id', 'current_rating').iterator(chunk_size=2000))
+    changed = [
+        Contractor(id=contractor_id, current_rating=result['finalRating'])
+        for contractor_id, result in ratings.items()
+        if current.get(contractor_id) != result['finalRating']
+    ]
+
+    projects = 0
+    if not dry_run:
+        with transaction.atomic():
+            Contractor.objects.bulk_update(changed, ['current_rating'], batch_size=batch_size)
+            if sync_stats:
+                projects = sync_project_stats(aggregates, batch_size)
+
+    return {
+        'contractors': len(ratings),
+        'changed': len(changed),
+        'projects': projects,
+        'ratings': ratings,
+    }
@@ -0,0 +1,162 @@
+"""
+Incremental Rating Engine
+
+Keeps a ProjectComplaintStats row per road project so a contractor's rating
+can be produced from O(projects) aggregate rows instead of re-reading every
+complaint. Aggregates are adjusted by delta when a complaint is created or
+changes status; the time-dependent recent count is refreshed lazily once the
+oldest recent complaint ages out of the window.
+
+The output matches calculate_contractor_rating in utils.py because both feed
+the same counts through get_project_deductions.
+
+Writes apply their deltas inline and leave the rating itself to a
+recompute_contractor_rating job (scorecards.py), whose cost grows with the
+contractor's projects.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .models import Complaint, RoadProject, ProjectComplaintStats
+from .utils import (
+    SEVERITY_SCORES, UNRESOLVED_STATUSES, RECENT_COMPLAINT_DAYS,
+    is_recent_complaint, get_project_deductions, build_rating_result
+)
+
+
+# A complaint stops counting as recent once (now - created_at).days exceeds
+# RECENT_COMPLAINT_DAYS, i.e. a full extra day after the nominal window.
+RECENT_WINDOW = timedelta(days=RECENT_COMPLAINT_DAYS + 1)
+
+SEVERITY_COUNT_FIELDS = {
+    'Critical': 'critical_count',
+    'High': 'high_count',
+    'Medium': 'medium_count',
+    'Low': 'low_count',
+}
+
+
+def severity_count_field(severity):
+    """Aggregate column for a severity; unknown values score like Medium"""
+    return SEVERITY_COUNT_FIELDS.get(severity, 'medium_count')
+
+
+def severity_deduction(stats):
+    """Summed severity score for the complaints behind a stats row"""
+    return (
+        stats.critical_count * SEVERITY_SCORES['Critical'] +
+        stats.high_count * SEVERITY_SCORES['High'] +
+        stats.medium_count * SEVERITY_SCORES['Medium'] +
+        stats.low_count * SEVERITY_SCORES['Low']
+    )
+
+
+def _recent_window_aggregates(project_id, now):
+    """Count recent complaints for a project and when the oldest one expires"""
+    recent = Complaint.objects.filter(
+        road_id=project_id,
+        created_at__gt=now - RECENT_WINDOW
+    ).aggregate(count=Count('id'), oldest=Min('created_at'))
+    expires_at = recent['oldest'] + RECENT_WINDOW if recent['oldest'] else None
+    return recent['count'], expires_at
+
+
+def rebuild_project_stats(project_id, now=None):
+    """Recompute a project's aggregates from its complaints and store them"""
+    now = now or timezone.now()
+    totals = Complaint.objects.filter(road_id=project_id).aggregate(
+        complaint_count=Count('id'),
+        critical_count=Count('id', filter=Q(severity='Critical')),
+        high_count=Count('id', filter=Q(severity='High')),
+        low_count=Count('id', filter=Q(severity='Low')),
+        unresolved_count=Count('id', filter=Q(status__in=UNRESOLVED_STATUSES)),
+    )
+    totals['medium_count'] = (
+        totals['complaint_count'] - totals['critical_count'] -
+        totals['high_count'] - totals['low_count']
+    )
+    totals['recent_count'], totals['recent_expires_at'] = _recent_window_aggregates(project_id, now)
+
+    stats, _ = ProjectComplaintStats.objects.update_or_create(
+        project_id=project_id,
+        defaults=totals
+    )
+    return stats
+
+
+def refresh_recent_window(stats, now=None):
+    """Re-count recent complaints once the earliest one has aged out"""
+    now = now or timezone.now()
+    if stats.recent_expires_at is None or stats.recent_expires_at > now:
+        return stats
+
+    stats.recent_count, stats.recent_expires_at = _recent_window_aggregates(stats.project_id, now)
+    ProjectComplaintStats.objects.filter(project_id=stats.project_id).update(
+        recent_count=stats.recent_count,
+        recent_expires_at=stats.recent_expires_at
+    )
+    return stats
+
+
+def record_complaint_created(complaint, now=None):
+    """Apply a newly created complaint to its project's aggregates"""
+    now = now or timezone.now()
+    updates = {
+        'complaint_count': F('complaint_count') + 1,
+        severity_count_field(complaint.severity): F(severity_count_field(complaint.severity)) + 1,
+    }
+    if complaint.status in UNRESOLVED_STATUSES:
+        updates['unresolved_count'] = F('unresolved_count') + 1
+    if is_recent_complaint(complaint.created_at, now):
+        expires_at = complaint.created_at + RECENT_WINDOW
+        updates['recent_count'] = F('recent_count') + 1
+        updates['recent_expires_at'] = Least(Coalesce(F('recent_expires_at'), expires_at), expires_at)
+
+    updated = ProjectComplaintStats.objects.filter(project_id=complaint.road_id).update(**updates)
+    if not updated:
+        # No aggregates yet (e.g. data created before the engine existed)
+        rebuild_project_stats(complaint.road_id, now)
+
+
+def record_complaint_status_change(complaint, old_status):
+    """Adjust the unresolved count after a complaint's status changed"""
+    was_unresolved = old_status in UNRESOLVED_STATUSES
+    is_unresolved = complaint.status in UNRESOLVED_STATUSES
+    if was_unresolved == is_unresolved:
+        return
+
+    delta = 1 if is_unresolved else -1
+    updated = ProjectComplaintStats.objects.filter(project_id=complaint.road_id).update(
+        unresolved_count=F('unresolved_count') + delta
+    )
+    if not updated:
+        rebuild_project_stats(complaint.road_id)
+
+
+def calculate_contractor_rating_incremental(contractor, now=None):
+    """
+    Calculate a contractor's rating from per-project aggregates
+
+    Returns the same payload as utils.calculate_contractor_rating.
+    """
+    now = now or timezone.now()
+    projects = RoadProject.objects.filter(contractor=contractor) \
+        .select_related('complaint_stats').order_by('id')
+
+    deductions = []
+    for project in projects:
+        try:
+            stats = refresh_recent_window(project.complaint_stats, now)
+        except ProjectComplaintStats.DoesNotExist:
+            stats = rebuild_project_stats(project.id, now)
+
+        deductions.extend(get_project_deductions(
+            project, stats.complaint_count, severity_deduction(stats),
+            stats.unresolved_count, stats.recent_count, now
+        ))
+
+    return build_rating_result(deductions, now)
@@ -0,0 +1,109 @@
+"""
+Rating Refresh Sweep
+
+calculate_contractor_rating reads the clock: a complaint stops counting as
+recent RECENT_WINDOW after it was filed, and a road's complaints weigh less
+once its warranty has ended. Neither is a write, so nothing else queues a
+recompute when it happens and stored ratings would drift.
+
+The sweep remembers how far it has processed time (a SweepCheckpoint row).
+Each run looks only at the boundaries crossed since then:
+
+- complaints whose created_at + RECENT_WINDOW falls in the window, a range
+  on the complaints_created index shifted back by RECENT_WINDOW
+- roads with complaints whose warranty_end_date falls in the window, a
+  range on the roads_warranty_end index
+
+and queues recompute_contractor_rating for the contractors they belong to,
+which also refreshes their scorecards and today's rollup score. The first
+run has no checkpoint and queues every contractor once.
+
+The refresh_stale_ratings job runs the sweep and queues its own next run
+SWEEP_INTERVAL later; run_jobs workers queue the first one when they start.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Complaint, Contractor, RoadProject, SweepCheckpoint
+from .jobs import enqueue
+from .rating_engine import RECENT_WINDOW
+from .scorecards import enqueue_rating_recompute
+
+
+SWEEP_NAME = 'rating-refresh'
+
+SWEEP_INTERVAL = timedelta(hours=1)
+
+
+def aged_out_contractor_ids(since, until):
+    """Contractors with a complaint that left the recency window in (since, until]"""
+    return set(
+        Complaint.objects.filter(
+            created_at__gt=since - RECENT_WINDOW, created_at__lte=until - RECENT_WINDOW,
+            road__contractor__isnull=False
+        ).order_by().values_list('road__contractor_id', flat=True).distinct()
+    )
+
+
+def warranty_ended_contractor_ids(since, until):
+    """Contractors with a complained-about road whose warranty ended in [since, until)"""
+    has_complaints = Exists(Complaint.objects.filter(road=OuterRef('pk')))
+    return set(
+        RoadProject.objects.filter(
+            warranty_end_date__gte=since, warranty_end_date__lt=until, contractor__isnull=False
+        ).filter(has_complaints).order_by().values_list('contractor_id', flat=True).distinct()
+    )
+
+
+def stale_contractor_ids(since, until):
+    """Contractors whose rating changed with the passage of time between since and until"""
+    return aged_out_contractor_ids(since, until) | warranty_ended_contractor_ids(since, until)
+
+
+def sweep_stale_ratings(until=None):
+    """
+    Queue a rating recompute for every contractor that crossed a recency or
+    warranty boundary since the last sweep, and advance the checkpoint
+
+    Returns:
+        dict with the swept window (from is None on the first run) and the
+        number of contractors queued
+    """
+    until = until or timezone.now()
+    with transaction.atomic():
+        checkpoint = SweepCheckpoint.objects.select_for_update().filter(name=SWEEP_NAME).first()
+        if checkpoint is None:
+            since = None
+            contractors = Contractor.objects.all()
+            checkpoint = SweepCheckpoint(name=SWEEP_NAME, swept_until=until)
+        elif checkpoint.swept_until < until:
+            since = checkpoint.swept_until
+            contractors = Contractor.objects.filter(id__in=stale_contractor_ids(since, until))
+            checkpoint.swept_until = until
+        else:
+            # Already swept past until
+            since = checkpoint.swept_until
+            contractors = Contractor.objects.none()
+
+        contractors = list(contractors.only('id').order_by('id'))
+        for contractor in contractors:
+            enqueue_rating_recompute(contractor)
+        checkpoint.save()
+    return {'from': since, 'to': until, 'contractors': len(contractors)}
+
+
+def schedule_rating_refresh(delay=None):
+    """Queue the sweep job; returns the already queued one if there is one"""
+    return enqueue('refresh_stale_ratings', dedupe_key=f'sweep:{SWEEP_NAME}', delay=delay)
+
+
+def refresh_stale_ratings(progress=None):
+    """Job: queue the next run SWEEP_INTERVAL from now, then run the sweep"""
+    # Queued first so a failing sweep does not stop the schedule; the next
+    # run covers this window too, since the checkpoint only advances on success
+    schedule_rating_refresh(SWEEP_INTERVAL)
+    return sweep_stale_ratings()
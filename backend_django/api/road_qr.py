@@ -0,0 +1,119 @@
+"""
+Road QR rendering and printable sheets
+
+Road QR images go through the same content-addressed cache as contractor QR
+codes (qr_store.py); RoadProject.qr_image keeps the digest. For printing,
+many road QR codes are tiled onto A4 pages with their road id and name
+underneath. Pages are composed in a process pool (qr_sheet.py, which the
+pool's children import without setting up Django) and appended one at a
+time to a PDF (or a ZIP of PNG pages) in a temporary file. The response
+starts once the whole file is written; FileResponse then sends it in blocks,
+so neither the pages nor the file are held in memory.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from .models import RoadProject
+from .qr_sheet import SHEET_DPI, ROADS_PER_PAGE, render_sheet_page
+from .qr_store import store_qr, qr_path, qr_digest
+
+
+# Upper bound on roads in one sheet request
+MAX_SHEET_ROADS = 10000
+
+# Below this many pages the pool start-up costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 4
+
+
+def road_qr_payload(road):
+    """Text encoded in a road's QR code"""
+    if road.qr_code_data:
+        return road.qr_code_data
+    return json.dumps({'roadId': road.road_id, 'roadName': road.road_name})
+
+
+def _pool(workers):
+    # spawn rather than fork: callers run inside threaded web workers
+    return ProcessPoolExecutor(
+        max_workers=workers or max(1, (os.cpu_count() or 2) - 1),
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+def ensure_road_qr_images(roads, workers=None):
+    """
+    Make sure every road has a cached QR image and a stored digest
+
+    Roads whose digest is missing, stale or absent from the cache are rendered
+    (in a process pool when there are many) and saved with bulk_update.
+    """
+    stale = []
+    for road in roads:
+        payload = road_qr_payload(road)
+        if not road.qr_image or not qr_path(road.qr_image).exists() or road.qr_image != qr_digest(payload):
+            stale.append((road, payload))
+    if not stale:
+        return roads
+
+    payloads = [payload for _, payload in stale]
+    if len(stale) >= PARALLEL_PAGE_THRESHOLD * ROADS_PER_PAGE:
+        with _pool(workers) as pool:
+            digests = list(pool.map(store_qr, payloads, chunksize=32))
+    else:
+        digests = [store_qr(payload) for payload in payloads]
+
+    for (road, _), digest in zip(stale, digests):
+        road.qr_image = digest
+    RoadProject.objects.bulk_update([road for road, _ in stale], ['qr_image'], batch_size=500)
+    return roads
+
+
+def _sheet_pages(roads, workers=None):
+    """Yield PNG bytes for each page, composed in parallel for large sheets"""
+    entries = [(road.qr_image, f"{road.road_id}\n{road.road_name}") for road in roads]
+    pages = [entries[i:i + ROADS_PER_PAGE] for i in range(0, len(entries), ROADS_PER_PAGE)]
+
+    if len(pages) < PARALLEL_PAGE_THRESHOLD:
+        for page in pages:
+            yield render_sheet_page(page)
+        return
+
+    with _pool(workers) as pool:
+        yield from pool.map(render_sheet_page, pages)
+
+
+def build_qr_sheet(roads, output_format='pdf', workers=None):
+    """
+    Render roads onto printable pages
+
+    Args:
+        roads: RoadProject instances, in print order
+        output_format: 'pdf' for one multi-page PDF, 'png' for a ZIP of page PNGs
+
+    Returns:
+        an open temporary file positioned at the start, deleted on close
+    """
+    roads = ensure_road_qr_images(list(roads), workers)
+    output = tempfile.TemporaryFile()
+
+    if output_format == 'pdf':
+        first = True
+        for png in _sheet_pages(roads, workers):
+            # Pillow appends to the PDF it wrote, so only one page is in memory
+            Image.open(io.BytesIO(png)).save(output, format='PDF', resolution=SHEET_DPI, append=not first)
+            first = False
+    else:
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for number, png in enumerate(_sheet_pages(roads, workers), start=1):
+                archive.writestr(f"road-qr-sheet-{number:04d}.png", png)
+
+    output.seek(0)
+    return output
@@ -0,0 +1,367 @@
+"""
+Daily Contractor Rollups
+
+ContractorDailyRollup keeps, per contractor and day, the ratings received
+(sum and count), complaints filed by severity, complaints resolved and the
+end-of-day calculate_contractor_rating score. Trend charts read a range of
+these rows on the (contractor, day) index instead of scanning the ratings
+and complaints tables, so a window of years answers from at most a few
+thousand rows, and from a few dozen once bucketed by month.
+
+Rating, complaint and resolution writes add their deltas to the day's row.
+The score is written whenever the recompute_contractor_rating job runs, so
+a day without a score kept the previous day's: trend queries carry the last
+score forward.
+
+Road reassignments and deletions move or remove complaints wholesale, so
+the job they queue rebuilds the affected contractors' rows
+(rebuild_contractor_rollups).
+rebuild_rollups recomputes the whole table from the source rows. It replays each
+contractor's history event by event (complaints filed, resolved, aging out
+of the recency window, warranties ending) to recover the score at the end
+of every day it changed.
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Complaint, Contractor, ContractorDailyRollup, Rating, RoadProject
+from .rating_batch import ProjectRow
+from .rating_engine import RECENT_WINDOW, severity_count_field
+from .utils import SEVERITY_SCORES, UNRESOLVED_STATUSES, get_project_deductions
+
+
+TREND_BUCKETS = ('day', 'week', 'month')
+
+# Default trend window, and the most points one response may hold
+DEFAULT_TREND_DAYS = 90
+MAX_TREND_POINTS = 400
+
+SEVERITY_LABELS = {
+    'critical_count': 'Critical',
+    'high_count': 'High',
+    'medium_count': 'Medium',
+    'low_count': 'Low',
+}
+
+COUNT_FIELDS = ['rating_sum', 'rating_count', 'complaint_count', 'resolved_count'] + list(SEVERITY_LABELS)
+
+# Replay event kinds, in the order events at the same instant are applied
+FILED, RESOLVED, AGED, WARRANTY_ENDED = range(4)
+
+
+def _apply_deltas(contractor_id, day, deltas):
+    """Add deltas (field -> change) to a contractor's row for day, creating it if needed"""
+    now = timezone.now()
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    rows = ContractorDailyRollup.objects.filter(contractor_id=contractor_id, day=day)
+    if rows.update(updated_at=now, **updates):
+        return
+    try:
+        with transaction.atomic():
+            ContractorDailyRollup.objects.create(contractor_id=contractor_id, day=day, **deltas)
+    except IntegrityError:
+        # Another request created the row first; apply on top of it
+        rows.update(updated_at=now, **updates)
+
+
+def record_rollup_rating(contractor, rating_value):
+    """Count a new rating into today's rollup"""
+    _apply_deltas(contractor.pk, timezone.localdate(), {'rating_sum': rating_value, 'rating_count': 1})
+
+
+def record_rollup_complaint(complaint):
+    """Count a new complaint into its contractor's rollup for the day it was filed"""
+    contractor_id = complaint.road.contractor_id
+    if contractor_id is None:
+        return
+    _apply_deltas(contractor_id, timezone.localdate(complaint.created_at), {
+        'complaint_count': 1,
+        severity_count_field(complaint.severity): 1,
+    })
+
+
+def record_rollup_status_change(complaint, old_status):
+    """Count a complaint that has just been resolved into the day of its resolution"""
+    contractor_id = complaint.road.contractor_id
+    if contractor_id is None or complaint.status != 'Resolved' or old_status == 'Resolved':
+        return
+    resolved_at = complaint.resolved_date or timezone.now()
+    _apply_deltas(contractor_id, timezone.localdate(resolved_at), {'resolved_count': 1})
+
+
+def record_rollup_score(contractor_id, score):
+    """Store a freshly calculated rating as today's score (the last one of the day stays)"""
+    day = timezone.localdate()
+    rows = ContractorDailyRollup.objects.filter(contractor_id=contractor_id, day=day)
+    if rows.update(score=score, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            ContractorDailyRollup.objects.create(contractor_id=contractor_id, day=day, score=score)
+    except IntegrityError:
+        rows.update(score=score, updated_at=timezone.now())
+
+
+def _day_end(day, until):
+    """Start of the next local day, or until if that is earlier"""
+    return min(timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)), until)
+
+
+def _project_deduction(project, counts, now):
+    complaint_count, severity_deduction, unresolved_count, recent_count = counts
+    return math.fsum(item['deduction'] for item in get_project_deductions(
+        project, complaint_count, severity_deduction, unresolved_count, recent_count, now
+    ))
+
+
+def replay_scores(projects, complaints, until=None):
+    """
+    End-of-day rating for every day a contractor's rating changed
+
+    Applies the same per-project rules as calculate_contractor_rating to
+    the complaint counts as they stood at the end of each day. The rating
+    only changes when a complaint is filed or resolved, ages out of the
+    recency window, or a warranty ends, so the days with one of those
+    events are the only ones that need a score.
+
+    Args:
+        projects: ProjectRow tuples of the contractor's roads
+        complaints: (road_id, created_at, severity, status, resolved_date) tuples
+        until: stop at this moment (default now); today's score is as of it
+
+    Returns:
+        list of (day, score) in day order
+    """
+    until = until or timezone.now()
+    projects = {project.id: project for project in projects}
+    events = []
+    for road_id, created_at, severity, status, resolved_date in complaints:
+        if road_id not in projects:
+            continue
+        # A complaint stays unresolved until its resolution; rejected ones never count
+        resolved_later = status == 'Resolved' and resolved_date is not None and resolved_date > created_at
+        unresolved = status in UNRESOLVED_STATUSES or resolved_later
+        events.append((created_at, FILED, road_id, SEVERITY_SCORES.get(severity, 0.4), unresolved))
+        if resolved_later:
+            events.append((resolved_date, RESOLVED, road_id, 0, False))
+        events.append((created_at + RECENT_WINDOW, AGED, road_id, 0, False))
+    for project in projects.values():
+        if project.warranty_end_date is not None:
+            events.append((project.warranty_end_date, WARRANTY_ENDED, project.id, 0, False))
+    events = sorted(event for event in events if event[0] <= until)
+
+    counts = defaultdict(lambda: [0, 0.0, 0, 0])
+    deductions = {}
+    scores = []
+    index = 0
+    while index < len(events):
+        day = timezone.localdate(events[index][0])
+        changed = set()
+        while index < len(events) and timezone.localdate(events[index][0]) == day:
+            _, kind, road_id, severity_score, unresolved = events[index]
+            project_counts = counts[road_id]
+            if kind == FILED:
+                project_counts[0] += 1
+                project_counts[1] += severity_score
+                project_counts[2] += unresolved
+                project_counts[3] += 1
+            elif kind == RESOLVED:
+                project_counts[2] -= 1
+            elif kind == AGED:
+                project_counts[3] -= 1
+            changed.add(road_id)
+            index += 1
+
+        now = _day_end(day, until)
+        for road_id in changed:
+            deductions[road_id] = _project_deduction(projects[road_id], counts[road_id], now)
+        rating_points = max(0, min(5.0, 5.0 - math.fsum(deductions.values())))
+        scores.append((day, round(rating_points, 2)))
+    return scores
+
+
+def contractor_rollups(contractor_id, until=None):
+    """Rollup rows for one contractor rebuilt from its ratings, complaints and roads"""
+    until = until or timezone.now()
+    rows = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0))
+
+    ratings = Rating.objects.filter(contractor_id=contractor_id, created_at__lte=until) \
+        .annotate(day=TruncDate('created_at')).order_by() \
+        .values('day').annotate(
+            total=Coalesce(Sum('rating_value'), Value(0.0), output_field=FloatField()),
+            count=Count('id'),
+        )
+    for rating in ratings:
+        rows[rating['day']].update(rating_sum=rating['total'], rating_count=rating['count'])
+
+    projects = [
+        ProjectRow(*row) for row in RoadProject.objects.filter(contractor_id=contractor_id).order_by('id')
+        .values_list('id', 'contractor_id', 'road_name', 'warranty_end_date')
+    ]
+    complaints = list(
+        Complaint.objects.filter(road__contractor_id=contractor_id, created_at__lte=until).order_by()
+        .values_list('road_id', 'created_at', 'severity', 'status', 'resolved_date')
+        .iterator(chunk_size=2000)
+    )
+    for _, created_at, severity, status_value, resolved_date in complaints:
+        row = rows[timezone.localdate(created_at)]
+        row['complaint_count'] += 1
+        row[severity_count_field(severity)] += 1
+        if status_value == 'Resolved' and resolved_date is not None and resolved_date <= until:
+            rows[timezone.localdate(resolved_date)]['resolved_count'] += 1
+
+    scores = dict(replay_scores(projects, complaints, until))
+    empty = dict.fromkeys(COUNT_FIELDS, 0)
+    return [
+        ContractorDailyRollup(contractor_id=contractor_id, day=day, score=scores.get(day), **rows.get(day, empty))
+        for day in sorted(set(rows) | set(scores))
+    ]
+
+
+def rebuild_contractor_rollups(*contractor_ids):
+    """Replace the rollups of the given contractors with rows rebuilt from the source tables"""
+    until = timezone.now()
+    for contractor_id in contractor_ids:
+        # Replayed before the write transaction, which then only swaps the rows
+        rollups = contractor_rollups(contractor_id, until)
+        with transaction.atomic():
+            ContractorDailyRollup.objects.filter(contractor_id=contractor_id).delete()
+            ContractorDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    Recompute every contractor's daily rollups from the source tables
+
+    One contractor at a time, so memory stays bounded by the busiest
+    contractor's complaints.
+
+    Returns:
+        number of rollup rows written
+    """
+    until = timezone.now()
+    written = 0
+    with transaction.atomic():
+        ContractorDailyRollup.objects.all().delete()
+        for contractor_id in Contractor.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=2000):
+            rollups = contractor_rollups(contractor_id, until)
+            ContractorDailyRollup.objects.bulk_create(rollups, batch_size=batch_size)
+            written += len(rollups)
+    return written
+
+
+def parse_trend_window(params, today=None):
+    """
+    (start, end, bucket) from the from/to/bucket query parameters
+
+    The window defaults to the DEFAULT_TREND_DAYS days up to today, and the
+    bucket to the finest one that keeps the series within MAX_TREND_POINTS.
+
+    Raises:
+        ValueError: on malformed dates, an unknown bucket or too many points
+    """
+    today = today or timezone.localdate()
+    try:
+        end = date.fromisoformat(params['to']) if params.get('to') else today
+        start = date.fromisoformat(params['from']) if params.get('from') else end - timedelta(days=DEFAULT_TREND_DAYS - 1)
+    except ValueError:
+        raise ValueError('from and to must be dates (YYYY-MM-DD)')
+    except OverflowError:
+        raise ValueError('to is too early for the default window; give from as well')
+    if start > end:
+        raise ValueError('from must not be after to')
+
+    bucket = params.get('bucket')
+    if bucket is None:
+        bucket = next(
+            (name for name in TREND_BUCKETS if bucket_count(start, end, name) <= MAX_TREND_POINTS),
+            TREND_BUCKETS[-1]
+        )
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+    if bucket_count(start, end, bucket) > MAX_TREND_POINTS:
+        raise ValueError(f'At most {MAX_TREND_POINTS} points per request; use a larger bucket or a shorter window')
+    return start, end, bucket
+
+
+def bucket_start(day, bucket):
+    """First day of the bucket containing day (weeks start on Monday)"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_count(start, end, bucket):
+    """Number of buckets overlapping start..end, without listing them"""
+    if bucket == 'week':
+        return ((end - start).days + start.weekday()) // 7 + 1
+    if bucket == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def bucket_starts(start, end, bucket):
+    """First day of every bucket overlapping start..end"""
+    first = bucket_start(start, bucket)
+    count = bucket_count(start, end, bucket)
+    if bucket == 'month':
+        months = (first.year * 12 + first.month - 1 + offset for offset in range(count))
+        return [date(month // 12, month % 12 + 1, 1) for month in months]
+    step = timedelta(days=7 if bucket == 'week' else 1)
+    return [first + step * offset for offset in range(count)]
+
+
+def _point(counts, score):
+    return {
+        'ratingCount': counts['rating_count'],
+        'averageRating': round(counts['rating_sum'] / counts['rating_count'], 2) if counts['rating_count'] else None,
+        'complaints': counts['complaint_count'],
+        'severity': {label: counts[field] for field, label in SEVERITY_LABELS.items()},
+        'resolved': counts['resolved_count'],
+        'score': score,
+    }
+
+
+def contractor_trend(contractor_id, start, end, bucket):
+    """
+    Trend series for a contractor over start..end, one point per bucket
+
+    Counts are summed over each bucket; score is the rating at the end of
+    the bucket, carried forward from earlier days when it did not change
+    (None before the first known score).
+
+    Returns:
+        (points, totals)
+    """
+    rows = ContractorDailyRollup.objects.filter(contractor_id=contractor_id, day__gte=start, day__lte=end) \
+        .order_by('day').values('day', 'score', *COUNT_FIELDS)
+    score = ContractorDailyRollup.objects.filter(
+        contractor_id=contractor_id, day__lt=start, score__isnull=False
+    ).order_by('-day').values_list('score', flat=True).first()
+
+    buckets = {day: dict.fromkeys(COUNT_FIELDS, 0) for day in bucket_starts(start, end, bucket)}
+    scores = {}
+    for row in rows:
+        counts = buckets[bucket_start(row['day'], bucket)]
+        for field in COUNT_FIELDS:
+            counts[field] += row[field]
+        if row['score'] is not None:
+            scores[bucket_start(row['day'], bucket)] = row['score']
+
+    points = []
+    totals = dict.fromkeys(COUNT_FIELDS, 0)
+    for bucket_day, counts in buckets.items():
+        score = scores.get(bucket_day, score)
+        points.append({'date': bucket_day.isoformat(), **_point(counts, score)})
+        for field in COUNT_FIELDS:
+            totals[field] += counts[field]
+    return points, _point(totals, score)
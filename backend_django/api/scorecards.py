@@ -0,0 +1,329 @@
+"""
+Contractor Scorecards
+
+The contractor detail, performance and dashboard endpoints serve a
+materialized ContractorScorecard row per contractor instead of re-reading
+its ratings and complaints on every request:
+
+- Rating and complaint writes add their deltas to the scorecard's counters
+  (rating sum and count, star histogram, complaint, resolved and pending
+  counts) in one UPDATE, then re-derive the average rating, performance
+  score, rank and status from the updated row inside the same transaction.
+  The UPDATE holds the row lock, so concurrent writers never derive from
+  stale counts.
+- The complaint-based rating (calculate_contractor_rating), its deductions
+  and the risk level that follows from it are stored by the
+  recompute_contractor_rating job, which complaint writes queue.
+- Road edits can move complaints between contractors. The request only
+  recounts the affected contractors' complaints and queues a
+  rebuild_contractor_aggregates job each, which rebuilds the scorecard and
+  daily rollups from the source rows outside the request.
+
+`manage.py rebuild_scorecards` recomputes every scorecard in one pass after
+bulk loads or direct database edits.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Contractor, ContractorScorecard, Complaint, Rating, RoadProject
+from .cache import invalidate_contractor
+from .counters import set_current_rating, recount_complaints
+from .jobs import enqueue
+from .rating_batch import compute_all_ratings
+from .rating_engine import calculate_contractor_rating_incremental
+from .rollups import record_rollup_score, rebuild_contractor_rollups
+from .utils import (
+    UNRESOLVED_STATUSES, get_risk_level, calculate_performance_score,
+    get_performance_rank, get_performance_status
+)
+
+
+STAR_COUNT_FIELDS = {
+    1: 'star1_count',
+    2: 'star2_count',
+    3: 'star3_count',
+    4: 'star4_count',
+    5: 'star5_count',
+}
+
+# Columns derived from the counters, rewritten after every counter change
+PERFORMANCE_FIELDS = ['average_rating', 'performance_score', 'performance_rank', 'performance_status']
+
+# Columns derived from the complaint-based rating
+RATING_FIELDS = ['final_rating', 'rating_category', 'risk_level', 'recommendation', 'deductions', 'rated_at']
+
+
+def star_count_field(rating_value):
+    """Histogram column for a rating value; None outside 1-5 stars"""
+    return STAR_COUNT_FIELDS.get(int(rating_value))
+
+
+def complaint_status_fields(status_value):
+    """Resolved/pending counters a complaint with this status is counted in"""
+    if status_value == 'Resolved':
+        return ['resolved_count']
+    if status_value in UNRESOLVED_STATUSES:
+        return ['pending_count']
+    return []
+
+
+def derive_performance(scorecard):
+    """Set the performance columns from the scorecard's counters"""
+    average = scorecard.rating_sum / scorecard.rating_count if scorecard.rating_count else 0
+    scorecard.average_rating = average
+    scorecard.performance_score = calculate_performance_score(average, scorecard.complaint_count)
+    scorecard.performance_rank = get_performance_rank(scorecard.performance_score)
+    scorecard.performance_status = get_performance_status(average, scorecard.complaint_count)
+    return scorecard
+
+
+def rating_fields(result):
+    """Rating columns for a calculate_contractor_rating payload"""
+    risk_level = get_risk_level(result['finalRating'])
+    return {
+        'final_rating': result['finalRating'],
+        'rating_category': result['ratingCategory'],
+        'risk_level': risk_level['level'],
+        'recommendation': risk_level['recommendation'],
+        'deductions': result['deductions'],
+        'rated_at': result['timestamp'],
+    }
+
+
+def apply_rating_result(scorecard, result):
+    """Set the rating columns from a calculate_contractor_rating payload"""
+    for field, value in rating_fields(result).items():
+        setattr(scorecard, field, value)
+    return scorecard
+
+
+def _rating_aggregates():
+    counts = {
+        'rating_sum': Coalesce(Sum('rating_value'), Value(0.0), output_field=FloatField()),
+        'rating_count': Count('id'),
+    }
+    for stars, field in STAR_COUNT_FIELDS.items():
+        counts[field] = Count('id', filter=Q(rating_value__gte=stars, rating_value__lt=stars + 1))
+    return counts
+
+
+def _complaint_aggregates():
+    return {
+        'complaint_count': Count('id'),
+        'resolved_count': Count('id', filter=Q(status='Resolved')),
+        'pending_count': Count('id', filter=Q(status__in=UNRESOLVED_STATUSES)),
+    }
+
+
+def rebuild_scorecard(contractor_id, now=None):
+    """Recompute one contractor's scorecard from its ratings, complaints and projects"""
+    now = now or timezone.now()
+    counts = Rating.objects.filter(contractor_id=contractor_id).aggregate(**_rating_aggregates())
+    counts.update(Complaint.objects.filter(road__contractor_id=contractor_id).aggregate(**_complaint_aggregates()))
+    counts['project_count'] = RoadProject.objects.filter(contractor_id=contractor_id).count()
+
+    scorecard = derive_performance(ContractorScorecard(contractor_id=contractor_id, **counts))
+    apply_rating_result(scorecard, calculate_contractor_rating_incremental(contractor_id, now))
+    defaults = {field.attname: getattr(scorecard, field.attname)
+                for field in ContractorScorecard._meta.concrete_fields if not field.primary_key}
+    scorecard, _ = ContractorScorecard.objects.update_or_create(contractor_id=contractor_id, defaults=defaults)
+    return scorecard
+
+
+def create_scorecard(contractor):
+    """Scorecard for a new contractor, with no ratings, complaints or projects yet"""
+    scorecard = derive_performance(ContractorScorecard(contractor=contractor))
+    scorecard.save(force_insert=True)
+    return scorecard
+
+
+def refresh_after_road_change(*contractor_ids):
+    """
+    Recount the complaints of contractors that gained or lost a road (and its
+    complaints) and queue rebuilds of their scorecards, rollups and ratings;
+    skips None
+    """
+    contractor_ids = sorted({pk for pk in contractor_ids if pk is not None})
+    recount_complaints(*contractor_ids)
+    for contractor_id in contractor_ids:
+        enqueue('rebuild_contractor_aggregates', {'contractor_id': contractor_id},
+                dedupe_key=f'contractor-aggregates:{contractor_id}')
+
+
+def rebuild_scorecards(ratings=None, now=None, batch_size=1000):
+    """
+    Recompute every contractor's scorecard
+
+    One grouped query each over ratings, complaints and projects; the
+    complaint-based ratings come from rating_batch unless already computed.
+
+    Args:
+        ratings: contractor id -> calculate_contractor_rating payload, as
+            returned by rating_batch.recompute_all_ratings
+        now: reference time for warranty and recency rules
+        batch_size: rows per bulk INSERT statement
+
+    Returns:
+        number of scorecards written
+    """
+    now = now or timezone.now()
+    if ratings is None:
+        ratings, _ = compute_all_ratings(now)
+
+    counts = {}
+    rows = Rating.objects.order_by().values('contractor_id').annotate(**_rating_aggregates())
+    for row in rows.iterator(chunk_size=2000):
+        counts.setdefault(row.pop('contractor_id'), {}).update(row)
+    rows = Complaint.objects.filter(road__contractor__isnull=False).order_by() \
+        .values('road__contractor').annotate(**_complaint_aggregates())
+    for row in rows.iterator(chunk_size=2000):
+        counts.setdefault(row.pop('road__contractor'), {}).update(row)
+    rows = RoadProject.objects.filter(contractor__isnull=False).order_by() \
+        .values('contractor_id').annotate(project_count=Count('id'))
+    for row in rows.iterator(chunk_size=2000):
+        counts.setdefault(row.pop('contractor_id'), {}).update(row)
+
+    scorecards = []
+    for contractor_id in Contractor.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=2000):
+        scorecard = derive_performance(ContractorScorecard(contractor_id=contractor_id, **counts.get(contractor_id, {})))
+        if contractor_id in ratings:
+            apply_rating_result(scorecard, ratings[contractor_id])
+        scorecards.append(scorecard)
+
+    with transaction.atomic():
+        ContractorScorecard.objects.all().delete()
+        ContractorScorecard.objects.bulk_create(scorecards, batch_size=batch_size)
+    return len(scorecards)
+
+
+def store_rating_results(ratings, batch_size=1000):
+    """
+    Write recomputed complaint-based ratings into the contractors' scorecards
+
+    Contractors without a scorecard row (they predate scorecards) first get
+    one rebuilt from their ratings, complaints and projects.
+    """
+    existing = set(ContractorScorecard.objects.values_list('contractor_id', flat=True))
+    missing = [contractor_id for contractor_id in ratings if contractor_id not in existing]
+    for contractor_id in Contractor.objects.filter(pk__in=missing).values_list('id', flat=True):
+        rebuild_scorecard(contractor_id)
+        existing.add(contractor_id)
+
+    scorecards = [
+        apply_rating_result(ContractorScorecard(contractor_id=contractor_id), result)
+        for contractor_id, result in ratings.items() if contractor_id in existing
+    ]
+    return ContractorScorecard.objects.bulk_update(scorecards, RATING_FIELDS, batch_size=batch_size)
+
+
+def _apply_deltas(contractor_id, deltas, derive=True):
+    """Add deltas (field -> change) to a scorecard's counters and re-derive its performance"""
+    now = timezone.now()
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    with transaction.atomic(savepoint=False):
+        if not ContractorScorecard.objects.filter(pk=contractor_id).update(updated_at=now, **updates):
+            # No scorecard yet (contractor predates them); the source rows
+            # already include this change
+            rebuild_scorecard(contractor_id, now)
+            return
+        if derive:
+            # The UPDATE above holds the row lock until commit
+            scorecard = derive_performance(ContractorScorecard.objects.get(pk=contractor_id))
+            scorecard.save(update_fields=PERFORMANCE_FIELDS)
+
+
+def record_scorecard_rating(contractor, rating_value):
+    """Count a new rating into the contractor's scorecard"""
+    deltas = {'rating_sum': rating_value, 'rating_count': 1}
+    star_field = star_count_field(rating_value)
+    if star_field:
+        deltas[star_field] = 1
+    _apply_deltas(contractor.pk, deltas)
+
+
+def record_scorecard_complaint(complaint):
+    """Count a new complaint into its road's contractor's scorecard"""
+    contractor_id = complaint.road.contractor_id
+    if contractor_id is None:
+        return
+    deltas = {'complaint_count': 1}
+    for field in complaint_status_fields(complaint.status):
+        deltas[field] = 1
+    _apply_deltas(contractor_id, deltas)
+
+
+def record_scorecard_status_change(complaint, old_status):
+    """Move a complaint between the resolved/pending counts after its status changed"""
+    contractor_id = complaint.road.contractor_id
+    deltas = {}
+    for field in complaint_status_fields(old_status):
+        deltas[field] = deltas.get(field, 0) - 1
+    for field in complaint_status_fields(complaint.status):
+        deltas[field] = deltas.get(field, 0) + 1
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if contractor_id is None or not deltas:
+        return
+    # The performance columns do not depend on resolution
+    _apply_deltas(contractor_id, deltas, derive=False)
+
+
+def record_scorecard_project(contractor):
+    """Count a newly created road project into the contractor's scorecard"""
+    if contractor is None:
+        return
+    _apply_deltas(contractor.pk, {'project_count': 1}, derive=False)
+
+
+def scorecard_for(contractor_id):
+    """
+    A contractor's scorecard with the contractor loaded, built on first use
+
+    Raises:
+        Contractor.DoesNotExist
+    """
+    try:
+        return ContractorScorecard.objects.select_related('contractor').get(pk=contractor_id)
+    except ContractorScorecard.DoesNotExist:
+        Contractor.objects.only('id').get(pk=contractor_id)
+        rebuild_scorecard(contractor_id)
+        return ContractorScorecard.objects.select_related('contractor').get(pk=contractor_id)
+
+
+def stored_rating(contractor_id):
+    """A contractor's complaint-based rating as of its last recompute; None without a scorecard"""
+    return ContractorScorecard.objects.filter(pk=contractor_id).values_list('final_rating', flat=True).first()
+
+
+def enqueue_rating_recompute(contractor):
+    """Queue a recalculation of contractor's stored rating; coalesces while one is queued"""
+    return enqueue('recompute_contractor_rating', {'contractor_id': contractor.pk},
+                   dedupe_key=f'contractor-rating:{contractor.pk}')
+
+
+def recompute_contractor_rating(contractor_id, progress=None):
+    """Job: store the contractor's rating recalculated from its project aggregates"""
+    contractor = Contractor.objects.filter(pk=contractor_id).first()
+    if contractor is None:
+        # Deleted since the job was queued
+        return None
+    result = calculate_contractor_rating_incremental(contractor)
+    set_current_rating(contractor, result['finalRating'])
+    scorecards = ContractorScorecard.objects.filter(pk=contractor.pk)
+    if not scorecards.update(updated_at=timezone.now(), **rating_fields(result)):
+        rebuild_scorecard(contractor.pk)
+    record_rollup_score(contractor.pk, result['finalRating'])
+    invalidate_contractor(contractor)
+    return {'contractorId': contractor.contractor_id, 'rating': result['finalRating']}
+
+
+def rebuild_contractor_aggregates(contractor_id, progress=None):
+    """Job: rebuild a contractor's scorecard and daily rollups after a road change, then its rating"""
+    if not Contractor.objects.filter(pk=contractor_id).exists():
+        # Deleted since the job was queued
+        return None
+    rebuild_scorecard(contractor_id)
+    rebuild_contractor_rollups(contractor_id)
+    return recompute_contractor_rating(contractor_id)
@@ -0,0 +1,150 @@
+"""
+Spatial queries over roads and complaints
+
+Every lookup is turned into a handful of geohash prefix range scans on the
+indexed geohash column (see geohash.py), narrowed by a latitude/longitude
+box in SQL, and only the surviving candidates are measured exactly in
+Python. The number of range scans is bounded by MAX_COVER_CELLS regardless
+of the area asked for. Radius searches sort the candidates by an
+approximate distance in SQL and load only the nearest few, so a wide radius
+over a dense area does not pull every row in its box.
+"""
+
+import math
+import operator
+from functools import reduce
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .geohash import covering_cells, haversine_metres, prefix_range, radius_bbox
+from .models import RoadProject
+
+
+MAX_COVER_CELLS = 32
+
+DEFAULT_RADIUS_METRES = 500
+MAX_RADIUS_METRES = 50000
+
+# Most candidates a radius search loads, and how many per result asked for
+# (the slack covers rows the SQL approximation orders differently)
+MAX_RADIUS_CANDIDATES = 2000
+RADIUS_CANDIDATES_PER_RESULT = 2
+
+# Nearest-road search starts small and doubles until a road turns up
+NEAREST_START_METRES = 250
+NEAREST_MAX_METRES = 20000
+NEAREST_GROWTH = 2
+
+
+def _parse_float(params, name, low, high):
+    value = params.get(name)
+    if value in (None, ''):
+        raise ValueError(f'{name} is required')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number')
+    if not low <= value <= high:
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return value
+
+
+def parse_point(params):
+    """(lat, lng) from request parameters; raises ValueError when invalid"""
+    return _parse_float(params, 'lat', -90, 90), _parse_float(params, 'lng', -180, 180)
+
+
+def parse_bbox(params):
+    """(minLat, minLng, maxLat, maxLng) from request parameters"""
+    bbox = (
+        _parse_float(params, 'minLat', -90, 90),
+        _parse_float(params, 'minLng', -180, 180),
+        _parse_float(params, 'maxLat', -90, 90),
+        _parse_float(params, 'maxLng', -180, 180),
+    )
+    if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError('minLat/minLng must not exceed maxLat/maxLng')
+    return bbox
+
+
+def parse_radius(params, default=DEFAULT_RADIUS_METRES, name='radius'):
+    """Radius in metres, clamped to MAX_RADIUS_METRES"""
+    if params.get(name) in (None, ''):
+        return default
+    return _parse_float(params, name, 1, MAX_RADIUS_METRES)
+
+
+def cells_filter(cells):
+    """Q matching rows whose geohash falls under any of the given cells"""
+    ranges = (Q(geohash__gte=low, geohash__lt=high) for low, high in map(prefix_range, cells))
+    return reduce(operator.or_, ranges)
+
+
+def within_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    """Restrict a RoadProject or Complaint queryset to a bounding box"""
+    cells = covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_COVER_CELLS)
+    return queryset.filter(
+        cells_filter(cells),
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng
+    )
+
+
+def approximate_distance(latitude, longitude):
+    """
+    SQL expression growing with a row's distance from a point
+
+    Squared degrees on a flat projection scaled at the point's latitude;
+    close enough to order rows within MAX_RADIUS_METRES.
+    """
+    scale = math.cos(math.radians(latitude))
+    d_lat = Cast(F('latitude'), FloatField()) - latitude
+    d_lng = (Cast(F('longitude'), FloatField()) - longitude) * scale
+    return d_lat * d_lat + d_lng * d_lng
+
+
+def within_radius(queryset, latitude, longitude, radius_metres, limit=None):
+    """
+    Rows of queryset within radius_metres of a point, nearest first
+
+    At most MAX_RADIUS_CANDIDATES rows of the covering box are loaded,
+    nearest first, so an unlimited search over a very dense area is cut off.
+
+    Returns:
+        list of (distance_metres, instance) tuples
+    """
+    candidates = MAX_RADIUS_CANDIDATES
+    if limit:
+        candidates = min(limit * RADIUS_CANDIDATES_PER_RESULT, MAX_RADIUS_CANDIDATES)
+    rows = (
+        within_bbox(queryset, *radius_bbox(latitude, longitude, radius_metres))
+        .alias(approximate_distance=approximate_distance(latitude, longitude))
+        .order_by('approximate_distance', 'id')[:candidates]
+    )
+    matches = []
+    for row in rows:
+        distance = haversine_metres(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_metres:
+            matches.append((distance, row))
+    matches.sort(key=lambda match: (match[0], match[1].id))
+    return matches[:limit] if limit else matches
+
+
+def nearest_road(latitude, longitude, max_distance=NEAREST_MAX_METRES, queryset=None):
+    """
+    Closest road project to a point, searching outwards
+
+    Returns:
+        (distance_metres, RoadProject) or None when nothing is within max_distance
+    """
+    if queryset is None:
+        queryset = RoadProject.objects.select_related('contractor')
+    radius = min(NEAREST_START_METRES, max_distance)
+    while True:
+        matches = within_radius(queryset, latitude, longitude, radius, limit=1)
+        if matches:
+            return matches[0]
+        if radius >= max_distance:
+            return None
+        radius = min(radius * NEAREST_GROWTH, max_distance)
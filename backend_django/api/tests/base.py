@@ -0,0 +1,73 @@
+"""
+Shared test helpers
+
+Tests drive the API the way clients do, through an admin-authenticated
+APIClient, and run queued jobs inline.
+"""
+
+from rest_framework.test import APIClient
+
+from ..jobs import claim_job, run_job
+from ..models import Admin, Complaint, Contractor, RoadProject
+
+
+# The default file cache would carry entries from one test to the next
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def run_queued_jobs(worker_id='test-worker'):
+    """Run due jobs until none is left (work() would also recycle the test's connection)"""
+    while True:
+        job = claim_job(worker_id)
+        if job is None:
+            return
+        run_job(job, worker_id)
+
+
+class APITestMixin:
+    """Contractors and roads created through the admin API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        admin = Admin.objects.create(
+            username='admin', email='admin@example.com', password='x', full_name='Admin', role='super_admin'
+        )
+        self.client.force_authenticate(user=admin, token={'role': 'super_admin', 'id': admin.pk})
+        self.contractors = [self.create_contractor(f'CON{n}') for n in range(3)]
+        self.roads = [
+            self.create_road('RD0', self.contractors[0], 12.9716, 77.5946),
+            self.create_road('RD1', self.contractors[0], 12.9352, 77.6245),
+            self.create_road('RD2', self.contractors[1], 13.0358, 77.5970),
+        ]
+
+    def create_contractor(self, contractor_id):
+        response = self.client.post('/api/contractors', {
+            'contractorId': contractor_id, 'name': contractor_id, 'email': f'{contractor_id.lower()}@example.com'
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Contractor.objects.get(pk=response.json()['contractor']['id'])
+
+    def create_road(self, road_id, contractor, latitude, longitude):
+        response = self.client.post('/api/admin/roads', {
+            'roadId': road_id, 'roadName': road_id, 'contractorId': contractor.pk,
+            'latitude': latitude, 'longitude': longitude
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return RoadProject.objects.get(road_id=road_id)
+
+    def file_complaint(self, road, severity='Medium', offset=0.0001):
+        response = self.client.post('/api/complaints', {
+            'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Pothole', 'severity': severity,
+            'location': {'latitude': float(road.latitude) + offset, 'longitude': float(road.longitude) + offset}
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Complaint.objects.get(pk=response.json()['complaint']['id'])
+
+    def set_status(self, complaint, new_status):
+        response = self.client.put(f'/api/complaints/{complaint.pk}', {'status': new_status}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def rate(self, contractor, rating_value):
+        response = self.client.post(f'/api/contractors/{contractor.pk}/rate', {'ratingValue': rating_value},
+                                    format='json')
+        self.assertEqual(response.status_code, 201, response.content)
@@ -0,0 +1,187 @@
+"""
+Tests for the incrementally maintained aggregates
+
+Writes update counters and aggregate tables in place and queue rating
+recomputes; each aggregate also has a rebuild_* function that recomputes it
+from the base tables. These tests drive the API, run the queued jobs, and
+check that rebuilding changes nothing.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import geohash
+from ..counters import rebuild_rating_totals
+from ..datagen import sync_contractor_counters
+from ..heatmap import rebuild_heatmap
+from ..jobs import QUEUED
+from ..models import (
+    Complaint, ComplaintGeoCell, Contractor, ContractorDailyRollup, ContractorScorecard, Job,
+    ProjectComplaintStats, RoadProject
+)
+from ..rating_engine import rebuild_project_stats
+from ..rating_refresh import sweep_stale_ratings
+from ..rollups import COUNT_FIELDS, rebuild_rollups
+from ..scorecards import PERFORMANCE_FIELDS, rebuild_scorecards
+from ..utils import calculate_contractor_rating
+from .base import LOCAL_CACHE, APITestMixin, run_queued_jobs
+
+
+STATS_FIELDS = ['complaint_count', 'critical_count', 'high_count', 'medium_count', 'low_count',
+                'unresolved_count', 'recent_count']
+CONTRACTOR_FIELDS = ['rating_sum', 'rating_count', 'total_complaints']
+GEO_CELL_FIELDS = ['complaint_count', 'critical_count', 'high_count', 'medium_count', 'low_count',
+                   'open_count', 'under_review_count', 'resolved_count', 'rejected_count']
+SCORECARD_FIELDS = ['rating_sum', 'rating_count', 'star1_count', 'star2_count', 'star3_count',
+                    'star4_count', 'star5_count', 'complaint_count', 'resolved_count', 'pending_count',
+                    'project_count'] + PERFORMANCE_FIELDS + \
+                   ['final_rating', 'rating_category', 'risk_level', 'recommendation', 'deductions']
+
+
+def rows(queryset, key, fields):
+    return {key(row): tuple(getattr(row, field) for field in fields) for row in queryset}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class IncrementalAggregateTests(APITestMixin, TestCase):
+    """Each write path leaves the aggregates as their rebuild_* functions would"""
+
+    def setUp(self):
+        super().setUp()
+        for road, severities in zip(self.roads, [('Critical', 'High', 'Low'), ('Medium',), ('High', 'High')]):
+            for n, severity in enumerate(severities):
+                self.file_complaint(road, severity, offset=0.0001 * (n + 1))
+        for contractor, values in zip(self.contractors, [(5, 3, 1), (4,), (2, 5)]):
+            for rating_value in values:
+                self.rate(contractor, rating_value)
+
+    def snapshot(self):
+        return {
+            'project stats': rows(ProjectComplaintStats.objects.all(), lambda s: s.project_id, STATS_FIELDS),
+            'contractor counters': rows(Contractor.objects.all(), lambda c: c.pk, CONTRACTOR_FIELDS),
+            'heatmap': rows(ComplaintGeoCell.objects.filter(complaint_count__gt=0),
+                            lambda c: (c.precision, c.cell), GEO_CELL_FIELDS),
+            'scorecards': rows(ContractorScorecard.objects.all(), lambda s: s.contractor_id, SCORECARD_FIELDS),
+            # The rating jobs also write score-only rows for today
+            'rollups': {key: counts for key, counts in rows(
+                ContractorDailyRollup.objects.all(), lambda r: (r.contractor_id, r.day), COUNT_FIELDS
+            ).items() if any(counts)},
+        }
+
+    def assertMatchesRebuild(self):
+        run_queued_jobs()
+        live = self.snapshot()
+        for stats in ProjectComplaintStats.objects.all():
+            rebuild_project_stats(stats.project_id)
+        rebuild_rating_totals()
+        sync_contractor_counters()
+        rebuild_heatmap()
+        rebuild_scorecards()
+        rebuild_rollups()
+        rebuilt = self.snapshot()
+        for name in live:
+            self.assertEqual(live[name], rebuilt[name], f'{name} differ from a rebuild')
+
+        # Stored complaint-based ratings are the full recalculation's
+        for contractor in Contractor.objects.select_related('scorecard'):
+            roads = RoadProject.objects.filter(contractor=contractor)
+            complaints = list(Complaint.objects.filter(road__contractor=contractor))
+            self.assertAlmostEqual(contractor.scorecard.final_rating,
+                                   calculate_contractor_rating(contractor, roads, complaints)['finalRating'])
+
+    def test_create(self):
+        self.assertMatchesRebuild()
+
+    def test_resolve(self):
+        complaints = list(Complaint.objects.order_by('id'))
+        self.set_status(complaints[0], 'Resolved')
+        self.set_status(complaints[1], 'Under Review')
+        self.set_status(complaints[2], 'Rejected')
+        self.set_status(complaints[1], 'Resolved')
+        self.assertMatchesRebuild()
+
+    def test_assign_contractor(self):
+        response = self.client.post(f'/api/admin/roads/{self.roads[0].pk}/assign-contractor',
+                                    {'contractorId': self.contractors[2].pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertMatchesRebuild()
+
+    def test_update_road_contractor(self):
+        response = self.client.put(f'/api/admin/roads/{self.roads[2].pk}',
+                                   {'contractorId': self.contractors[0].pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertMatchesRebuild()
+
+    def test_delete_road(self):
+        self.set_status(Complaint.objects.filter(road=self.roads[0]).first(), 'Resolved')
+        response = self.client.delete(f'/api/admin/roads/{self.roads[0].pk}')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertMatchesRebuild()
+
+    def test_move_road(self):
+        response = self.client.put(f'/api/admin/roads/{self.roads[1].pk}',
+                                   {'latitude': '12.8456', 'longitude': '77.6603'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        road = RoadProject.objects.get(pk=self.roads[1].pk)
+        self.assertEqual(road.geohash, geohash.encode(road.latitude, road.longitude))
+
+
+    def test_recompute_creates_missing_scorecards(self):
+        run_queued_jobs()
+        ContractorScorecard.objects.filter(contractor__in=self.contractors[:2]).delete()
+        call_command('recompute_ratings', stdout=StringIO())
+        self.assertEqual(ContractorScorecard.objects.count(), len(self.contractors))
+        self.assertMatchesRebuild()
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RatingRefreshSweepTests(APITestMixin, TestCase):
+    """The sweep queues exactly the contractors whose rating changed with time"""
+
+    def queued_contractor_ids(self):
+        return {job.payload['contractor_id']
+                for job in Job.objects.filter(name='recompute_contractor_rating', status=QUEUED)}
+
+    def assertRatingsCurrent(self):
+        for contractor in Contractor.objects.all():
+            roads = RoadProject.objects.filter(contractor=contractor)
+            complaints = list(Complaint.objects.filter(road__contractor=contractor))
+            self.assertAlmostEqual(contractor.current_rating,
+                                   calculate_contractor_rating(contractor, roads, complaints)['finalRating'])
+
+    def test_sweep(self):
+        now = timezone.now()
+        first, second = self.contractors[:2]
+        self.file_complaint(self.roads[0])
+        self.file_complaint(self.roads[2])
+        RoadProject.objects.filter(pk=self.roads[2].pk).update(warranty_end_date=now + timedelta(days=10))
+        run_queued_jobs()
+
+        # The first run has nothing to go on and queues everyone
+        self.assertEqual(sweep_stale_ratings(now)['contractors'], len(self.contractors))
+        self.assertEqual(self.queued_contractor_ids(), {c.pk for c in self.contractors})
+        run_queued_jobs()
+
+        ratings = dict(Contractor.objects.values_list('id', 'current_rating'))
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(days=20)):
+            # Only the second contractor's road left its warranty
+            sweep_stale_ratings()
+            self.assertEqual(self.queued_contractor_ids(), {second.pk})
+            run_queued_jobs()
+            self.assertRatingsCurrent()
+        self.assertNotEqual(Contractor.objects.get(pk=second.pk).current_rating, ratings[second.pk])
+
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(days=32)):
+            # Both complaints stopped counting as recent
+            sweep_stale_ratings()
+            self.assertEqual(self.queued_contractor_ids(), {first.pk, second.pk})
+            run_queued_jobs()
+            self.assertRatingsCurrent()
+        self.assertNotEqual(Contractor.objects.get(pk=first.pk).current_rating, ratings[first.pk])
+
+        # Nothing changes when the same window is swept again
+        self.assertEqual(sweep_stale_ratings(now + timedelta(days=32))['contractors'], 0)
@@ -0,0 +1,85 @@
+"""
+Tests for the async read endpoints served under ASGI
+"""
+
+import importlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import clear_url_caches, resolve
+from rest_framework.test import APIClient
+
+from .. import urls, views_async
+from ..models import Complaint
+from .base import LOCAL_CACHE, APITestMixin
+
+READ_URLS = ['/api/contractors', '/api/public/contractor/CON0', '/api/complaints?limit=2',
+             '/api/roads/RD0', '/api/roads']
+
+
+def route_reads(async_views):
+    """Rebuild api.urls as asgi.py (async_views=True) or the WSGI default would"""
+    with override_settings(ASYNC_READ_VIEWS=async_views):
+        importlib.reload(urls)
+    # The project urlconf holds the resolver built from the previous api.urls
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AsyncViewTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        for n, road in enumerate(self.roads):
+            self.file_complaint(road, ['Low', 'High', 'Medium'][n], offset=0.0001 * (n + 1))
+        self.rate(self.contractors[0], 3)
+
+    def serve_async(self):
+        route_reads(True)
+        self.addCleanup(route_reads, False)
+        cache.clear()
+
+    def test_wsgi_routes_to_the_sync_views(self):
+        self.assertIsNot(resolve('/api/roads').func, views_async.road_list)
+        self.serve_async()
+        self.assertIs(resolve('/api/roads').func, views_async.road_list)
+        self.assertIs(resolve('/api/complaints').func, views_async.complaints)
+
+    async def test_responses_match_the_sync_views(self):
+        get = sync_to_async(APIClient().get)
+        expected = {url: (await get(url)).json() for url in READ_URLS}
+        self.serve_async()
+        client = AsyncClient()
+        for url in READ_URLS:
+            response = await client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(response.json(), expected[url], url)
+            # Served from the cache or not, the body is the same
+            self.assertEqual((await client.get(url)).json(), expected[url], url)
+
+        page = (await client.get('/api/complaints?limit=2')).json()
+        rest = (await client.get(f"/api/complaints?limit=2&cursor={page['nextCursor']}")).json()
+        self.assertEqual(len(page['complaints']) + len(rest['complaints']), 3)
+        self.assertIsNone(rest['nextCursor'])
+
+        self.assertEqual((await client.get('/api/roads/NOPE')).status_code, 404)
+        self.assertEqual((await client.get('/api/public/contractor/NOPE')).status_code, 404)
+        self.assertEqual((await client.get('/api/complaints?limit=abc')).status_code, 400)
+
+    async def test_writes_go_to_the_drf_views(self):
+        self.serve_async()
+        client = AsyncClient()
+        response = await client.post('/api/complaints', {
+            'roadId': 'RD1', 'damageType': 'Crack', 'description': 'Crack', 'severity': 'Low'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(await Complaint.objects.acount(), 4)
+        self.assertEqual(len((await client.get('/api/roads/RD1')).json()['road']['complaints']), 2)
+
+        self.assertEqual((await client.put('/api/roads')).status_code, 405)
+        self.assertEqual((await client.delete('/api/complaints')).status_code, 405)
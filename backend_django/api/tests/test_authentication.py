@@ -0,0 +1,86 @@
+"""
+Tests for admin JWT authentication and its verified-token cache
+"""
+
+import time
+from io import StringIO
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..authentication import VerifiedTokenCache, token_cache, verify_token
+from ..models import Admin
+from .base import LOCAL_CACHE
+
+
+def make_token(**claims):
+    return jwt.encode(claims, settings.SIMPLE_JWT['SIGNING_KEY'], algorithm=settings.SIMPLE_JWT['ALGORITHM'])
+
+
+class VerifiedTokenCacheTests(TestCase):
+
+    def test_expires_with_ttl_or_token(self):
+        cache = VerifiedTokenCache(ttl=300)
+        cache.set('a', {'id': 1}, now=1000)
+        cache.set('b', {'id': 2, 'exp': 1100}, now=1000)
+        self.assertEqual(cache.get('a', now=1299), {'id': 1})
+        self.assertIsNone(cache.get('a', now=1300))
+        self.assertEqual(cache.get('b', now=1099), {'id': 2, 'exp': 1100})
+        self.assertIsNone(cache.get('b', now=1100))
+
+    def test_evicts_least_recently_used(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        cache.set('a', {'id': 1})
+        cache.set('b', {'id': 2})
+        cache.get('a')
+        cache.set('c', {'id': 3})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'id': 1})
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AdminAuthenticationTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        Admin.objects.create(username='admin', email='admin@example.com', password='secret',
+                             full_name='Admin', role='super_admin')
+
+    def login(self):
+        response = self.client.post('/api/admin/login', {'username': 'admin', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['token']
+
+    def test_token_is_verified_once(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with mock.patch('api.authentication.jwt.decode', wraps=jwt.decode) as decode:
+            for _ in range(3):
+                response = self.client.get('/api/admin/profile')
+                self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(response.json()['admin']['username'], 'admin')
+
+    def test_bad_tokens_are_anonymous(self):
+        expired = make_token(id=1, role='super_admin', exp=int(time.time()) - 10)
+        forged = jwt.encode({'id': 1, 'role': 'super_admin'}, 'a-signing-key-this-app-never-issued-with',
+                            algorithm='HS256')
+        for token in (expired, forged, 'garbage'):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertIn(self.client.get('/api/admin/profile').status_code, (401, 403), token)
+            # Public endpoints still answer
+            self.assertEqual(self.client.get('/api/contractors').status_code, 200)
+
+    def test_admin_roads_authenticates_without_logging_headers(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with mock.patch('api.authentication.verify_token', wraps=verify_token) as verify, \
+                mock.patch('sys.stdout', new_callable=StringIO) as stdout:
+            response = self.client.get('/api/admin/roads')
+        self.assertEqual(response.status_code, 200, response.content)
+        verify.assert_called_once_with(token)
+        self.assertNotIn(token, stdout.getvalue())
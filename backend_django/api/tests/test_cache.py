@@ -0,0 +1,91 @@
+"""
+Tests for the public read cache and its invalidation
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..cache import ROAD_LIST_KEY, contractor_key, road_key
+from ..models import Complaint
+from .base import LOCAL_CACHE, APITestMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PublicCacheTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_reads_are_served_from_the_cache(self):
+        contractor, road = self.contractors[0], self.roads[0]
+        urls = [f'/api/public/contractor/{contractor.contractor_id}', f'/api/roads/{road.road_id}', '/api/roads']
+        first = [self.get(url) for url in urls]
+        self.assertIsNotNone(cache.get(contractor_key(contractor.contractor_id)))
+        self.assertIsNotNone(cache.get(road_key(road.road_id)))
+        self.assertIsNotNone(cache.get(ROAD_LIST_KEY))
+        with self.assertNumQueries(0):
+            self.assertEqual([self.get(url) for url in urls], first)
+        # Misses are not cached
+        self.assertEqual(self.client.get('/api/public/contractor/NOPE').status_code, 404)
+        self.assertIsNone(cache.get(contractor_key('NOPE')))
+
+    def test_ratings_refresh_contractor_info(self):
+        contractor = self.contractors[0]
+        url = f'/api/public/contractor/{contractor.contractor_id}'
+        self.assertEqual(self.get(url)['currentRating'], 5.0)
+        response = self.client.post(f'{url}/rating', {'ratingValue': 2}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(float(self.get(url)['currentRating']), 2.0)
+        self.rate(contractor, 4)
+        self.assertEqual(float(self.get(url)['currentRating']), 3.0)
+
+    def test_complaints_refresh_road_and_contractor(self):
+        road = self.roads[0]
+        contractor_url = f'/api/public/contractor/{road.contractor.contractor_id}'
+        self.assertEqual(self.get(f'/api/roads/{road.road_id}')['road']['complaints'], [])
+        self.assertEqual(self.get(contractor_url)['totalComplaints'], 0)
+
+        self.file_complaint(road, 'High')
+        complaints = self.get(f'/api/roads/{road.road_id}')['road']['complaints']
+        self.assertEqual([c['severity'] for c in complaints], ['High'])
+        self.assertEqual(self.get(contractor_url)['totalComplaints'], 1)
+
+        self.set_status(Complaint.objects.get(), 'Resolved')
+        complaints = self.get(f'/api/roads/{road.road_id}')['road']['complaints']
+        self.assertEqual([c['status'] for c in complaints], ['Resolved'])
+
+    def test_road_edits_refresh_the_road_list(self):
+        road = self.roads[2]
+        contractors = [road.contractor.contractor_id, self.contractors[2].contractor_id]
+        self.get('/api/roads')
+        self.get(f'/api/roads/{road.road_id}')
+
+        response = self.client.put(f'/api/admin/roads/{road.pk}', {'roadId': 'RD2X', 'roadName': 'Ring road'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        names = {r['roadId']: r['roadName'] for r in self.get('/api/roads')['roads']}
+        self.assertEqual(names['RD2X'], 'Ring road')
+        self.assertNotIn('RD2', names)
+        # The entry under the old roadId is gone rather than left to expire
+        self.assertIsNone(cache.get(road_key('RD2')))
+        self.assertEqual(self.client.get('/api/roads/RD2').status_code, 404)
+
+        # Both the previous and the new contractor are dropped on reassignment
+        for contractor_id in contractors:
+            self.get(f'/api/public/contractor/{contractor_id}')
+        response = self.client.post(f'/api/admin/roads/{road.pk}/assign-contractor',
+                                    {'contractorId': self.contractors[2].pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.get('/api/roads/RD2X')['road']['contractor']['id'], self.contractors[2].pk)
+        for contractor_id in contractors:
+            self.assertIsNone(cache.get(contractor_key(contractor_id)))
+
+        self.assertEqual(self.client.delete(f'/api/admin/roads/{road.pk}').status_code, 200)
+        self.assertNotIn('RD2X', [r['roadId'] for r in self.get('/api/roads')['roads']])
+        self.assertEqual(self.client.get('/api/roads/RD2X').status_code, 404)
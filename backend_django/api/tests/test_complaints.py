@@ -0,0 +1,48 @@
+"""
+Tests for filing complaints
+"""
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ..models import Complaint, ComplaintGeoCell, Contractor, ContractorScorecard, Job, ProjectComplaintStats
+from .base import LOCAL_CACHE, APITestMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CreateComplaintTests(APITestMixin, TestCase):
+
+    def complaint_body(self, road):
+        return {'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Pothole', 'severity': 'High',
+                'location': {'latitude': float(road.latitude), 'longitude': float(road.longitude)}}
+
+    def test_response_carries_rating(self):
+        ContractorScorecard.objects.filter(contractor=self.contractors[0]).update(final_rating=3.5)
+        response = self.client.post('/api/complaints', self.complaint_body(self.roads[0]), format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        self.assertEqual(body['updatedRating'], 3.5)
+        self.assertEqual(Job.objects.get(pk=body['ratingJobId']).name, 'recompute_contractor_rating')
+
+    def test_public_complaint(self):
+        response = self.client.post(f'/api/public/contractor/{self.contractors[1].contractor_id}/complaint',
+                                    {'description': 'Cracks', 'roadId': self.roads[2].road_id}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        complaint = Complaint.objects.get(complaint_id=response.json()['complaintId'])
+        self.assertEqual(complaint.road_id, self.roads[2].pk)
+        self.assertEqual(ProjectComplaintStats.objects.get(project=self.roads[2]).complaint_count, 1)
+        self.assertEqual(Contractor.objects.get(pk=self.contractors[1].pk).total_complaints, 1)
+
+    def test_failure_rolls_back(self):
+        stats_before = list(ProjectComplaintStats.objects.values_list('complaint_count', flat=True))
+        with mock.patch('api.complaints.record_rollup_complaint', side_effect=RuntimeError('boom')):
+            response = self.client.post('/api/complaints', self.complaint_body(self.roads[0]), format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Internal server error'})
+
+        self.assertFalse(Complaint.objects.exists())
+        self.assertFalse(ComplaintGeoCell.objects.filter(complaint_count__gt=0).exists())
+        self.assertEqual(list(ProjectComplaintStats.objects.values_list('complaint_count', flat=True)), stats_before)
+        self.assertEqual(Contractor.objects.get(pk=self.contractors[0].pk).total_complaints, 0)
+        self.assertFalse(Job.objects.filter(name='recompute_contractor_rating').exists())
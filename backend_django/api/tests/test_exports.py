@@ -0,0 +1,60 @@
+"""
+Tests for the streamed dataset exports
+"""
+
+import csv
+import io
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import Complaint, Rating
+from .base import LOCAL_CACHE, APITestMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ExportTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for n, road in enumerate(self.roads * 2):
+            self.file_complaint(road, ['Low', 'High'][n % 2], offset=0.0001 * (n + 1))
+        self.rate(self.contractors[0], 4)
+
+    def export(self, dataset, **params):
+        response = self.client.get(f'/api/export/{dataset}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        # Chunks smaller than the table, so the export spans several reads
+        with mock.patch('api.views_exports.EXPORT_CHUNK_SIZE', 2):
+            response, body = self.export('complaints')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="complaints-\d{8}\.ndjson"')
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        complaints = list(Complaint.objects.select_related('road').order_by('id'))
+        self.assertEqual([row['id'] for row in rows], [c.id for c in complaints])
+        self.assertEqual(rows[0]['roadId'], complaints[0].road.road_id)
+        self.assertEqual(rows[1]['severity'], complaints[1].severity)
+        self.assertEqual(rows[0]['createdAt'][:19], complaints[0].created_at.isoformat()[:19])
+
+    def test_csv(self):
+        response, body = self.export('ratings', **{'as': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        header, *records = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(header, ['id', 'contractorId', 'roadId', 'userId', 'userEmail', 'ratingValue',
+                                  'comment', 'createdAt'])
+        rating = Rating.objects.get()
+        self.assertEqual(records, [[str(rating.id), str(rating.contractor_id), '', rating.user_id,
+                                    rating.user_email or '', str(rating.rating_value), rating.comment or '',
+                                    rating.created_at.isoformat()]])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/export/admins').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/roads', {'as': 'xml'}).status_code, 400)
+        self.assertIn(APIClient().get('/api/export/roads').status_code, (401, 403))
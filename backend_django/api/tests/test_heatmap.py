@@ -0,0 +1,90 @@
+"""
+Tests for the complaint heatmap
+"""
+
+from importlib import import_module
+
+from django.apps import apps
+from django.test import TestCase, override_settings
+
+from .. import geohash
+from ..heatmap import record_heatmap_complaint, rebuild_heatmap
+from ..models import Complaint, ComplaintGeoCell
+from .base import LOCAL_CACHE, APITestMixin
+
+backfill_geo_cells = import_module('api.migrations.0008_complaint_geo_cells').backfill_geo_cells
+
+GEO_CELL_FIELDS = ['complaint_count', 'critical_count', 'high_count', 'medium_count', 'low_count',
+                   'open_count', 'under_review_count', 'resolved_count', 'rejected_count']
+
+
+def cell_rows():
+    return {(c.precision, c.cell): tuple(getattr(c, field) for field in GEO_CELL_FIELDS)
+            for c in ComplaintGeoCell.objects.filter(complaint_count__gt=0)}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class HeatmapTests(APITestMixin, TestCase):
+
+    def test_tile(self):
+        self.file_complaint(self.roads[0], 'Critical')
+        self.file_complaint(self.roads[0], 'Low', offset=0.0002)
+        self.file_complaint(self.roads[2], 'High')
+        tile = geohash.encode(float(self.roads[0].latitude), float(self.roads[0].longitude))[:5]
+
+        response = self.client.get('/api/complaints/heatmap', {'precision': 6, 'tile': tile})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual(body['total'], 2)
+        self.assertTrue(all(cell['cell'].startswith(tile) for cell in body['cells']))
+        severity = {label: sum(cell['severity'][label] for cell in body['cells']) for label in ('Critical', 'Low')}
+        self.assertEqual(severity, {'Critical': 1, 'Low': 1})
+
+        # A bounding box covering both roads sees all three complaints
+        response = self.client.get('/api/complaints/heatmap', {
+            'zoom': 9, 'minLat': 12.9, 'minLng': 77.5, 'maxLat': 13.1, 'maxLng': 77.7
+        })
+        self.assertEqual(response.json()['total'], 3)
+
+    def test_bad_parameters(self):
+        for params in ({'precision': 9, 'tile': 'tdr'}, {'precision': 'x'}, {'precision': 6, 'tile': 'tdr'},
+                       {'precision': 6, 'tile': 'tdr1ai'}, {'precision': 6, 'tile': 'tdr1ua1'}, {'precision': 6}):
+            response = self.client.get('/api/complaints/heatmap', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_choices_are_validated(self):
+        road = self.roads[0]
+        response = self.client.post('/api/complaints', {
+            'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Pothole', 'severity': 'Severe'
+        }, format='json')
+        self.assertEqual(response.status_code, 400, response.content)
+        response = self.client.post(f'/api/public/contractor/{self.contractors[0].contractor_id}/complaint',
+                                    {'description': 'Cracks', 'severity': 'severe'}, format='json')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(Complaint.objects.exists())
+
+        complaint = self.file_complaint(road)
+        response = self.client.put(f'/api/complaints/{complaint.pk}', {'status': 'Closed'}, format='json')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(Complaint.objects.get(pk=complaint.pk).status, 'Open')
+
+    def test_unknown_values_count_alike(self):
+        """Stored values outside the choices land in the same cells on every path"""
+        self.file_complaint(self.roads[0], 'High')
+        for severity, status_value in (('Severe', 'Pending'), ('Low', 'Closed'), ('', 'Resolved')):
+            complaint = Complaint.objects.create(
+                complaint_id=f'C-{severity}-{status_value}', road=self.roads[1], user_id='legacy',
+                damage_type='Pothole', description='Imported', severity=severity, status=status_value,
+                latitude=self.roads[1].latitude, longitude=self.roads[1].longitude
+            )
+            record_heatmap_complaint(complaint)
+        live = cell_rows()
+        cell = live[(7, self.roads[1].geohash[:7])]
+        self.assertEqual(cell, (3, 0, 0, 2, 1, 2, 0, 1, 0))
+
+        rebuild_heatmap()
+        self.assertEqual(cell_rows(), live)
+
+        ComplaintGeoCell.objects.all().delete()
+        backfill_geo_cells(apps, None)
+        self.assertEqual(cell_rows(), live)
@@ -0,0 +1,83 @@
+"""
+Tests for the job queue
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..jobs import (
+    COMPLETED, FAILED, JOB_HANDLERS, QUEUED, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, RUNNING,
+    claim_job, enqueue, retry_delay, run_job
+)
+from ..models import Job
+
+
+def failing_job(progress=None):
+    raise RuntimeError('boom')
+
+
+def reporting_job(progress=None):
+    progress(1, 1)
+    return {'done': True}
+
+
+@mock.patch.dict(JOB_HANDLERS, {'test_fail': 'api.tests.test_jobs.failing_job',
+                               'test_report': 'api.tests.test_jobs.reporting_job'})
+class JobQueueTests(TestCase):
+
+    def test_claim_is_exclusive(self):
+        job = enqueue('test_report')
+        claimed = claim_job('worker-1')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (RUNNING, 'worker-1', 1))
+        self.assertIsNone(claim_job('worker-2'))
+
+        self.assertEqual(run_job(claimed, 'worker-1'), COMPLETED)
+        self.assertIsNone(claim_job('worker-2'))
+        self.assertEqual(Job.objects.get(pk=job.pk).result, {'done': True})
+
+    def test_expired_lease_is_reclaimed(self):
+        job = enqueue('test_report')
+        stale = claim_job('worker-1', lease_seconds=60)
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = claim_job('worker-2')
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ('worker-2', 2))
+
+        # The first worker finds its lease gone and leaves the job alone
+        self.assertIsNone(run_job(stale, 'worker-1'))
+        self.assertEqual(Job.objects.get(pk=job.pk).locked_by, 'worker-2')
+        self.assertEqual(run_job(reclaimed, 'worker-2'), COMPLETED)
+
+    def test_retry_delay(self):
+        for attempts in range(1, 8):
+            delay = retry_delay(attempts).total_seconds()
+            base = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            self.assertGreaterEqual(delay, base)
+            self.assertLessEqual(delay, base * 1.1)
+        delay = retry_delay(30).total_seconds()
+        self.assertGreaterEqual(delay, RETRY_MAX_SECONDS)
+        self.assertLessEqual(delay, RETRY_MAX_SECONDS * 1.1)
+
+    def test_failed_job_backs_off_then_fails(self):
+        job = enqueue('test_fail', max_attempts=2)
+
+        started = timezone.now()
+        with mock.patch('traceback.print_exc'):
+            self.assertEqual(run_job(claim_job('worker-1'), 'worker-1'), QUEUED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.locked_by), (QUEUED, 'boom', None))
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=RETRY_BASE_SECONDS))
+        self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 1.1))
+        # Not due until the backoff has passed
+        self.assertIsNone(claim_job('worker-1'))
+
+        with mock.patch('django.utils.timezone.now', return_value=job.run_at), mock.patch('traceback.print_exc'):
+            self.assertEqual(run_job(claim_job('worker-1'), 'worker-1'), FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (FAILED, 2))
+        self.assertIsNone(claim_job('worker-1'))
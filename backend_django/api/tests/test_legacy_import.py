@@ -0,0 +1,153 @@
+"""
+Tests for the resumable import of the Node.js database
+"""
+
+import base64
+import io
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..legacy_import import import_legacy_database
+from ..models import Admin, Complaint, Contractor, ImportCheckpoint, Photo, Rating, RoadProject
+from ..photo_store import photo_path
+from .base import LOCAL_CACHE
+
+STAMP = '2023-05-01 10:00:00.000 +00:00'
+
+# Sequelize's tables, with a column the Django models dropped (contractors.phone)
+# and without some the models added (ratingSum, ratingCount, geohash, photoId)
+LEGACY_SCHEMA = """
+CREATE TABLE "Admins" (id INTEGER PRIMARY KEY, username, email, password, fullName, role, isActive,
+                       createdAt, updatedAt);
+CREATE TABLE contractors (id INTEGER PRIMARY KEY, contractorId, name, email, password, phone, currentRating,
+                          totalComplaints, totalProjects, qrCode, createdAt, updatedAt);
+CREATE TABLE road_projects (id INTEGER PRIMARY KEY, roadId, roadName, contractorId, latitude, longitude,
+                            constructionDate, completionDate, status, createdAt, updatedAt);
+CREATE TABLE complaints (id INTEGER PRIMARY KEY, complaintId, roadId, userId, damageType, description,
+                         photoUrl, latitude, longitude, status, severity, createdAt, updatedAt);
+CREATE TABLE ratings (id INTEGER PRIMARY KEY, contractorId, roadId, userId, ratingValue, createdAt, updatedAt);
+"""
+
+
+def legacy_photo():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), (90, 90, 90)).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def write_legacy_database(path):
+    source = sqlite3.connect(path)
+    source.executescript(LEGACY_SCHEMA)
+    source.execute('INSERT INTO "Admins" VALUES (1, ?, ?, ?, ?, ?, 1, ?, ?)',
+                   ('root', 'root@example.com', 'hash', 'Root', 'super_admin', STAMP, STAMP))
+    source.executemany('INSERT INTO contractors VALUES (?, ?, ?, ?, ?, ?, 5, 0, 0, ?, ?, ?)', [
+        (1, 'C1', 'Acme', 'acme@example.com', 'hash', '555', 'data:image/png;base64,old', STAMP, STAMP),
+        (2, 'C2', 'Beta', 'beta@example.com', 'hash', None, None, STAMP, STAMP),
+    ])
+    source.executemany('INSERT INTO road_projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+        (1, 'R1', 'Main St', 1, '12.97', '77.59', STAMP, STAMP, 'Completed', STAMP, STAMP),
+        (2, 'R2', 'Lake Rd', 2, '12.93', '77.62', STAMP, STAMP, None, STAMP, STAMP),
+        (3, 'R3', 'Old Rd', 99, None, None, STAMP, STAMP, 'Completed', STAMP, None),
+    ])
+    source.executemany('INSERT INTO complaints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+        (1, 'CMP1', 1, 'u1', 'Pothole', 'Deep', None, '12.97', '77.59', 'Pending', 'High', STAMP, STAMP),
+        (2, 'CMP2', 1, 'u2', 'Crack', 'Long', legacy_photo(), None, None, 'Resolved', 'Low', STAMP, STAMP),
+        (3, 'CMP3', 42, 'u3', 'Pothole', 'Gone road', None, None, None, 'Pending', 'Medium', STAMP, STAMP),
+        (4, 'CMP1', 2, 'u4', 'Pothole', 'Duplicate id', None, None, None, 'Pending', 'Medium', STAMP, STAMP),
+        (5, 'CMP5', 2, None, 'Pothole', 'No user', 'https://example.com/p.jpg', None, None, None, None,
+         STAMP, STAMP),
+    ])
+    source.executemany('INSERT INTO ratings VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (1, 1, 1, 'u1', 4, STAMP, STAMP),
+        (2, 1, 99, 'u2', 2, STAMP, STAMP),
+        (3, 99, None, 'u3', 5, STAMP, STAMP),
+    ])
+    source.commit()
+    source.close()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class LegacyImportTests(TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        override = override_settings(PHOTO_STORE_DIR=self.tmp / 'photos')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.source = self.tmp / 'legacy.db'
+        write_legacy_database(self.source)
+        self.skips = []
+
+    def run_import(self, **options):
+        return import_legacy_database(self.source, on_skip=lambda *skip: self.skips.append(skip[:2]), **options)
+
+    def test_import(self):
+        results = self.run_import(batch_size=2)
+        self.assertEqual({name: (r['copied'], r['skipped']) for name, r in results.items()}, {
+            'Admins': (1, 0), 'contractors': (2, 0), 'road_projects': (3, 0), 'complaints': (3, 2), 'ratings': (2, 1)
+        })
+        # The unknown road is skipped before writing, the duplicate complaintId when its batch fails
+        self.assertEqual(sorted(self.skips), [('complaints', 3), ('complaints', 4), ('ratings', 3)])
+
+        admin = Admin.objects.get()
+        self.assertEqual((admin.full_name, admin.created_at.year), ('Root', 2023))
+        acme = Contractor.objects.get(contractor_id='C1')
+        self.assertIsNone(acme.qr_code)
+        # Derived data is rebuilt from what was copied
+        self.assertEqual((acme.rating_count, acme.total_complaints), (2, 2))
+
+        roads = {road.road_id: road for road in RoadProject.objects.all()}
+        self.assertTrue(roads['R1'].geohash)
+        self.assertEqual(roads['R2'].status, 'Active')
+        self.assertIsNone(roads['R3'].contractor_id)
+        self.assertIsNone(roads['R3'].geohash)
+        self.assertIsNone(Rating.objects.get(pk=2).road_id)
+
+        inline = Complaint.objects.get(complaint_id='CMP2')
+        self.assertIsNone(inline.photo_url)
+        self.assertTrue(photo_path(inline.photo_id).exists())
+        self.assertEqual(Photo.objects.get().width, 40)
+        defaults = Complaint.objects.get(complaint_id='CMP5')
+        self.assertEqual((defaults.user_id, defaults.status, defaults.severity), ('anonymous', 'Open', 'Medium'))
+
+        again = self.run_import()
+        self.assertEqual({r['state'] for r in again.values()}, {'already imported'})
+        self.assertEqual(Complaint.objects.count(), 3)
+
+    def test_resumes_after_an_interruption(self):
+        class Interrupted(Exception):
+            pass
+
+        def stop_in_complaints(table, copied, skipped, elapsed):
+            if table == 'complaints':
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            self.run_import(batch_size=2, progress=stop_in_complaints)
+        checkpoint = ImportCheckpoint.objects.get(source_table='complaints')
+        self.assertEqual((checkpoint.last_id, checkpoint.copied, checkpoint.completed), (2, 2, False))
+        self.assertTrue(ImportCheckpoint.objects.get(source_table='road_projects').completed)
+
+        results = self.run_import(batch_size=2)
+        self.assertEqual(results['road_projects']['state'], 'already imported')
+        self.assertEqual((results['complaints']['resumedFrom'], results['complaints']['copied']), (2, 1))
+        self.assertEqual(sorted(Complaint.objects.values_list('complaint_id', flat=True)), ['CMP1', 'CMP2', 'CMP5'])
+        self.assertEqual(Rating.objects.count(), 2)
+
+        results = self.run_import(restart=True)
+        self.assertEqual(results['complaints']['copied'], 3)
+        self.assertEqual(Complaint.objects.count(), 3)
+
+    def test_missing_tables(self):
+        with sqlite3.connect(self.source) as source:
+            source.execute('DROP TABLE ratings')
+        results = self.run_import()
+        self.assertEqual(results['ratings']['state'], 'missing')
+        self.assertEqual(Rating.objects.count(), 0)
+        self.assertEqual(Complaint.objects.count(), 3)
@@ -0,0 +1,78 @@
+"""
+Tests for the request metrics middleware and the metrics endpoint
+"""
+
+import re
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from ..authentication import token_cache
+from ..metrics import MetricsRegistry
+from .base import LOCAL_CACHE
+
+
+def make_token(role):
+    return jwt.encode({'id': 1, 'username': 'admin', 'role': role}, settings.SIMPLE_JWT['SIGNING_KEY'],
+                      algorithm=settings.SIMPLE_JWT['ALGORITHM'])
+
+
+def sample(text, name, **labels):
+    """Value of the series name{labels...} in Prometheus text, or None"""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+@override_settings(CACHES=LOCAL_CACHE, METRICS_TOKEN='scrape-secret')
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.registry = MetricsRegistry()
+        patcher = mock.patch('api.metrics.registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self, token='scrape-secret'):
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content.decode()
+
+    def test_access(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+        for token in ('wrong', make_token('viewer')):
+            response = self.client.get('/api/metrics', HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, 401, token)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        self.scrape()
+        self.scrape(make_token('admin'))
+        with override_settings(METRICS_TOKEN=''):
+            # An empty token never matches
+            response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, 401)
+
+    def test_records_requests(self):
+        for _ in range(3):
+            self.client.get('/api/contractors')
+        self.client.get('/api/no-such-route')
+        text = self.scrape()
+
+        self.assertEqual(sample(text, 'http_requests_total', view='contractors', method='GET', status='200'), 3)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count', view='contractors', method='GET'), 3)
+        self.assertEqual(sample(text, 'db_queries_per_request_count', view='contractors', method='GET'), 3)
+        self.assertEqual(sample(text, 'http_serialization_duration_seconds_count',
+                                view='contractors', method='GET'), 3)
+        self.assertEqual(sample(text, 'http_requests_total', view='unmatched', method='GET', status='404'), 1)
+        # Bucket counts are cumulative and end at the series count
+        self.assertEqual(sample(text, 'http_response_size_bytes_bucket',
+                                view='contractors', method='GET', le='+Inf'), 3)
+
+    def test_nonstandard_methods_share_a_label(self):
+        for method in ('BREW', 'PROPFIND', 'X-ANYTHING'):
+            self.client.generic(method, '/api/health')
+        text = self.scrape()
+        self.assertEqual(sample(text, 'http_requests_total', view='health_check', method='other', status='405'), 3)
+        self.assertNotIn('BREW', text)
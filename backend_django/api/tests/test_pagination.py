@@ -0,0 +1,81 @@
+"""
+Tests for the keyset-paginated complaints feed and the dashboard summary
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Complaint
+from .base import LOCAL_CACHE, APITestMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ComplaintFeedTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        severities = ['Low', 'Medium', 'High', 'Critical']
+        for n in range(12):
+            self.file_complaint(self.roads[n % 3], severities[n % 4], offset=0.0001 * (n + 1))
+        # Spread over six days, two complaints per day sharing a timestamp
+        start = timezone.now() - timedelta(days=10)
+        for n, pk in enumerate(Complaint.objects.order_by('id').values_list('id', flat=True)):
+            Complaint.objects.filter(pk=pk).update(created_at=start + timedelta(days=n // 2))
+
+    def walk(self, **params):
+        """Complaint ids of every page, following nextCursor"""
+        ids, cursor = [], None
+        while True:
+            response = self.client.get('/api/complaints', {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            self.assertLessEqual(body['count'], int(params.get('limit', 100)))
+            ids.extend(complaint['id'] for complaint in body['complaints'])
+            cursor = body['nextCursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_the_feed_in_order(self):
+        newest_first = list(Complaint.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(limit=5), newest_first)
+        self.assertEqual(self.walk(limit=5, order='asc'), newest_first[::-1])
+        # Page boundaries that fall between two rows of the same timestamp
+        self.assertEqual(self.walk(limit=3), newest_first)
+
+    def test_inserts_do_not_shift_pages(self):
+        first = self.client.get('/api/complaints', {'limit': 4}).json()
+        self.file_complaint(self.roads[0], 'High')
+        second = self.client.get('/api/complaints', {'limit': 4, 'cursor': first['nextCursor']}).json()
+        expected = list(Complaint.objects.order_by('-created_at', '-id').values_list('id', flat=True))[5:9]
+        self.assertEqual([c['id'] for c in second['complaints']], expected)
+
+    def test_filters(self):
+        ids = self.walk(limit=2, severity='High,Critical', roadId=self.roads[0].road_id)
+        expected = Complaint.objects.filter(severity__in=['High', 'Critical'], road=self.roads[0])
+        self.assertEqual(sorted(ids), sorted(expected.values_list('id', flat=True)))
+
+        day = Complaint.objects.order_by('created_at').values_list('created_at', flat=True)[4].date()
+        ids = self.walk(**{'from': day.isoformat(), 'to': day.isoformat()})
+        self.assertEqual(len(ids), 2)
+
+    def test_bad_parameters(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'limit': 'ten'}, {'from': '2024-13-45'}):
+            response = self.client.get('/api/complaints', params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get('/api/complaints', {'limit': 100000})
+        self.assertEqual(response.json()['count'], 12)
+
+    def test_summary(self):
+        complaints = list(Complaint.objects.order_by('id'))
+        self.set_status(complaints[0], 'Resolved')
+        self.set_status(complaints[1], 'Rejected')
+        self.set_status(complaints[2], 'Under Review')
+
+        response = self.client.get('/api/complaints/summary')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {
+            'total': 12, 'unresolved': 10, 'resolved': 1, 'rejected': 1,
+            'severity': {'Critical': 3, 'High': 3, 'Medium': 3, 'Low': 3},
+        })
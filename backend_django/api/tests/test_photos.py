@@ -0,0 +1,132 @@
+"""
+Tests for the content-addressed complaint photo store and its endpoints
+"""
+
+import base64
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import photo_store
+from ..models import Complaint, Photo
+from ..photo_store import (
+    InvalidPhoto, THUMBNAIL_SIZE, photo_path, schedule_thumbnail, store_photo_chunks, thumbnail_path
+)
+from .base import LOCAL_CACHE, APITestMixin
+
+
+def image_bytes(size=(800, 600), image_format='JPEG', color=(200, 40, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PhotoStoreTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        self.photo_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.photo_dir, ignore_errors=True)
+        override = override_settings(PHOTO_STORE_DIR=self.photo_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Spawned thumbnail workers read PHOTO_STORE_DIR from the environment
+        environ = mock.patch.dict(os.environ, {'PHOTO_STORE_DIR': str(self.photo_dir)})
+        environ.start()
+        self.addCleanup(environ.stop)
+        # A pool of this test's own, shut down before the original is restored
+        pool = mock.patch.object(photo_store, '_pool', None)
+        pool.start()
+        self.addCleanup(pool.stop)
+        self.addCleanup(lambda: photo_store._pool and photo_store._pool.shutdown())
+        super().setUp()
+
+    def upload(self, data, name='pothole.jpg'):
+        return self.client.post('/api/complaints/photos', {'photo': SimpleUploadedFile(name, data)},
+                                format='multipart')
+
+    def test_store_is_content_addressed(self):
+        data = image_bytes()
+        stored = store_photo_chunks([data[:1000], data[1000:]])
+        self.assertEqual((stored['contentType'], stored['size'], stored['width'], stored['height']),
+                         ('image/jpeg', len(data), 800, 600))
+        self.assertEqual(photo_path(stored['digest']).read_bytes(), data)
+        self.assertEqual(store_photo_chunks([data])['digest'], stored['digest'])
+        self.assertEqual(len([p for p in self.photo_dir.rglob('*') if p.is_file()]), 1)
+
+        for chunks, limit in (([b'not an image'], None), ([], None), ([data], 100)):
+            with self.assertRaises(InvalidPhoto):
+                store_photo_chunks(chunks, max_bytes=limit)
+        self.assertEqual(list(self.photo_dir.glob('*.upload')), [])
+
+    def test_upload_and_serve(self):
+        data = image_bytes(image_format='PNG')
+        response = self.upload(data, 'pothole.png')
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        digest = body['photoId']
+        self.assertEqual((body['contentType'], body['width'], body['height']), ('image/png', 800, 600))
+        # The same bytes again reuse the stored photo
+        self.assertEqual(self.upload(data, 'again.png').json()['photoId'], digest)
+        self.assertEqual(Photo.objects.count(), 1)
+
+        response = self.client.get(body['photoUrl'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['ETag'], f'"{digest}"')
+        self.assertEqual(b''.join(response.streaming_content), data)
+        self.assertEqual(self.client.get(body['photoUrl'], HTTP_IF_NONE_MATCH=f'"{digest}"').status_code, 304)
+        self.assertEqual(self.client.get(f'/api/photos/{"0" * 64}').status_code, 404)
+
+        self.assertEqual(self.upload(b'GIF89a-truncated').status_code, 400)
+        self.assertEqual(self.client.post('/api/complaints/photos', {}, format='multipart').status_code, 400)
+        with override_settings(PHOTO_MAX_UPLOAD_BYTES=1024):
+            self.assertEqual(self.upload(image_bytes(color=(1, 2, 3))).status_code, 400)
+
+    def test_thumbnails(self):
+        digest = store_photo_chunks([image_bytes(size=(1600, 900))])['digest']
+        # Rendered in the worker pool...
+        schedule_thumbnail(digest).result(timeout=60)
+        with Image.open(thumbnail_path(digest)) as thumbnail:
+            self.assertEqual(thumbnail.format, 'JPEG')
+            self.assertEqual(thumbnail.size, (THUMBNAIL_SIZE[0], 180))
+        self.assertIsNone(schedule_thumbnail(digest))
+
+        # ...or on request when the pool has not got to it
+        thumbnail_path(digest).unlink()
+        response = self.client.get(f'/api/photos/{digest}/thumb')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, thumbnail_path(digest).read_bytes())
+
+    def test_complaints_reference_photos(self):
+        road = self.roads[0]
+        digest = self.upload(image_bytes()).json()['photoId']
+        data_uri = 'data:image/png;base64,' + base64.b64encode(image_bytes(image_format='PNG')).decode()
+        for photo in ({'photoId': digest}, {'photoUrl': data_uri}, {'photoUrl': 'https://example.com/p.jpg'}):
+            response = self.client.post('/api/complaints', {
+                'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Pothole', **photo
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.content)
+
+        uploaded, inline, linked = Complaint.objects.order_by('id')
+        self.assertEqual(uploaded.photo_id, digest)
+        self.assertTrue(photo_path(inline.photo_id).exists())
+        self.assertIsNone(inline.photo_url)
+        self.assertEqual((linked.photo_id, linked.photo_url), (None, 'https://example.com/p.jpg'))
+
+        listed = {c['id']: c for c in self.client.get('/api/complaints').json()['complaints']}
+        self.assertTrue(listed[uploaded.id]['thumbnailUrl'].endswith(f'/api/photos/{digest}/thumb'))
+        self.assertIsNone(listed[linked.id]['thumbnailUrl'])
+
+        response = self.client.post('/api/complaints', {
+            'roadId': road.road_id, 'damageType': 'Pothole', 'description': 'Pothole', 'photoId': 'f' * 64
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
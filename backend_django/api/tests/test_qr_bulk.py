@@ -0,0 +1,52 @@
+"""
+Tests for bulk contractor QR generation
+"""
+
+import os
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ..jobs import COMPLETED
+from ..models import Contractor, Job
+from ..qr_bulk import generate_contractor_qr_codes
+from ..qr_store import qr_digest, read_qr
+from .base import LOCAL_CACHE, APITestMixin, run_queued_jobs
+from .test_qr_store import QRCacheDirMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class QRBulkTests(QRCacheDirMixin, APITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Spawned pool workers read QR_CACHE_DIR from the environment
+        environ = mock.patch.dict(os.environ, {'QR_CACHE_DIR': str(self.qr_dir)})
+        environ.start()
+        self.addCleanup(environ.stop)
+        Contractor.objects.update(qr_code=None)
+
+    def test_generates_every_contractor_in_batches(self):
+        reports = []
+        result = generate_contractor_qr_codes(progress=lambda done, total: reports.append((done, total)),
+                                              workers=2, batch_size=2)
+        self.assertEqual(result, {'generated': 3, 'total': 3})
+        self.assertEqual(reports, [(0, 3), (2, 3), (3, 3)])
+        for contractor in Contractor.objects.all():
+            self.assertEqual(contractor.qr_code, qr_digest(contractor.get_qr_url()))
+            self.assertIsNotNone(read_qr(contractor.qr_code))
+
+    def test_endpoint_queues_one_job(self):
+        first = self.client.post('/api/contractors/generate-all-qr')
+        second = self.client.post('/api/contractors/generate-all-qr')
+        self.assertEqual(first.status_code, 202, first.content)
+        # Repeated clicks share the queued run
+        self.assertEqual(first.json()['taskId'], second.json()['taskId'])
+        self.assertEqual(first.json()['total'], 3)
+
+        run_queued_jobs()
+        job = Job.objects.get(pk=first.json()['taskId'])
+        self.assertEqual((job.status, job.result), (COMPLETED, {'generated': 3, 'total': 3}))
+        status = self.client.get(first.json()['statusUrl']).json()
+        self.assertEqual(status['status'], COMPLETED)
+        self.assertFalse(Contractor.objects.filter(qr_code=None).exists())
@@ -0,0 +1,83 @@
+"""
+Tests for the content-addressed QR image store and its endpoints
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from ..models import Contractor
+from ..qr_store import is_qr_reference, qr_digest, qr_path, read_qr, store_qr
+from .base import LOCAL_CACHE, APITestMixin
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class QRCacheDirMixin:
+    """Point QR_CACHE_DIR at a temporary directory for the test"""
+
+    def setUp(self):
+        self.qr_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.qr_dir, ignore_errors=True)
+        override = override_settings(QR_CACHE_DIR=self.qr_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class QRStoreTests(QRCacheDirMixin, APITestMixin, TestCase):
+
+    def test_store_is_content_addressed(self):
+        digest = store_qr('https://example.com/a')
+        self.assertEqual(digest, qr_digest('https://example.com/a'))
+        self.assertTrue(is_qr_reference(digest))
+        self.assertEqual(qr_path(digest), self.qr_dir / digest[:2] / f'{digest}.png')
+        png = read_qr(digest)
+        self.assertTrue(png.startswith(PNG_SIGNATURE))
+
+        # Same payload, same file, not rewritten
+        mtime = qr_path(digest).stat().st_mtime_ns
+        self.assertEqual(store_qr('https://example.com/a'), digest)
+        self.assertEqual(qr_path(digest).stat().st_mtime_ns, mtime)
+        self.assertNotEqual(store_qr('https://example.com/b'), digest)
+        self.assertEqual(list(self.qr_dir.rglob('*.tmp')), [])
+        self.assertIsNone(read_qr('0' * 64))
+        self.assertFalse(is_qr_reference('data:image/png;base64,AAAA'))
+
+    def test_contractor_qr_endpoints(self):
+        contractor = self.contractors[0]
+        Contractor.objects.filter(pk=contractor.pk).update(qr_code='data:image/png;base64,legacy')
+        response = self.client.get(f'/api/contractors/{contractor.contractor_id}/qr')
+        self.assertEqual(response.status_code, 200, response.content)
+        digest = Contractor.objects.get(pk=contractor.pk).qr_code
+        self.assertTrue(is_qr_reference(digest))
+        self.assertTrue(response.json()['qrCode'].endswith(f'/api/qr/{digest}.png'))
+
+        response = self.client.get(f'/api/qr/{digest}.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{digest}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.content, read_qr(digest))
+        self.assertEqual(self.client.get(f'/api/qr/{digest}.png', HTTP_IF_NONE_MATCH=f'"{digest}"').status_code, 304)
+
+        response = self.client.post(f'/api/contractors/{contractor.contractor_id}/qr/generate')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Contractor.objects.get(pk=contractor.pk).qr_code, digest)
+        self.assertEqual(self.client.get('/api/contractors/NOPE/qr').status_code, 404)
+
+    def test_image_is_rerendered_after_a_wipe(self):
+        contractor = self.contractors[1]
+        digest = store_qr(contractor.get_qr_url())
+        Contractor.objects.filter(pk=contractor.pk).update(qr_code=digest)
+        png = read_qr(digest)
+        shutil.rmtree(self.qr_dir)
+
+        response = self.client.get(f'/api/qr/{digest}.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, png)
+        # Unknown digests are not rendered
+        self.assertEqual(self.client.get(f'/api/qr/{"f" * 64}.png').status_code, 404)
+        self.assertEqual(self.client.get('/api/qr/not-a-digest.png').status_code, 404)
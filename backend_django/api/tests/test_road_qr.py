@@ -0,0 +1,83 @@
+"""
+Tests for road QR codes and printable QR sheets
+"""
+
+import io
+import os
+import re
+import zipfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from ..models import RoadProject
+from ..qr_sheet import SHEET_SIZE
+from ..qr_store import qr_digest, read_qr
+from ..road_qr import road_qr_payload
+from .base import LOCAL_CACHE, APITestMixin
+from .test_qr_store import QRCacheDirMixin
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RoadQRTests(QRCacheDirMixin, APITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        environ = mock.patch.dict(os.environ, {'QR_CACHE_DIR': str(self.qr_dir)})
+        environ.start()
+        self.addCleanup(environ.stop)
+        now = timezone.now()
+        for n in range(10):
+            RoadProject.objects.create(road_id=f'SHEET{n:02d}', road_name=f'Sheet road {n}',
+                                       contractor=self.contractors[2], latitude=13.0, longitude=77.6,
+                                       construction_date=now, completion_date=now)
+
+    def sheet(self, **params):
+        response = self.client.get('/api/roads/qr/sheet', params)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response, b''.join(response.streaming_content)
+
+    def test_road_qr_follows_the_payload(self):
+        road = self.roads[0]
+        response = self.client.get(f'/api/roads/{road.road_id}/qr')
+        self.assertEqual(response.status_code, 200, response.content)
+        road.refresh_from_db()
+        self.assertEqual(road.qr_image, qr_digest(road_qr_payload(road)))
+        self.assertEqual(response.json()['qrData'], road_qr_payload(road))
+
+        # A new payload makes the stored digest stale, so the image is rendered again
+        RoadProject.objects.filter(pk=road.pk).update(qr_code_data='{"roadId": "RD0", "roadName": "Renamed"}')
+        self.client.get(f'/api/roads/{road.road_id}/qr')
+        renamed = RoadProject.objects.get(pk=road.pk)
+        self.assertNotEqual(renamed.qr_image, road.qr_image)
+        self.assertIsNotNone(read_qr(renamed.qr_image))
+        self.assertEqual(self.client.get('/api/roads/NOPE/qr').status_code, 404)
+
+    def test_pdf_sheet(self):
+        response, body = self.sheet()
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(body.startswith(b'%PDF'))
+        # 13 roads at 12 per page; appended pages update the page tree, so the last count wins
+        self.assertEqual(re.findall(rb'/Count (\d+)', body)[-1], b'2')
+        self.assertFalse(RoadProject.objects.filter(qr_image=None).exists())
+
+    def test_png_sheet_in_parallel(self):
+        with mock.patch('api.road_qr.PARALLEL_PAGE_THRESHOLD', 1):
+            response, body = self.sheet(**{'as': 'png', 'contractorId': self.contractors[2].pk})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertEqual(archive.namelist(), ['road-qr-sheet-0001.png'])
+            page = Image.open(io.BytesIO(archive.read('road-qr-sheet-0001.png')))
+        self.assertEqual(page.size, SHEET_SIZE)
+        # Pasted QR codes put black pixels on the white page
+        self.assertEqual(page.getextrema()[0], 0)
+
+    def test_selection_errors(self):
+        self.assertEqual(self.client.get('/api/roads/qr/sheet', {'as': 'svg'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/roads/qr/sheet', {'roadIds': 'NOPE'}).status_code, 404)
+        with mock.patch('api.views_complaints_roads.MAX_SHEET_ROADS', 5):
+            self.assertEqual(self.client.get('/api/roads/qr/sheet').status_code, 400)
+        self.assertIn(APIClient().get('/api/roads/qr/sheet').status_code, (401, 403))
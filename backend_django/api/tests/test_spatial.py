@@ -0,0 +1,92 @@
+"""
+Tests for the geohash-backed spatial queries
+"""
+
+import random
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import spatial
+from ..geohash import covering_cells, haversine_metres
+from ..models import Complaint, RoadProject
+from ..spatial import nearest_road, within_bbox, within_radius
+from .base import LOCAL_CACHE, APITestMixin
+
+CENTRE = (12.9716, 77.5946)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SpatialTests(APITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(7)
+        now = timezone.now()
+        for n in range(60):
+            RoadProject.objects.create(
+                road_id=f'SP{n}', road_name=f'SP{n}', contractor=self.contractors[n % 3],
+                latitude=Decimal(f'{CENTRE[0] + rng.uniform(-0.1, 0.1):.6f}'),
+                longitude=Decimal(f'{CENTRE[1] + rng.uniform(-0.1, 0.1):.6f}'),
+                construction_date=now, completion_date=now
+            )
+
+    def brute_force(self, radius):
+        matches = []
+        for road in RoadProject.objects.all():
+            distance = haversine_metres(*CENTRE, road.latitude, road.longitude)
+            if distance <= radius:
+                matches.append((distance, road.pk))
+        return sorted(matches)
+
+    def test_within_radius_matches_brute_force(self):
+        for radius in (500, 3000, 8000):
+            expected = self.brute_force(radius)
+            found = [(distance, road.pk) for distance, road in
+                     within_radius(RoadProject.objects.all(), *CENTRE, radius)]
+            self.assertEqual([pk for _, pk in found], [pk for _, pk in expected], radius)
+            limited = within_radius(RoadProject.objects.all(), *CENTRE, radius, limit=5)
+            self.assertEqual([road.pk for _, road in limited], [pk for _, pk in expected[:5]])
+
+    def test_candidates_are_capped_nearest_first(self):
+        expected = self.brute_force(8000)
+        with mock.patch.object(spatial, 'MAX_RADIUS_CANDIDATES', 10):
+            found = within_radius(RoadProject.objects.all(), *CENTRE, 8000)
+        self.assertEqual([road.pk for _, road in found], [pk for _, pk in expected[:10]])
+
+    def test_nearest_road(self):
+        distance, road = nearest_road(*CENTRE)
+        self.assertEqual(road.pk, self.brute_force(20000)[0][1])
+        self.assertAlmostEqual(distance, self.brute_force(20000)[0][0])
+        # Nothing within 50m of a point far out of town
+        self.assertIsNone(nearest_road(13.5, 78.2, max_distance=50))
+
+    def test_within_bbox(self):
+        box = (12.95, 77.57, 12.99, 77.62)
+        found = set(within_bbox(RoadProject.objects.all(), *box).values_list('pk', flat=True))
+        expected = {road.pk for road in RoadProject.objects.all()
+                    if box[0] <= road.latitude <= box[2] and box[1] <= road.longitude <= box[3]}
+        self.assertEqual(found, expected)
+        self.assertLessEqual(len(covering_cells(12.0, 77.0, 14.0, 79.0, max_cells=spatial.MAX_COVER_CELLS)),
+                             spatial.MAX_COVER_CELLS)
+
+    def test_endpoints(self):
+        response = self.client.get('/api/roads/nearest', {'lat': CENTRE[0], 'lng': CENTRE[1]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['road']['roadId'],
+                         RoadProject.objects.get(pk=self.brute_force(20000)[0][1]).road_id)
+
+        road = RoadProject.objects.get(pk=self.brute_force(3000)[0][1])
+        self.file_complaint(road)
+        self.file_complaint(RoadProject.objects.get(road_id='RD2'))
+        response = self.client.get('/api/complaints/nearby', {'lat': CENTRE[0], 'lng': CENTRE[1], 'radius': 3000})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([c['complaintId'] for c in response.json()['complaints']],
+                         list(Complaint.objects.filter(road=road).values_list('complaint_id', flat=True)))
+
+        for url, params in (('/api/roads/nearest', {'lat': 95, 'lng': 77}),
+                            ('/api/complaints/nearby', {'lat': 12.9, 'lng': 77.5, 'radius': 10 ** 6}),
+                            ('/api/complaints/bbox', {'minLat': 13, 'minLng': 77, 'maxLat': 12, 'maxLng': 78})):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
@@ -0,0 +1,93 @@
+"""
+Tests for the tuned SQLite backend (smart_road_system/sqlite3)
+"""
+
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase
+
+from smart_road_system.sqlite3.base import DatabaseWrapper
+
+
+@skipUnless(connection.vendor == 'sqlite', 'DATABASE_URL points at another database')
+class SQLiteBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path = self.tmp / 'tuned.sqlite3'
+
+    def open(self, alias='tuned', **options):
+        """
+        Register a connection to a file database, configured like
+        settings.DATABASES apart from the given OPTIONS
+        """
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': str(self.path),
+            'OPTIONS': {**connection.settings_dict['OPTIONS'], **options},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=alias)
+        connections[alias] = wrapper
+        self.addCleanup(connections.__delitem__, alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def other_writer_locked_out(self):
+        """Whether a second connection cannot take the write lock right now"""
+        other = sqlite3.connect(self.path, timeout=0)
+        try:
+            other.execute('BEGIN IMMEDIATE')
+            other.rollback()
+            return False
+        except sqlite3.OperationalError:
+            return True
+        finally:
+            other.close()
+
+    def test_settings_use_the_tuned_backend(self):
+        self.assertIsInstance(connections['default'], DatabaseWrapper)
+        self.assertIn('PRAGMA journal_mode = WAL', connection.settings_dict['OPTIONS']['init_command'])
+        self.assertEqual(connection.settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+    def test_pragmas_run_on_each_connection(self):
+        wrapper = self.open()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertGreater(self.pragma(wrapper, 'busy_timeout'), 0)
+        self.assertLess(self.pragma(wrapper, 'cache_size'), 0)
+
+        wrapper = self.open('custom', init_command='PRAGMA busy_timeout = 1234; ')
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+
+    def test_atomic_takes_the_write_lock_at_begin(self):
+        wrapper = self.open()
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE t (n INTEGER)')
+        with transaction.atomic(using='tuned'):
+            # Nothing written yet, but the transaction already holds the lock
+            self.assertTrue(self.other_writer_locked_out())
+        self.assertFalse(self.other_writer_locked_out())
+
+        deferred = self.open('deferred', transaction_mode=None)
+        with transaction.atomic(using='deferred'):
+            with deferred.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM t')
+            self.assertFalse(self.other_writer_locked_out())
+
+    def test_invalid_transaction_mode(self):
+        wrapper = self.open(transaction_mode='LAZY')
+        with self.assertRaises(ImproperlyConfigured):
+            with transaction.atomic(using='tuned'):
+                pass
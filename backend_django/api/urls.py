@@ -1,11 +1,34 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import views_contractors
 from . import views_complaints_roads
+from . import views_exports
+from . import views_async
+from . import metrics
+
+# The busiest reads run as coroutines under ASGI (settings.ASYNC_READ_VIEWS);
+# those hand POSTs on to the DRF views
+if settings.ASYNC_READ_VIEWS:
+    contractors_view = views_async.contractors
+    contractor_public_info_view = views_async.get_contractor_public_info
+    complaints_view = views_async.complaints
+    road_detail_view = views_async.road_detail
+    road_list_view = views_async.road_list
+else:
+    contractors_view = views.contractors
+    contractor_public_info_view = views_contractors.get_contractor_public_info
+    complaints_view = views_complaints_roads.complaints
+    road_detail_view = views_complaints_roads.road_detail
+    road_list_view = views_complaints_roads.road_list
 
 urlpatterns = [
     # Health check
     path('health', views.health_check, name='health_check'),
+    path('metrics', metrics.metrics, name='metrics'),
+    
+    # Background jobs
+    path('jobs/<uuid:job_id>', views.job_status, name='job_status'),
     
     # Admin endpoints
     path('admin/register', views.admin_register, name='admin_register'),
@@ -17,30 +40,44 @@ urlpatterns = [
     path('admin/contractors', views.admin_get_contractors, name='admin_get_contractors'),
     
     # Contractor endpoints
-    path('contractors', views.contractors, name='contractors'),  # GET, POST
+    path('contractors', contractors_view, name='contractors'),  # GET, POST
     path('contractors/rate', views_contractors.contractor_rate, name='contractor_rate'),
     path('contractors/<int:contractor_id>', views_contractors.contractor_detail, name='contractor_detail'),
     path('contractors/<int:contractor_id>/projects', views_contractors.contractor_projects, name='contractor_projects'),
     path('contractors/<int:contractor_id>/rate', views_contractors.contractor_rate, name='contractor_rate_by_id'),
     path('contractors/<int:contractor_id>/performance', views_contractors.contractor_performance, name='contractor_performance'),
+    path('contractors/<int:contractor_id>/trends', views_contractors.contractor_trends, name='contractor_trends'),
     path('contractors/performance/dashboard', views_contractors.contractor_performance_dashboard, name='contractor_performance_dashboard'),
     
     # QR Code endpoints
     path('contractors/generate-all-qr', views_contractors.generate_all_contractor_qr, name='generate_all_contractor_qr'),
     path('contractors/<str:contractor_id>/qr/generate', views_contractors.generate_contractor_qr, name='generate_contractor_qr'),
     path('contractors/<str:contractor_id>/qr', views_contractors.get_contractor_qr, name='get_contractor_qr'),
+    path('qr/<str:digest>.png', views_contractors.qr_image, name='qr_image'),
     
     # Public feedback endpoints (no auth required)
-    path('public/contractor/<str:contractor_id>', views_contractors.get_contractor_public_info, name='get_contractor_public_info'),
+    path('public/contractor/<str:contractor_id>', contractor_public_info_view, name='get_contractor_public_info'),
     path('public/contractor/<str:contractor_id>/rating', views_contractors.submit_public_rating, name='submit_public_rating'),
     path('public/contractor/<str:contractor_id>/complaint', views_contractors.submit_public_complaint, name='submit_public_complaint'),
     
     # Complaint endpoints
-    path('complaints', views_complaints_roads.complaints, name='complaints'),  # GET, POST
-    path('complaints/<int:road_id>', views_complaints_roads.complaint_by_road, name='complaint_by_road'),
-    path('complaints/<int:complaint_id>', views_complaints_roads.complaint_update, name='complaint_update'),  # PUT
+    path('complaints', complaints_view, name='complaints'),  # GET, POST
+    path('complaints/nearby', views_complaints_roads.complaints_nearby, name='complaints_nearby'),
+    path('complaints/bbox', views_complaints_roads.complaints_in_bbox, name='complaints_in_bbox'),
+    path('complaints/heatmap', views_complaints_roads.complaint_heatmap, name='complaint_heatmap'),
+    path('complaints/summary', views_complaints_roads.complaints_summary, name='complaints_summary'),
+    path('complaints/photos', views_complaints_roads.photo_upload, name='photo_upload'),
+    path('photos/<str:digest>', views_complaints_roads.photo_image, name='photo_image'),
+    path('photos/<str:digest>/thumb', views_complaints_roads.photo_thumbnail, name='photo_thumbnail'),
+    path('complaints/<int:pk>', views_complaints_roads.complaint_detail, name='complaint_detail'),  # GET by road, PUT by complaint
     
     # Road endpoints
-    path('roads/<str:road_id>', views_complaints_roads.road_detail, name='road_detail'),
-    path('roads', views_complaints_roads.road_list, name='road_list'),
+    path('roads/nearest', views_complaints_roads.road_nearest, name='road_nearest'),
+    path('roads/qr/sheet', views_complaints_roads.road_qr_sheet, name='road_qr_sheet'),
+    path('roads/<str:road_id>/qr', views_complaints_roads.road_qr, name='road_qr'),
+    path('roads/<str:road_id>', road_detail_view, name='road_detail'),
+    path('roads', road_list_view, name='road_list'),
+    
+    # Bulk export endpoints (admin only, streamed)
+    path('export/<str:dataset>', views_exports.export_dataset, name='export_dataset'),
 ]
@@ -12,6 +12,104 @@ from datetime import datetime, timedelta
 from django.utils import timezone
 
 
+SEVERITY_SCORES = {
+    'Critical': 1.0,
+    'High': 0.7,
+    'Medium': 0.4,
+    'Low': 0.1
+}
+
+UNRESOLVED_STATUSES = ['Open', 'Under Review']
+
+RECENT_COMPLAINT_DAYS = 30
+
+
+def is_recent_complaint(created_at, now):
+    """Whether a complaint still counts towards the recency penalty"""
+    return (now - created_at).days <= RECENT_COMPLAINT_DAYS
+
+
+def get_project_deductions(project, complaint_count, severity_deduction,
+                           unresolved_count, recent_count, now):
+    """
+    Apply the per-project rating rules to pre-aggregated complaint counts
+    
+    Args:
+        project: RoadProject model instance
+        complaint_count: number of complaints on the project
+        severity_deduction: summed SEVERITY_SCORES of those complaints
+        unresolved_count: complaints still Open or Under Review
+        recent_count: complaints filed within RECENT_COMPLAINT_DAYS
+        now: reference time for the warranty check
+    
+    Returns:
+        list of {'reason', 'deduction'} dicts, empty if there are no complaints
+    """
+    deductions = []
+    if complaint_count == 0:
+        return deductions
+    
+    warranty_end_date = project.warranty_end_date
+    is_under_warranty = now <= warranty_end_date if warranty_end_date else False
+    
+    # Rule 1: Complaint count deduction (during warranty period)
+    if is_under_warranty:
+        complaint_deduction = min(complaint_count * 0.3, 2.0)
+        deductions.append({
+            'reason': f"{complaint_count} complaints during warranty (Road: {project.road_name})",
+            'deduction': complaint_deduction
+        })
+    else:
+        # Post-warranty complaints have lesser impact
+        post_warranty_deduction = min(complaint_count * 0.1, 0.5)
+        deductions.append({
+            'reason': f"{complaint_count} complaints post-warranty (Road: {project.road_name})",
+            'deduction': post_warranty_deduction
+        })
+    
+    # Rule 2: Severity-based deduction
+    deductions.append({
+        'reason': 'Severity impact from complaints',
+        'deduction': severity_deduction
+    })
+    
+    # Rule 3: Resolution rate (unresolved complaints penalty)
+    if unresolved_count > 0:
+        resolution_penalty = min(unresolved_count * 0.2, 1.0)
+        deductions.append({
+            'reason': f"{unresolved_count} unresolved complaints",
+            'deduction': resolution_penalty
+        })
+    
+    # Rule 4: Time since complaint (recent complaints have more impact)
+    if recent_count > 0:
+        recency_penalty = min(recent_count * 0.15, 0.75)
+        deductions.append({
+            'reason': f"Recent complaints (within {RECENT_COMPLAINT_DAYS} days): {recent_count}",
+            'deduction': recency_penalty
+        })
+    
+    return deductions
+
+
+def build_rating_result(deductions, now):
+    """Turn a list of deductions into the rating payload returned to clients"""
+    rating_points = 5.0  # Start with perfect 5 stars
+    for item in deductions:
+        rating_points -= item['deduction']
+    
+    # Ensure rating stays within 0-5 range
+    rating_points = max(0, min(5.0, rating_points))
+    
+    return {
+        'finalRating': round(rating_points, 2),
+        'deductions': deductions,
+        'totalDeduction': 5.0 - rating_points,
+        'ratingCategory': get_rating_category(rating_points),
+        'timestamp': now
+    }
+
+
 def calculate_contractor_rating(contractor, road_projects, all_complaints):
     """
     Calculate contractor rating based on projects and complaints
@@ -25,95 +123,32 @@ def calculate_contractor_rating(contractor, road_projects, all_complaints):
         dict with finalRating, deductions, totalDeduction, ratingCategory, timestamp
     """
     now = timezone.now()
-    rating_points = 5.0  # Start with perfect 5 stars
     deductions = []
     
     # Iterate through all projects of the contractor
     for project in road_projects:
-        warranty_end_date = project.warranty_end_date
-        is_under_warranty = now <= warranty_end_date if warranty_end_date else False
-        
-        days_into_warranty = (now - project.construction_date).days
-        total_warranty_days = project.warranty_period_years * 365
-        warranty_percentage = (days_into_warranty / total_warranty_days) * 100
-        
         # Get complaints for this specific road
         project_complaints = [c for c in all_complaints if c.road_id == project.id]
         
-        if len(project_complaints) > 0:
-            # Rule 1: Complaint count deduction (during warranty period)
-            if is_under_warranty:
-                complaint_deduction = min(len(project_complaints) * 0.3, 2.0)
-                rating_points -= complaint_deduction
-                deductions.append({
-                    'reason': f"{len(project_complaints)} complaints during warranty (Road: {project.road_name})",
-                    'deduction': complaint_deduction
-                })
-            else:
-                # Post-warranty complaints have lesser impact
-                post_warranty_deduction = min(len(project_complaints) * 0.1, 0.5)
-                rating_points -= post_warranty_deduction
-                deductions.append({
-                    'reason': f"{len(project_complaints)} complaints post-warranty (Road: {project.road_name})",
-                    'deduction': post_warranty_deduction
-                })
-            
-            # Rule 2: Severity-based deduction
-            severity_scores = {
-                'Critical': 1.0,
-                'High': 0.7,
-                'Medium': 0.4,
-                'Low': 0.1
-            }
-            
-            severity_deduction = sum(
-                severity_scores.get(complaint.severity, 0.4)
-                for complaint in project_complaints
-            )
-            
-            rating_points -= severity_deduction
-            deductions.append({
-                'reason': 'Severity impact from complaints',
-                'deduction': severity_deduction
-            })
-            
-            # Rule 3: Resolution rate (unresolved complaints penalty)
-            unresolved_complaints = [
-                c for c in project_complaints
-                if c.status in ['Open', 'Under Review']
-            ]
-            if len(unresolved_complaints) > 0:
-                resolution_penalty = min(len(unresolved_complaints) * 0.2, 1.0)
-                rating_points -= resolution_penalty
-                deductions.append({
-                    'reason': f"{len(unresolved_complaints)} unresolved complaints",
-                    'deduction': resolution_penalty
-                })
-            
-            # Rule 4: Time since complaint (recent complaints have more impact)
-            recent_complaints = [
-                c for c in project_complaints
-                if (now - c.created_at).days <= 30
-            ]
-            
-            if len(recent_complaints) > 0:
-                recency_penalty = min(len(recent_complaints) * 0.15, 0.75)
-                rating_points -= recency_penalty
-                deductions.append({
-                    'reason': f"Recent complaints (within 30 days): {len(recent_complaints)}",
-                    'deduction': recency_penalty
-                })
-    
-    # Ensure rating stays within 0-5 range
-    rating_points = max(0, min(5.0, rating_points))
+        severity_deduction = sum(
+            SEVERITY_SCORES.get(complaint.severity, 0.4)
+            for complaint in project_complaints
+        )
+        unresolved_count = len([
+            c for c in project_complaints
+            if c.status in UNRESOLVED_STATUSES
+        ])
+        recent_count = len([
+            c for c in project_complaints
+            if is_recent_complaint(c.created_at, now)
+        ])
+        
+        deductions.extend(get_project_deductions(
+            project, len(project_complaints), severity_deduction,
+            unresolved_count, recent_count, now
+        ))
     
-    return {
-        'finalRating': round(rating_points, 2),
-        'deductions': deductions,
-        'totalDeduction': 5.0 - rating_points,
-        'ratingCategory': get_rating_category(rating_points),
-        'timestamp': now
-    }
+    return build_rating_result(deductions, now)
 
 
 def get_rating_category(rating):
@@ -181,6 +216,16 @@ def get_performance_rank(score):
         return 'Poor'
 
 
+def get_performance_status(avg_rating, total_complaints):
+    """Dashboard group: TOP, AVERAGE or BOTTOM performer"""
+    if total_complaints < 5 and avg_rating >= 4:
+        return 'TOP'
+    elif total_complaints > 15 or avg_rating < 3:
+        return 'BOTTOM'
+    else:
+        return 'AVERAGE'
+
+
 def get_rating_distribution(ratings):
     """Get rating distribution"""
     distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
@@ -1,13 +1,14 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 import jwt
 from django.conf import settings
 
-from .models import Admin, Contractor, RoadProject, Complaint, Rating
+from .models import Admin, Contractor, RoadProject, Complaint, Rating, Job
 from .serializers import (
     AdminSerializer, AdminLoginSerializer, AdminRegisterSerializer,
     ContractorSerializer, ContractorCreateSerializer,
@@ -16,6 +17,11 @@ from .serializers import (
     RatingSerializer, RatingCreateSerializer
 )
 from .permissions import IsAdminUser, IsSuperAdmin
+from .queries import contractors_with_stats
+from .cache import invalidate_road
+from .heatmap import remove_heatmap_complaints
+from .jobs import job_data
+from .scorecards import create_scorecard, record_scorecard_project, refresh_after_road_change
 from .utils import (
     calculate_contractor_rating, get_risk_level,
     calculate_performance_score, get_performance_rank, get_rating_distribution
@@ -215,6 +221,8 @@ def admin_add_road(request):
             road_length=data.get('roadLength'),
             status='Active'
         )
+        record_scorecard_project(contractor)
+        invalidate_road(road, road_list=True)
         
         serializer = RoadProjectSerializer(road)
         return Response({
@@ -251,6 +259,9 @@ def admin_update_road(request, road_id):
     try:
         road = RoadProject.objects.get(id=road_id)
         data = request.data
+        old_contractor_id = road.contractor_id
+        # Drop entries under the current roadId/contractor before they change
+        invalidate_road(road, road_list=True)
         
         # Check if new roadId is already taken
         if data.get('roadId') and data['roadId'] != road.road_id:
@@ -279,6 +290,10 @@ def admin_update_road(request, road_id):
             road.status = data['status']
         
         road.save()
+        invalidate_road(road, road_list=True)
+        if road.contractor_id != old_contractor_id:
+            # The road's complaints move with it
+            refresh_after_road_change(old_contractor_id, road.contractor_id)
         
         serializer = RoadProjectSerializer(road)
         return Response({
@@ -298,7 +313,12 @@ def admin_delete_road(request, road_id):
     """Delete a road (admin only)"""
     try:
         road = RoadProject.objects.get(id=road_id)
-        road.delete()
+        invalidate_road(road, road_list=True)
+        with transaction.atomic():
+            # Its complaints are deleted with it
+            remove_heatmap_complaints(road.complaints.all())
+            road.delete()
+        refresh_after_road_change(road.contractor_id)
         return Response({'message': 'Road deleted successfully'}, status=status.HTTP_200_OK)
     except RoadProject.DoesNotExist:
         return Response({'error': 'Road not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -318,8 +338,13 @@ def admin_assign_contractor(request, road_id):
         road = RoadProject.objects.get(id=road_id)
         contractor = Contractor.objects.get(id=contractor_id)
         
+        invalidate_road(road, road_list=True)
+        old_contractor_id = road.contractor_id
         road.contractor = contractor
         road.save()
+        invalidate_road(road, road_list=True)
+        if road.contractor_id != old_contractor_id:
+            refresh_after_road_change(old_contractor_id, road.contractor_id)
         
         serializer = RoadProjectSerializer(road)
         return Response({
@@ -379,6 +404,7 @@ def contractor_create(request):
             total_complaints=0,
             total_projects=0
         )
+        create_scorecard(contractor)
         
         return Response({
             'message': 'Contractor created successfully',
@@ -405,37 +431,23 @@ def contractor_list(request):
         sort_by = request.GET.get('sortBy', 'rating')
         order = request.GET.get('order', 'desc')
         
-        contractors = Contractor.objects.all()
         enriched_contractors = []
-        
-        for contractor in contractors:
-            ratings = Rating.objects.filter(contractor=contractor)
-            avg_rating = sum(r.rating_value for r in ratings) / len(ratings) if ratings else 0
-            
-            projects = RoadProject.objects.filter(contractor=contractor)
-            project_ids = [p.id for p in projects]
-            complaints = Complaint.objects.filter(road_id__in=project_ids)
-            
+        for contractor in contractors_with_stats(sort_by, order):
+            avg_rating = contractor.avg_rating
             enriched_contractors.append({
                 'id': contractor.id,
                 'contractorId': contractor.contractor_id,
                 'name': contractor.name,
                 'email': contractor.email,
                 'currentRating': round(avg_rating, 2),
-                'totalRatings': len(ratings),
-                'totalComplaints': len(complaints),
-                'totalProjects': len(projects),
+                'totalRatings': contractor.rating_count,
+                'totalComplaints': contractor.complaint_count,
+                'totalProjects': contractor.project_count,
                 'riskLevel': 'High' if avg_rating < 2 else 'Medium' if avg_rating < 3.5 else 'Low',
                 'recommendation': 'Review required' if avg_rating < 2 else 'Conditional approval' if avg_rating < 3.5 else 'Approve for future contracts',
                 'createdAt': contractor.created_at
             })
         
-        # Sort contractors
-        if sort_by == 'rating':
-            enriched_contractors.sort(key=lambda x: x['currentRating'], reverse=(order == 'desc'))
-        elif sort_by == 'complaints':
-            enriched_contractors.sort(key=lambda x: x['totalComplaints'], reverse=(order == 'desc'))
-        
         return Response({
             'count': len(enriched_contractors),
             'contractors': enriched_contractors
@@ -456,18 +468,27 @@ def health_check(request):
     }, status=status.HTTP_200_OK)
 
 
+# ==================== JOB ENDPOINTS ====================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def job_status(request, job_id):
+    """Status, progress and result of a background job"""
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_data(job), status=status.HTTP_200_OK)
+
+
 # Combined view handlers for multiple HTTP methods
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
-@authentication_classes([])  # Disable authentication for this endpoint
 def admin_roads(request):
     """Handle GET and POST requests for admin roads"""
     if request.method == 'GET':
         try:
-            print('Fetching roads...')
-            print(f'Headers: {request.headers}')
             roads = list(RoadProject.objects.all().order_by('-created_at'))
-            print(f'Found {len(roads)} roads')
             
             roads_data = []
             for road in roads:
@@ -575,6 +596,8 @@ def admin_roads(request):
                 road_length=data.get('roadLength'),
                 status='Active'
             )
+            record_scorecard_project(contractor)
+            invalidate_road(road, road_list=True)
             
             road_data = {
                 'id': road.id,
@@ -605,59 +628,38 @@ def admin_roads(request):
 def admin_road_detail(request, road_id):
     """Handle PUT and DELETE for road detail"""
     if request.method == 'PUT':
-        return admin_update_road(request, road_id)
+        return admin_update_road(request._request, road_id)
     elif request.method == 'DELETE':
-        return admin_delete_road(request, road_id)
+        return admin_delete_road(request._request, road_id)
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def contractors(request):
-    """Handle GET and POST for contractors"""
+    """Handle GET and POST for contractors (views_async.contractors serves GET under ASGI)"""
     if request.method == 'GET':
         try:
             sort_by = request.GET.get('sortBy', 'rating')
             order = request.GET.get('order', 'desc')
             
-            contractors_list = list(Contractor.objects.all())
+            # One annotated query; sorting happens in SQL
             enriched_contractors = []
-            
-            for contractor in contractors_list:
-                try:
-                    ratings = list(Rating.objects.filter(contractor=contractor))
-                    avg_rating = sum(r.rating_value for r in ratings) / len(ratings) if len(ratings) > 0 else 0
-                    
-                    projects = list(RoadProject.objects.filter(contractor=contractor))
-                    project_ids = [p.id for p in projects] if projects else []
-                    
-                    # Only query complaints if there are project IDs
-                    if project_ids:
-                        complaints = list(Complaint.objects.filter(road_id__in=project_ids))
-                    else:
-                        complaints = []
-                    
-                    enriched_contractors.append({
-                        'id': contractor.id,
-                        'contractorId': contractor.contractor_id if contractor.contractor_id else '',
-                        'name': contractor.name if contractor.name else '',
-                        'email': contractor.email if contractor.email else '',
-                        'currentRating': round(avg_rating, 2) if avg_rating else 0,
-                        'totalRatings': len(ratings),
-                        'totalComplaints': len(complaints),
-                        'totalProjects': len(projects),
-                        'riskLevel': 'High' if avg_rating < 2 else 'Medium' if avg_rating < 3.5 else 'Low',
-                        'recommendation': 'Review required' if avg_rating < 2 else 'Conditional approval' if avg_rating < 3.5 else 'Approve for future contracts',
-                        'hasQRCode': bool(contractor.qr_code),
-                        'createdAt': contractor.created_at.isoformat() if hasattr(contractor, 'created_at') and contractor.created_at else None
-                    })
-                except Exception as inner_e:
-                    print(f'Error processing contractor {contractor.id}: {inner_e}')
-                    continue
-            
-            if sort_by == 'rating':
-                enriched_contractors.sort(key=lambda x: x['currentRating'], reverse=(order == 'desc'))
-            elif sort_by == 'complaints':
-                enriched_contractors.sort(key=lambda x: x['totalComplaints'], reverse=(order == 'desc'))
+            for contractor in contractors_with_stats(sort_by, order):
+                avg_rating = contractor.avg_rating
+                enriched_contractors.append({
+                    'id': contractor.id,
+                    'contractorId': contractor.contractor_id if contractor.contractor_id else '',
+                    'name': contractor.name if contractor.name else '',
+                    'email': contractor.email if contractor.email else '',
+                    'currentRating': round(avg_rating, 2) if avg_rating else 0,
+                    'totalRatings': contractor.rating_count,
+                    'totalComplaints': contractor.complaint_count,
+                    'totalProjects': contractor.project_count,
+                    'riskLevel': 'High' if avg_rating < 2 else 'Medium' if avg_rating < 3.5 else 'Low',
+                    'recommendation': 'Review required' if avg_rating < 2 else 'Conditional approval' if avg_rating < 3.5 else 'Approve for future contracts',
+                    'hasQRCode': contractor.has_qr_code,
+                    'createdAt': contractor.created_at.isoformat() if contractor.created_at else None
+                })
             
             return Response({
                 'count': len(enriched_contractors),
@@ -665,10 +667,8 @@ def contractors(request):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f'Contractors GET error: {e}')
-            import traceback
-            traceback.print_exc()
-            return Response({'error': f'Internal server error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     elif request.method == 'POST':
         try:
             data = request.data
@@ -691,6 +691,7 @@ def contractors(request):
                 total_complaints=0,
                 total_projects=0
             )
+            create_scorecard(contractor)
             
             return Response({
                 'message': 'Contractor created successfully',
@@ -0,0 +1,267 @@
+"""
+Async read endpoints
+
+The QR-scan landing pages (public contractor info, road detail), the road
+list, the complaints feed and the contractors list carry most of the
+traffic and spend it waiting on the cache and the database. Under ASGI
+(asgi.py, run with gunicorn's uvicorn workers where opted in) urls.py routes
+them to these views, which are awaited on the worker's event loop, so one
+worker keeps many of them in flight instead of one request per process.
+Under the default WSGI server the sync DRF views serve the same URLs with
+the same responses; there every async ORM call here would cost a thread
+hand-off. Database access goes through the async query interface (aget,
+async iteration) and the cache through its a* methods.
+
+DRF 3.14 cannot run async views, so these are plain Django views that render
+JSON the way the API's TimedJSONRenderer does. Writes to the same URLs are
+handed to the existing DRF views.
+"""
+
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import views, views_complaints_roads
+from .models import Contractor, RoadProject, Complaint
+from .queries import contractors_with_stats
+from .pagination import filter_complaints, apaginate_keyset
+from .photos import complaint_photo_urls
+from .cache import aget_or_build, contractor_key, road_key, ROAD_LIST_KEY
+
+
+def _render(request, data, status_code=status.HTTP_200_OK):
+    """JSON response encoded like DRF's JSONRenderer, timed for MetricsMiddleware"""
+    started = time.perf_counter()
+    body = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    request.serialization_time = time.perf_counter() - started
+    return HttpResponse(body.encode(), status=status_code, content_type='application/json')
+
+
+def async_read_view(write_view=None):
+    """
+    Serve GET (and HEAD) with the decorated coroutine
+
+    POST goes to write_view, a sync DRF view, on a worker thread. Django 4.2's
+    require_GET and csrf_exempt would turn the coroutine into a sync view, so
+    this decorator does both jobs itself.
+    """
+    def decorator(read_view):
+        allowed = ['GET', 'HEAD'] + (['POST'] if write_view else [])
+
+        @wraps(read_view)
+        async def view(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                return await read_view(request, *args, **kwargs)
+            if write_view is not None and request.method == 'POST':
+                return await sync_to_async(write_view)(request, *args, **kwargs)
+            return HttpResponseNotAllowed(allowed)
+
+        # Public endpoints; the DRF write views are CSRF exempt as well
+        view.csrf_exempt = True
+        return view
+    return decorator
+
+
+@async_read_view(write_view=views.contractors)
+async def contractors(request):
+    """List contractors with their stats (POST creates one)"""
+    try:
+        sort_by = request.GET.get('sortBy', 'rating')
+        order = request.GET.get('order', 'desc')
+
+        # One annotated query; sorting happens in SQL
+        enriched_contractors = []
+        async for contractor in contractors_with_stats(sort_by, order):
+            avg_rating = contractor.avg_rating
+            enriched_contractors.append({
+                'id': contractor.id,
+                'contractorId': contractor.contractor_id if contractor.contractor_id else '',
+                'name': contractor.name if contractor.name else '',
+                'email': contractor.email if contractor.email else '',
+                'currentRating': round(avg_rating, 2) if avg_rating else 0,
+                'totalRatings': contractor.rating_count,
+                'totalComplaints': contractor.complaint_count,
+                'totalProjects': contractor.project_count,
+                'riskLevel': 'High' if avg_rating < 2 else 'Medium' if avg_rating < 3.5 else 'Low',
+                'recommendation': 'Review required' if avg_rating < 2 else 'Conditional approval' if avg_rating < 3.5 else 'Approve for future contracts',
+                'hasQRCode': contractor.has_qr_code,
+                'createdAt': contractor.created_at.isoformat() if contractor.created_at else None
+            })
+
+        return _render(request, {
+            'count': len(enriched_contractors),
+            'contractors': enriched_contractors
+        })
+
+    except Exception as e:
+        print(f'Contractors GET error: {e}')
+        import traceback
+        traceback.print_exc()
+        return _render(request, {'error': f'Internal server error: {str(e)}'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_read_view()
+async def get_contractor_public_info(request, contractor_id):
+    """Get public contractor information for feedback page"""
+    try:
+        async def build():
+            contractor = await Contractor.objects.aget(contractor_id=contractor_id)
+
+            return {
+                'contractorId': contractor.contractor_id,
+                'name': contractor.name,
+                'currentRating': contractor.current_rating,
+                'totalComplaints': contractor.total_complaints,
+                'totalProjects': contractor.total_projects,
+            }
+
+        # Hit on every QR scan; rating and complaint writes invalidate it
+        return _render(request, await aget_or_build(contractor_key(contractor_id), build))
+
+    except Contractor.DoesNotExist:
+        return _render(request, {'error': 'Contractor not found'}, status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return _render(request, {'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_read_view(write_view=views_complaints_roads.complaints)
+async def complaints(request):
+    """Paginated, filterable complaints feed (POST submits a complaint)"""
+    try:
+        try:
+            queryset = filter_complaints(Complaint.objects.select_related('road'), request.GET)
+            complaints_list, next_cursor = await apaginate_keyset(queryset, request.GET)
+        except ValueError as e:
+            return _render(request, {'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        complaints_data = []
+        for complaint in complaints_list:
+            photo_url, thumbnail_url = complaint_photo_urls(request, complaint)
+            complaints_data.append({
+                'id': complaint.id,
+                'complaintId': complaint.complaint_id,
+                'roadId': complaint.road.road_id if complaint.road else None,
+                'road': {
+                    'roadId': complaint.road.road_id,
+                    'roadName': complaint.road.road_name,
+                    'address': complaint.road.address
+                } if complaint.road else None,
+                'userId': complaint.user_id,
+                'userEmail': complaint.user_email,
+                'userPhone': complaint.user_phone,
+                'damageType': complaint.damage_type,
+                'description': complaint.description,
+                'photoUrl': photo_url,
+                'thumbnailUrl': thumbnail_url,
+                'status': complaint.status,
+                'severity': complaint.severity,
+                'createdAt': complaint.created_at,
+                'updatedAt': complaint.updated_at
+            })
+
+        return _render(request, {
+            'count': len(complaints_data),
+            'complaints': complaints_data,
+            'nextCursor': next_cursor
+        })
+
+    except Exception as e:
+        return _render(request, {'error': 'Internal server error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_read_view()
+async def road_detail(request, road_id):
+    """Get road details by ID (roadId field, not database ID)"""
+    try:
+        async def build():
+            road = await RoadProject.objects.select_related('contractor').aget(road_id=road_id)
+            complaints = [c async for c in Complaint.objects.filter(road=road)]
+
+            return {
+                'road': {
+                    'id': road.id,
+                    'roadId': road.road_id,
+                    'roadName': road.road_name,
+                    'contractorId': road.contractor_id,
+                    'contractorName': road.contractor_name,
+                    'contractor': {
+                        'id': road.contractor.id,
+                        'name': road.contractor.name,
+                        'contractorId': road.contractor.contractor_id
+                    } if road.contractor else None,
+                    'latitude': str(road.latitude) if road.latitude else None,
+                    'longitude': str(road.longitude) if road.longitude else None,
+                    'address': road.address,
+                    'constructionDate': road.construction_date,
+                    'completionDate': road.completion_date,
+                    'warrantyPeriodYears': road.warranty_period_years,
+                    'warrantyEndDate': road.warranty_end_date,
+                    'qrCodeData': road.qr_code_data,
+                    'projectCost': str(road.project_cost) if road.project_cost else None,
+                    'roadLength': str(road.road_length) if road.road_length else None,
+                    'status': road.status,
+                    'complaints': [{
+                        'id': c.id,
+                        'complaintId': c.complaint_id,
+                        'damageType': c.damage_type,
+                        'status': c.status,
+                        'severity': c.severity,
+                        'createdAt': c.created_at
+                    } for c in complaints],
+                    'createdAt': road.created_at,
+                    'updatedAt': road.updated_at
+                }
+            }
+
+        # Cached per roadId; complaint and assignment writes invalidate it
+        return _render(request, await aget_or_build(road_key(road_id), build))
+
+    except RoadProject.DoesNotExist:
+        return _render(request, {'error': 'Road not found'}, status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        print(f"Error: {e}")
+        return _render(request, {'error': 'Internal server error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_read_view()
+async def road_list(request):
+    """Get all roads"""
+    try:
+        async def build():
+            roads = RoadProject.objects.select_related('contractor').order_by('-created_at')
+
+            roads_data = []
+            async for road in roads:
+                roads_data.append({
+                    'id': road.id,
+                    'roadId': road.road_id,
+                    'roadName': road.road_name,
+                    'contractorId': road.contractor_id,
+                    'contractorName': road.contractor_name,
+                    'contractor': {
+                        'id': road.contractor.id,
+                        'name': road.contractor.name,
+                        'contractorId': road.contractor.contractor_id
+                    } if road.contractor else None,
+                    'address': road.address,
+                    'status': road.status,
+                    'constructionDate': road.construction_date,
+                    'completionDate': road.completion_date,
+                    'warrantyEndDate': road.warranty_end_date,
+                    'createdAt': road.created_at
+                })
+
+            return {
+                'count': len(roads_data),
+                'roads': roads_data
+            }
+
+        return _render(request, await aget_or_build(ROAD_LIST_KEY, build))
+
+    except Exception as e:
+        return _render(request, {'error': 'Internal server error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
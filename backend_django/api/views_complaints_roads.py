@@ -2,93 +2,130 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.views.decorators.http import require_GET
 
-from .models import Complaint, RoadProject, Contractor
-from .utils import calculate_contractor_rating
+from .models import Complaint, RoadProject, Contractor, Photo
+from .permissions import IsAdminUser
+from .qr_store import qr_image_url
+from .road_qr import ensure_road_qr_images, road_qr_payload, build_qr_sheet, MAX_SHEET_ROADS
+from .pagination import filter_complaints, paginate_keyset, get_page_size
+from .spatial import (
+    parse_point, parse_bbox, parse_radius, within_bbox, within_radius, nearest_road,
+    NEAREST_MAX_METRES
+)
+from .heatmap import (
+    record_heatmap_status_change, precision_for_zoom,
+    tile_cells, cell_data, HEATMAP_PRECISIONS, DEFAULT_HEATMAP_PRECISION, MAX_TILE_DEPTH
+)
+from .geohash import BASE32, covering_cells
+from .photos import resolve_complaint_photo, complaint_photo_urls, save_uploaded_photo, photo_urls
+from .photo_store import InvalidPhoto, is_photo_reference, photo_path, read_thumbnail
+from .cache import get_or_build, invalidate_road, road_key, ROAD_LIST_KEY
+from .complaints import create_complaint, parse_severity, parse_status, complaint_summary
+from .rating_engine import record_complaint_status_change
+from .scorecards import record_scorecard_status_change, enqueue_rating_recompute, stored_rating
+from .rollups import record_rollup_status_change
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def complaint_create(request):
-    """Submit a new complaint for a road"""
+# Complaints sent with a location but no roadId attach to the closest road within this distance
+COMPLAINT_ROAD_MATCH_METRES = 500
+
+
+def _find_complaint_road(data):
+    """Road a new complaint is filed against, or None if there is no match"""
+    if data.get('roadId'):
+        return RoadProject.objects.select_related('contractor').filter(road_id=data['roadId']).first()
+    
+    location = data.get('location')
+    if not isinstance(location, dict):
+        raise ValueError('location must be an object with latitude and longitude')
+    latitude, longitude = parse_point({'lat': location.get('latitude'), 'lng': location.get('longitude')})
+    match = nearest_road(latitude, longitude, max_distance=COMPLAINT_ROAD_MATCH_METRES)
+    return match[1] if match else None
+
+
+def _submit_complaint(data):
+    """Validate a complaint submission, file it and build the response"""
     try:
-        data = request.data
-        
         # Validate required fields
-        if not data.get('roadId') or not data.get('damageType') or not data.get('description'):
-            return Response({'error': 'Missing required fields: roadId, damageType, description'}, 
+        if not (data.get('roadId') or data.get('location')) or not data.get('damageType') or not data.get('description'):
+            return Response({'error': 'Missing required fields: roadId or location, damageType, description'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Fetch the road project by roadId (string field)
+        # Fetch the road project by roadId (string field), else the road nearest the location
         try:
-            road_project = RoadProject.objects.get(road_id=data['roadId'])
-        except RoadProject.DoesNotExist:
+            severity = parse_severity(data.get('severity'))
+            road_project = _find_complaint_road(data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if road_project is None:
             return Response({'error': 'Road project not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Create complaint
-        complaint_id = f"COMPLAINT-{int(timezone.now().timestamp() * 1000)}"
-        location = data.get('location', {})
+        # Store the photo (uploaded earlier or sent inline) and keep only a reference
+        try:
+            photo, photo_url = resolve_complaint_photo(data)
+        except InvalidPhoto as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        complaint = Complaint.objects.create(
-            complaint_id=complaint_id,
-            road=road_project,
+        location = data.get('location', {})
+        complaint, rating_job = create_complaint(
+            road_project,
             user_id=data.get('userId', 'anonymous'),
             user_email=data.get('userEmail'),
             user_phone=data.get('userPhone'),
             damage_type=data['damageType'],
             description=data['description'],
-            photo_url=data.get('photoUrl'),
+            photo_url=photo_url,
+            photo=photo,
             latitude=location.get('latitude') if location else None,
             longitude=location.get('longitude') if location else None,
-            severity=data.get('severity', 'Medium')
+            severity=severity
         )
         
-        # Update contractor's total complaints and recalculate rating
-        updated_rating = None
-        if road_project.contractor:
-            contractor = road_project.contractor
-            contractor.total_complaints += 1
-            
-            # Recalculate rating
-            contractor_projects = RoadProject.objects.filter(contractor=contractor)
-            project_ids = [p.id for p in contractor_projects]
-            all_complaints = Complaint.objects.filter(road_id__in=project_ids)
-            
-            rating_result = calculate_contractor_rating(contractor, list(contractor_projects), list(all_complaints))
-            contractor.current_rating = rating_result['finalRating']
-            updated_rating = rating_result['finalRating']
-            contractor.save()
-        
         return Response({
             'message': 'Complaint submitted successfully',
             'complaint': {
                 'id': complaint.id,
                 'complaintId': complaint.complaint_id,
-                'roadId': road_project.id,
+                'roadId': road_project.road_id,
                 'damageType': complaint.damage_type,
                 'description': complaint.description,
                 'status': complaint.status,
                 'severity': complaint.severity,
-                'createdAt': complaint.created_at
+                'createdAt': complaint.created_at.isoformat() if complaint.created_at else None
             },
-            'updatedRating': updated_rating
+            # The contractor's stored rating; the rating job folds this complaint in
+            'updatedRating': stored_rating(road_project.contractor_id) if road_project.contractor_id else None,
+            'ratingJobId': rating_job.pk.hex if rating_job else None
         }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
-        print(f"Error: {e}")
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def complaint_create(request):
+    """Submit a new complaint for a road"""
+    return _submit_complaint(request.data)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def complaint_list(request):
-    """Get all complaints"""
+    """Get one page of complaints (see pagination.py for filters and cursors)"""
     try:
-        complaints = Complaint.objects.all().order_by('-created_at')
+        try:
+            queryset = filter_complaints(Complaint.objects.select_related('road'), request.GET)
+            complaints, next_cursor = paginate_keyset(queryset, request.GET)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         complaints_data = []
         for complaint in complaints:
+            photo_url, thumbnail_url = complaint_photo_urls(request, complaint)
             complaints_data.append({
                 'id': complaint.id,
                 'complaintId': complaint.complaint_id,
@@ -103,7 +140,8 @@ def complaint_list(request):
                 'userPhone': complaint.user_phone,
                 'damageType': complaint.damage_type,
                 'description': complaint.description,
-                'photoUrl': complaint.photo_url,
+                'photoUrl': photo_url,
+                'thumbnailUrl': thumbnail_url,
                 'latitude': str(complaint.latitude) if complaint.latitude else None,
                 'longitude': str(complaint.longitude) if complaint.longitude else None,
                 'status': complaint.status,
@@ -116,7 +154,8 @@ def complaint_list(request):
         
         return Response({
             'count': len(complaints_data),
-            'complaints': complaints_data
+            'complaints': complaints_data,
+            'nextCursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -159,9 +198,13 @@ def complaint_update(request, complaint_id):
     try:
         complaint = Complaint.objects.get(id=complaint_id)
         data = request.data
+        old_status = complaint.status
         
         if data.get('status'):
-            complaint.status = data['status']
+            try:
+                complaint.status = parse_status(data['status'])
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
         if data['status'] == 'Resolved':
             complaint.resolved_date = timezone.now()
@@ -169,6 +212,14 @@ def complaint_update(request, complaint_id):
             complaint.resolution_description = resolution.get('description')
         
         complaint.save()
+        record_complaint_status_change(complaint, old_status)
+        record_heatmap_status_change(complaint, old_status)
+        record_scorecard_status_change(complaint, old_status)
+        record_rollup_status_change(complaint, old_status)
+        if complaint.status != old_status and complaint.road.contractor:
+            # Resolution changes the unresolved-complaints deduction
+            enqueue_rating_recompute(complaint.road.contractor)
+        invalidate_road(complaint.road)
         
         return Response({
             'message': 'Complaint updated successfully',
@@ -187,6 +238,16 @@ def complaint_update(request, complaint_id):
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET', 'PUT'])
+@permission_classes([AllowAny])
+def complaint_detail(request, pk):
+    """Handle GET (complaints for a road) and PUT (update a complaint) on complaints/<id>"""
+    if request.method == 'GET':
+        return complaint_by_road(request._request, pk)
+    elif request.method == 'PUT':
+        return complaint_update(request._request, pk)
+
+
 # ==================== ROAD ENDPOINTS ====================
 
 @api_view(['GET'])
@@ -194,44 +255,48 @@ def complaint_update(request, complaint_id):
 def road_detail(request, road_id):
     """Get road details by ID (roadId field, not database ID)"""
     try:
-        road = RoadProject.objects.get(road_id=road_id)
-        complaints = Complaint.objects.filter(road=road)
+        def build():
+            road = RoadProject.objects.select_related('contractor').get(road_id=road_id)
+            complaints = Complaint.objects.filter(road=road)
         
-        return Response({
-            'road': {
-                'id': road.id,
-                'roadId': road.road_id,
-                'roadName': road.road_name,
-                'contractorId': road.contractor_id,
-                'contractorName': road.contractor_name,
-                'contractor': {
-                    'id': road.contractor.id,
-                    'name': road.contractor.name,
-                    'contractorId': road.contractor.contractor_id
-                } if road.contractor else None,
-                'latitude': str(road.latitude) if road.latitude else None,
-                'longitude': str(road.longitude) if road.longitude else None,
-                'address': road.address,
-                'constructionDate': road.construction_date,
-                'completionDate': road.completion_date,
-                'warrantyPeriodYears': road.warranty_period_years,
-                'warrantyEndDate': road.warranty_end_date,
-                'qrCodeData': road.qr_code_data,
-                'projectCost': str(road.project_cost) if road.project_cost else None,
-                'roadLength': str(road.road_length) if road.road_length else None,
-                'status': road.status,
-                'complaints': [{
-                    'id': c.id,
-                    'complaintId': c.complaint_id,
-                    'damageType': c.damage_type,
-                    'status': c.status,
-                    'severity': c.severity,
-                    'createdAt': c.created_at
-                } for c in complaints],
-                'createdAt': road.created_at,
-                'updatedAt': road.updated_at
+            return {
+                'road': {
+                    'id': road.id,
+                    'roadId': road.road_id,
+                    'roadName': road.road_name,
+                    'contractorId': road.contractor_id,
+                    'contractorName': road.contractor_name,
+                    'contractor': {
+                        'id': road.contractor.id,
+                        'name': road.contractor.name,
+                        'contractorId': road.contractor.contractor_id
+                    } if road.contractor else None,
+                    'latitude': str(road.latitude) if road.latitude else None,
+                    'longitude': str(road.longitude) if road.longitude else None,
+                    'address': road.address,
+                    'constructionDate': road.construction_date,
+                    'completionDate': road.completion_date,
+                    'warrantyPeriodYears': road.warranty_period_years,
+                    'warrantyEndDate': road.warranty_end_date,
+                    'qrCodeData': road.qr_code_data,
+                    'projectCost': str(road.project_cost) if road.project_cost else None,
+                    'roadLength': str(road.road_length) if road.road_length else None,
+                    'status': road.status,
+                    'complaints': [{
+                        'id': c.id,
+                        'complaintId': c.complaint_id,
+                        'damageType': c.damage_type,
+                        'status': c.status,
+                        'severity': c.severity,
+                        'createdAt': c.created_at
+                    } for c in complaints],
+                    'createdAt': road.created_at,
+                    'updatedAt': road.updated_at
+                }
             }
-        }, status=status.HTTP_200_OK)
+        
+        # Cached per roadId; complaint and assignment writes invalidate it
+        return Response(get_or_build(road_key(road_id), build), status=status.HTTP_200_OK)
         
     except RoadProject.DoesNotExist:
         return Response({'error': 'Road not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -245,49 +310,123 @@ def road_detail(request, road_id):
 def road_list(request):
     """Get all roads"""
     try:
-        roads = RoadProject.objects.all().order_by('-created_at')
+        def build():
+            roads = RoadProject.objects.select_related('contractor').order_by('-created_at')
         
-        roads_data = []
-        for road in roads:
-            roads_data.append({
-                'id': road.id,
-                'roadId': road.road_id,
-                'roadName': road.road_name,
-                'contractorId': road.contractor_id,
-                'contractorName': road.contractor_name,
-                'contractor': {
-                    'id': road.contractor.id,
-                    'name': road.contractor.name,
-                    'contractorId': road.contractor.contractor_id
-                } if road.contractor else None,
-                'address': road.address,
-                'status': road.status,
-                'constructionDate': road.construction_date,
-                'completionDate': road.completion_date,
-                'warrantyEndDate': road.warranty_end_date,
-                'createdAt': road.created_at
-            })
+            roads_data = []
+            for road in roads:
+                roads_data.append({
+                    'id': road.id,
+                    'roadId': road.road_id,
+                    'roadName': road.road_name,
+                    'contractorId': road.contractor_id,
+                    'contractorName': road.contractor_name,
+                    'contractor': {
+                        'id': road.contractor.id,
+                        'name': road.contractor.name,
+                        'contractorId': road.contractor.contractor_id
+                    } if road.contractor else None,
+                    'address': road.address,
+                    'status': road.status,
+                    'constructionDate': road.construction_date,
+                    'completionDate': road.completion_date,
+                    'warrantyEndDate': road.warranty_end_date,
+                    'createdAt': road.created_at
+                })
+        
+            return {
+                'count': len(roads_data),
+                'roads': roads_data
+            }
+        
+        return Response(get_or_build(ROAD_LIST_KEY, build), status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def road_qr(request, road_id):
+    """Get the QR code image for a road (rendered and cached on first use)"""
+    try:
+        road = RoadProject.objects.get(road_id=road_id)
+        ensure_road_qr_images([road])
         
         return Response({
-            'count': len(roads_data),
-            'roads': roads_data
+            'roadId': road.road_id,
+            'roadName': road.road_name,
+            'qrCode': qr_image_url(request, road.qr_image),
+            'qrData': road_qr_payload(road)
         }, status=status.HTTP_200_OK)
         
+    except RoadProject.DoesNotExist:
+        return Response({'error': 'Road not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def road_qr_sheet(request):
+    """
+    Download printable QR sheets for many roads
+    
+    Query params: roadIds (comma separated), contractorId, status to select
+    roads (all roads when none given) and as=pdf|png, where png returns a ZIP
+    with one PNG per page.
+    """
+    try:
+        output_format = request.GET.get('as', 'pdf')
+        if output_format not in ('pdf', 'png'):
+            return Response({'error': 'Format must be pdf or png'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        roads = RoadProject.objects.only(
+            'id', 'road_id', 'road_name', 'qr_code_data', 'qr_image'
+        ).order_by('road_id')
+        if request.GET.get('roadIds'):
+            roads = roads.filter(road_id__in=[r.strip() for r in request.GET['roadIds'].split(',') if r.strip()])
+        if request.GET.get('contractorId'):
+            roads = roads.filter(contractor_id=request.GET['contractorId'])
+        if request.GET.get('status'):
+            roads = roads.filter(status=request.GET['status'])
+        
+        roads = list(roads[:MAX_SHEET_ROADS + 1])
+        if not roads:
+            return Response({'error': 'No roads match the selection'}, status=status.HTTP_404_NOT_FOUND)
+        if len(roads) > MAX_SHEET_ROADS:
+            return Response({'error': f'At most {MAX_SHEET_ROADS} roads per sheet request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        sheet = build_qr_sheet(roads, output_format)
+        filename = f"road-qr-sheets-{timezone.now().strftime('%Y%m%d')}.{'pdf' if output_format == 'pdf' else 'zip'}"
+        return FileResponse(
+            sheet,
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf' if output_format == 'pdf' else 'application/zip'
+        )
+        
     except Exception as e:
+        print(f"Error building QR sheet: {e}")
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-# Combined view handlers
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def complaints(request):
-    """Handle GET and POST for complaints"""
+    """Handle GET (paginated, filterable feed; views_async.complaints under ASGI) and POST for complaints"""
     if request.method == 'GET':
         try:
-            complaints_list = Complaint.objects.all().order_by('-created_at')
+            try:
+                queryset = filter_complaints(Complaint.objects.select_related('road'), request.GET)
+                complaints_list, next_cursor = paginate_keyset(queryset, request.GET)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             complaints_data = []
             for complaint in complaints_list:
+                photo_url, thumbnail_url = complaint_photo_urls(request, complaint)
                 complaints_data.append({
                     'id': complaint.id,
                     'complaintId': complaint.complaint_id,
@@ -302,7 +441,8 @@ def complaints(request):
                     'userPhone': complaint.user_phone,
                     'damageType': complaint.damage_type,
                     'description': complaint.description,
-                    'photoUrl': complaint.photo_url,
+                    'photoUrl': photo_url,
+                    'thumbnailUrl': thumbnail_url,
                     'status': complaint.status,
                     'severity': complaint.severity,
                     'createdAt': complaint.created_at,
@@ -311,80 +451,242 @@ def complaints(request):
             
             return Response({
                 'count': len(complaints_data),
-                'complaints': complaints_data
+                'complaints': complaints_data,
+                'nextCursor': next_cursor
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
             return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     elif request.method == 'POST':
-        # Handle POST - Submit a new complaint for a road
+        return _submit_complaint(request.data)
+
+
+
+# ==================== SPATIAL QUERIES ====================
+
+def _complaint_point_data(complaint, distance=None):
+    data = {
+        'id': complaint.id,
+        'complaintId': complaint.complaint_id,
+        'roadId': complaint.road.road_id,
+        'damageType': complaint.damage_type,
+        'status': complaint.status,
+        'severity': complaint.severity,
+        'latitude': str(complaint.latitude),
+        'longitude': str(complaint.longitude),
+        'createdAt': complaint.created_at
+    }
+    if distance is not None:
+        data['distanceMeters'] = round(distance, 1)
+    return data
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def road_nearest(request):
+    """Get the road closest to a point (?lat=&lng=&maxDistance= metres)"""
+    try:
         try:
-            data = request.data
-            
-            # Validate required fields
-            if not data.get('roadId') or not data.get('damageType') or not data.get('description'):
-                return Response({'error': 'Missing required fields: roadId, damageType, description'}, 
+            latitude, longitude = parse_point(request.GET)
+            max_distance = parse_radius(request.GET, default=NEAREST_MAX_METRES, name='maxDistance')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        match = nearest_road(latitude, longitude, max_distance=max_distance)
+        if match is None:
+            return Response({'error': 'No road found near this location'}, status=status.HTTP_404_NOT_FOUND)
+        
+        distance, road = match
+        return Response({
+            'road': {
+                'id': road.id,
+                'roadId': road.road_id,
+                'roadName': road.road_name,
+                'contractorId': road.contractor_id,
+                'contractorName': road.contractor.name if road.contractor else road.contractor_name,
+                'latitude': str(road.latitude),
+                'longitude': str(road.longitude),
+                'address': road.address,
+                'status': road.status
+            },
+            'distanceMeters': round(distance, 1)
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def complaints_nearby(request):
+    """Get complaints within ?radius= metres of ?lat=&lng=, nearest first"""
+    try:
+        try:
+            latitude, longitude = parse_point(request.GET)
+            radius = parse_radius(request.GET)
+            limit = get_page_size(request.GET)
+            queryset = filter_complaints(Complaint.objects.select_related('road'), request.GET)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        matches = within_radius(queryset, latitude, longitude, radius, limit=limit)
+        return Response({
+            'count': len(matches),
+            'radiusMeters': radius,
+            'complaints': [_complaint_point_data(complaint, distance) for distance, complaint in matches]
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def complaints_in_bbox(request):
+    """Get complaints inside ?minLat=&minLng=&maxLat=&maxLng=, newest first"""
+    try:
+        try:
+            bbox = parse_bbox(request.GET)
+            limit = get_page_size(request.GET)
+            queryset = filter_complaints(Complaint.objects.select_related('road'), request.GET)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        complaints_list = list(within_bbox(queryset, *bbox).order_by('-created_at', '-id')[:limit])
+        return Response({
+            'count': len(complaints_list),
+            'complaints': [_complaint_point_data(complaint) for complaint in complaints_list]
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def complaint_heatmap(request):
+    """
+    Get pre-aggregated complaint counts per geohash cell for a map tile
+    
+    Choose the grid with ?precision= (3-7) or ?zoom= (map zoom level) and the
+    area with ?tile=<geohash prefix> or ?minLat=&minLng=&maxLat=&maxLng=.
+    """
+    try:
+        params = request.GET
+        try:
+            if params.get('precision'):
+                precision = int(params['precision'])
+            elif params.get('zoom'):
+                precision = precision_for_zoom(int(params['zoom']))
+            else:
+                precision = DEFAULT_HEATMAP_PRECISION
+        except ValueError:
+            return Response({'error': 'precision and zoom must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if precision not in HEATMAP_PRECISIONS:
+            return Response({'error': f'precision must be one of {list(HEATMAP_PRECISIONS)}'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        tile = params.get('tile', '').lower()
+        if tile:
+            if not precision - MAX_TILE_DEPTH <= len(tile) <= precision or any(char not in BASE32 for char in tile):
+                return Response({'error': f'tile must be a geohash of {precision - MAX_TILE_DEPTH} to {precision} characters'},
                               status=status.HTTP_400_BAD_REQUEST)
-            
-            # Fetch the road project by roadId (string field)
+            prefixes = [tile]
+        else:
             try:
-                road_project = RoadProject.objects.get(road_id=data['roadId'])
-            except RoadProject.DoesNotExist:
-                return Response({'error': 'Road project not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # Create complaint
-            complaint_id = f"COMPLAINT-{int(timezone.now().timestamp() * 1000)}"
-            location = data.get('location', {})
-            
-            complaint = Complaint.objects.create(
-                complaint_id=complaint_id,
-                road=road_project,
-                user_id=data.get('userId', 'anonymous'),
-                user_email=data.get('userEmail'),
-                user_phone=data.get('userPhone'),
-                damage_type=data['damageType'],
-                description=data['description'],
-                photo_url=data.get('photoUrl'),
-                latitude=location.get('latitude') if location else None,
-                longitude=location.get('longitude') if location else None,
-                severity=data.get('severity', 'Medium')
-            )
-            
-            # Update contractor's total complaints and recalculate rating
-            updated_rating = None
-            if road_project.contractor:
-                contractor = road_project.contractor
-                contractor.total_complaints += 1
-                
-                # Recalculate rating
-                contractor_projects = list(RoadProject.objects.filter(contractor=contractor))
-                project_ids = [p.id for p in contractor_projects]
-                all_complaints = list(Complaint.objects.filter(road_id__in=project_ids))
-                
-                rating_result = calculate_contractor_rating(contractor, contractor_projects, all_complaints)
-                contractor.current_rating = rating_result['finalRating']
-                updated_rating = rating_result['finalRating']
-                contractor.save()
-            
-            return Response({
-                'message': 'Complaint submitted successfully',
-                'complaint': {
-                    'id': complaint.id,
-                    'complaintId': complaint.complaint_id,
-                    'roadId': road_project.road_id,
-                    'damageType': complaint.damage_type,
-                    'description': complaint.description,
-                    'status': complaint.status,
-                    'severity': complaint.severity,
-                    'createdAt': complaint.created_at.isoformat() if complaint.created_at else None
-                },
-                'updatedRating': updated_rating
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            print(f"Error creating complaint: {e}")
-            import traceback
-            traceback.print_exc()
-            return Response({'error': f'Internal server error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                bbox = parse_bbox(params)
+            except ValueError as e:
+                return Response({'error': f'{e} (or pass tile)'}, status=status.HTTP_400_BAD_REQUEST)
+            prefixes = sorted({cell[:precision] for cell in covering_cells(*bbox)})
+        
+        cells = [cell_data(geo_cell) for geo_cell in tile_cells(precision, prefixes)]
+        return Response({
+            'precision': precision,
+            'count': len(cells),
+            'total': sum(cell['count'] for cell in cells),
+            'cells': cells
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def complaints_summary(request):
+    """Get complaint counts by status and severity, for dashboards that need no rows"""
+    try:
+        return Response(complaint_summary(), status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
+# ==================== PHOTOS ====================
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def photo_upload(request):
+    """
+    Upload a complaint photo (multipart field "photo")
+    
+    The file is streamed into the photo store and deduplicated by content;
+    pass the returned photoId when submitting the complaint.
+    """
+    try:
+        uploaded = request.FILES.get('photo')
+        if uploaded is None:
+            return Response({'error': 'Send the image as multipart field "photo"'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            photo = save_uploaded_photo(uploaded)
+        except InvalidPhoto as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        photo_url, thumbnail_url = photo_urls(request, photo.digest)
+        return Response({
+            'photoId': photo.digest,
+            'photoUrl': photo_url,
+            'thumbnailUrl': thumbnail_url,
+            'contentType': photo.content_type,
+            'size': photo.size,
+            'width': photo.width,
+            'height': photo.height
+        }, status=status.HTTP_201_CREATED)
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _immutable(response, digest):
+    response['ETag'] = f'"{digest}"'
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@require_GET
+def photo_image(request, digest):
+    """Serve an original complaint photo by digest, streamed from disk"""
+    if not is_photo_reference(digest):
+        raise Http404('Photo not found')
+    if f'"{digest}"' in request.headers.get('If-None-Match', ''):
+        return _immutable(HttpResponseNotModified(), digest)
+    
+    photo = Photo.objects.filter(digest=digest).first()
+    if photo is None or not photo_path(digest).exists():
+        raise Http404('Photo not found')
+    return _immutable(FileResponse(open(photo_path(digest), 'rb'), content_type=photo.content_type), digest)
+
+
+@require_GET
+def photo_thumbnail(request, digest):
+    """Serve a photo's JPEG thumbnail, rendering it now if the worker pool has not"""
+    if not is_photo_reference(digest):
+        raise Http404('Photo not found')
+    if f'"{digest}"' in request.headers.get('If-None-Match', ''):
+        return _immutable(HttpResponseNotModified(), digest)
+    
+    if not photo_path(digest).exists():
+        raise Http404('Photo not found')
+    return _immutable(HttpResponse(read_thumbnail(digest), content_type='image/jpeg'), digest)
@@ -2,25 +2,28 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.utils import timezone
-import qrcode
-import io
-import base64
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 
-from .models import Contractor, RoadProject, Complaint, Rating
-from .utils import (
-    calculate_contractor_rating, get_risk_level,
-    calculate_performance_score, get_performance_rank, get_rating_distribution
-)
+from .models import Contractor, ContractorScorecard, RoadProject, Complaint, Rating
+from .qr_store import store_qr, read_qr, is_qr_reference, qr_image_url
+from .road_qr import road_qr_payload
+from .jobs import enqueue
+from .cache import get_or_build, contractor_key, invalidate_contractor
+from .complaints import create_complaint, parse_severity
+from .counters import record_rating
+from .rollups import record_rollup_rating, parse_trend_window, contractor_trend
+from .scorecards import STAR_COUNT_FIELDS, scorecard_for, record_scorecard_rating
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def contractor_rate(request):
-    """Submit a rating for a contractor"""
+def contractor_rate(request, contractor_id=None):
+    """Submit a rating for a contractor (id from the URL or the contractorId field)"""
     try:
         data = request.data
-        contractor_id = data.get('contractorId')
+        contractor_id = contractor_id or data.get('contractorId')
         rating_value = data.get('ratingValue')
         
         if not contractor_id:
@@ -45,12 +48,11 @@ def contractor_rate(request):
             comment=data.get('comment')
         )
         
-        # Recalculate contractor's average rating
-        all_ratings = Rating.objects.filter(contractor=contractor)
-        avg_rating = sum(r.rating_value for r in all_ratings) / len(all_ratings) if all_ratings else 5.0
-        
-        contractor.current_rating = avg_rating
-        contractor.save()
+        # Fold the rating into the contractor's running sum/count atomically
+        avg_rating = record_rating(contractor, rating_value)
+        record_scorecard_rating(contractor, rating_value)
+        record_rollup_rating(contractor, rating_value)
+        invalidate_contractor(contractor)
         
         return Response({
             'message': 'Rating submitted successfully',
@@ -75,13 +77,9 @@ def contractor_rate(request):
 def contractor_detail(request, contractor_id):
     """Get detailed information about a specific contractor"""
     try:
-        contractor = Contractor.objects.get(id=contractor_id)
-        projects = RoadProject.objects.filter(contractor=contractor)
-        project_ids = [p.id for p in projects]
-        complaints = Complaint.objects.filter(road_id__in=project_ids)
-        
-        rating_result = calculate_contractor_rating(contractor, list(projects), list(complaints))
-        risk_level = get_risk_level(rating_result['finalRating'])
+        # Materialized by scorecards.py; the rating as of the last recompute job
+        scorecard = scorecard_for(contractor_id)
+        contractor = scorecard.contractor
         
         return Response({
             'contractor': {
@@ -89,14 +87,14 @@ def contractor_detail(request, contractor_id):
                 'contractorId': contractor.contractor_id,
                 'name': contractor.name,
                 'email': contractor.email,
-                'currentRating': rating_result['finalRating'],
-                'ratingDeductions': rating_result['deductions'],
-                'totalComplaints': len(complaints),
-                'resolvedComplaints': len([c for c in complaints if c.status == 'Resolved']),
-                'pendingComplaints': len([c for c in complaints if c.status in ['Open', 'Under Review']]),
-                'riskLevel': risk_level['level'],
-                'recommendation': risk_level['recommendation'],
-                'ratingCategory': rating_result['ratingCategory']
+                'currentRating': scorecard.final_rating,
+                'ratingDeductions': scorecard.deductions,
+                'totalComplaints': scorecard.complaint_count,
+                'resolvedComplaints': scorecard.resolved_count,
+                'pendingComplaints': scorecard.pending_count,
+                'riskLevel': scorecard.risk_level,
+                'recommendation': scorecard.recommendation,
+                'ratingCategory': scorecard.rating_category
             }
         }, status=status.HTTP_200_OK)
         
@@ -144,12 +142,9 @@ def contractor_projects(request, contractor_id):
 def contractor_performance(request, contractor_id):
     """Get detailed performance metrics for a contractor"""
     try:
-        contractor = Contractor.objects.get(id=contractor_id)
-        ratings = Rating.objects.filter(contractor=contractor)
-        projects = RoadProject.objects.filter(contractor=contractor)
-        
-        avg_rating = sum(r.rating_value for r in ratings) / len(ratings) if ratings else 0
-        performance_score = calculate_performance_score(avg_rating, contractor.total_complaints)
+        scorecard = scorecard_for(contractor_id)
+        contractor = scorecard.contractor
+        recent_ratings = Rating.objects.filter(contractor=contractor).order_by('-created_at')[:5]
         
         return Response({
             'contractor': {
@@ -158,14 +153,16 @@ def contractor_performance(request, contractor_id):
                 'contractorId': contractor.contractor_id
             },
             'performance': {
-                'averageRating': round(avg_rating, 2),
-                'totalRatings': len(ratings),
-                'totalComplaints': contractor.total_complaints,
-                'totalProjects': len(projects),
-                'performanceScore': performance_score,
-                'performanceRank': get_performance_rank(performance_score),
-                'ratingDistribution': get_rating_distribution(ratings),
-                'recentRatings': list(ratings.order_by('-created_at')[:5].values())
+                'averageRating': round(scorecard.average_rating, 2),
+                'totalRatings': scorecard.rating_count,
+                'totalComplaints': scorecard.complaint_count,
+                'totalProjects': scorecard.project_count,
+                'performanceScore': scorecard.performance_score,
+                'performanceRank': scorecard.performance_rank,
+                'ratingDistribution': {
+                    stars: getattr(scorecard, field) for stars, field in STAR_COUNT_FIELDS.items()
+                },
+                'recentRatings': list(recent_ratings.values())
             }
         }, status=status.HTTP_200_OK)
         
@@ -175,35 +172,61 @@ def contractor_performance(request, contractor_id):
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def contractor_trends(request, contractor_id):
+    """Daily, weekly or monthly rating and complaint trend for a contractor"""
+    try:
+        start, end, bucket = parse_trend_window(request.GET)
+        contractor = Contractor.objects.only('id', 'name', 'contractor_id').get(id=contractor_id)
+        points, totals = contractor_trend(contractor.id, start, end, bucket)
+        
+        return Response({
+            'contractor': {
+                'id': contractor.id,
+                'name': contractor.name,
+                'contractorId': contractor.contractor_id
+            },
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'bucket': bucket,
+            'points': points,
+            'totals': totals
+        }, status=status.HTTP_200_OK)
+        
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Contractor.DoesNotExist:
+        return Response({'error': 'Contractor not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def contractor_performance_dashboard(request):
     """Get all contractors ranked by performance"""
     try:
-        contractors = Contractor.objects.all()
-        performance_data = []
+        # One SELECT down the scorecards_performance index, best score first
+        scorecards = ContractorScorecard.objects.select_related('contractor') \
+            .defer('contractor__qr_code', 'contractor__password', 'deductions') \
+            .order_by('-performance_score', 'contractor')
         
-        for contractor in contractors:
-            ratings = Rating.objects.filter(contractor=contractor)
-            avg_rating = sum(r.rating_value for r in ratings) / len(ratings) if ratings else 0
-            performance_score = calculate_performance_score(avg_rating, contractor.total_complaints)
-            
+        performance_data = []
+        for scorecard in scorecards:
+            contractor = scorecard.contractor
             performance_data.append({
                 'id': contractor.id,
                 'contractorId': contractor.contractor_id,
                 'name': contractor.name,
-                'averageRating': round(avg_rating, 2),
-                'totalRatings': len(ratings),
-                'totalComplaints': contractor.total_complaints,
-                'totalProjects': contractor.total_projects,
-                'performanceScore': performance_score,
-                'status': 'TOP' if contractor.total_complaints < 5 and avg_rating >= 4 else
-                         'BOTTOM' if contractor.total_complaints > 15 or avg_rating < 3 else 'AVERAGE'
+                'averageRating': round(scorecard.average_rating, 2),
+                'totalRatings': scorecard.rating_count,
+                'totalComplaints': scorecard.complaint_count,
+                'totalProjects': scorecard.project_count,
+                'performanceScore': scorecard.performance_score,
+                'status': scorecard.performance_status
             })
         
-        # Sort by performance score
-        performance_data.sort(key=lambda x: x['performanceScore'], reverse=True)
-        
         top_performers = [c for c in performance_data if c['status'] == 'TOP']
         bottom_performers = [c for c in performance_data if c['status'] == 'BOTTOM']
         average_performers = [c for c in performance_data if c['status'] == 'AVERAGE']
@@ -223,43 +246,17 @@ def contractor_performance_dashboard(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def generate_all_contractor_qr(request):
-    """Generate QR codes for all contractors"""
+    """Queue QR code generation for all contractors"""
     try:
-        contractors = Contractor.objects.all()
-        generated_count = 0
-        
-        for contractor in contractors:
-            # Generate QR code URL
-            qr_url = contractor.get_qr_url()
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_url)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            # Save QR code to contractor
-            contractor.qr_code = f"data:image/png;base64,{img_str}"
-            contractor.save()
-            generated_count += 1
+        # Repeated clicks while a run is still queued share that run
+        job = enqueue('generate_contractor_qr_codes', dedupe_key='generate-all-contractor-qr')
         
         return Response({
-            'message': f'Successfully generated QR codes for {generated_count} contractors',
-            'generated': generated_count,
-            'total': contractors.count()
-        }, status=status.HTTP_200_OK)
+            'message': 'QR code generation started',
+            'taskId': job.pk.hex,
+            'statusUrl': request.build_absolute_uri(reverse('job_status', args=[job.pk])),
+            'total': Contractor.objects.count()
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -272,35 +269,15 @@ def generate_contractor_qr(request, contractor_id):
     try:
         contractor = Contractor.objects.get(contractor_id=contractor_id)
         
-        # Generate QR code URL
+        # Render into the image cache and keep only the reference
         qr_url = contractor.get_qr_url()
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        
-        # Save QR code to contractor
-        contractor.qr_code = f"data:image/png;base64,{img_str}"
-        contractor.save()
+        contractor.qr_code = store_qr(qr_url)
+        contractor.save(update_fields=['qr_code', 'updated_at'])
         
         return Response({
             'contractorId': contractor.contractor_id,
             'name': contractor.name,
-            'qrCode': contractor.qr_code,
+            'qrCode': qr_image_url(request, contractor.qr_code),
             'qrUrl': qr_url
         }, status=status.HTTP_200_OK)
         
@@ -317,31 +294,15 @@ def get_contractor_qr(request, contractor_id):
     try:
         contractor = Contractor.objects.get(contractor_id=contractor_id)
         
-        # Generate QR if it doesn't exist
-        if not contractor.qr_code:
-            qr_url = contractor.get_qr_url()
-            
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_url)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            contractor.qr_code = f"data:image/png;base64,{img_str}"
-            contractor.save()
+        # Generate QR if it doesn't exist (or predates the image cache)
+        if not is_qr_reference(contractor.qr_code):
+            contractor.qr_code = store_qr(contractor.get_qr_url())
+            contractor.save(update_fields=['qr_code', 'updated_at'])
         
         return Response({
             'contractorId': contractor.contractor_id,
             'name': contractor.name,
-            'qrCode': contractor.qr_code,
+            'qrCode': qr_image_url(request, contractor.qr_code),
             'qrUrl': contractor.get_qr_url()
         }, status=status.HTTP_200_OK)
         
@@ -351,20 +312,55 @@ def get_contractor_qr(request, contractor_id):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@require_GET
+def qr_image(request, digest):
+    """Serve a cached QR PNG by digest with immutable caching headers"""
+    if not is_qr_reference(digest):
+        raise Http404('QR code not found')
+    
+    etag = f'"{digest}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        png = read_qr(digest)
+        if png is None:
+            # The cache directory may have been wiped; re-render from the owner's payload
+            contractor = Contractor.objects.only('contractor_id').filter(qr_code=digest).first()
+            if contractor is not None:
+                payload = contractor.get_qr_url()
+            else:
+                road = RoadProject.objects.only('road_id', 'road_name', 'qr_code_data').filter(qr_image=digest).first()
+                if road is None:
+                    raise Http404('QR code not found')
+                payload = road_qr_payload(road)
+            if store_qr(payload) != digest:
+                raise Http404('QR code not found')
+            png = read_qr(digest)
+        response = HttpResponse(png, content_type='image/png')
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_contractor_public_info(request, contractor_id):
     """Get public contractor information for feedback page"""
     try:
-        contractor = Contractor.objects.get(contractor_id=contractor_id)
+        def build():
+            contractor = Contractor.objects.get(contractor_id=contractor_id)
+            
+            return {
+                'contractorId': contractor.contractor_id,
+                'name': contractor.name,
+                'currentRating': contractor.current_rating,
+                'totalComplaints': contractor.total_complaints,
+                'totalProjects': contractor.total_projects,
+            }
         
-        return Response({
-            'contractorId': contractor.contractor_id,
-            'name': contractor.name,
-            'currentRating': contractor.current_rating,
-            'totalComplaints': contractor.total_complaints,
-            'totalProjects': contractor.total_projects,
-        }, status=status.HTTP_200_OK)
+        # Hit on every QR scan; rating and complaint writes invalidate it
+        return Response(get_or_build(contractor_key(contractor_id), build), status=status.HTTP_200_OK)
         
     except Contractor.DoesNotExist:
         return Response({'error': 'Contractor not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -394,12 +390,11 @@ def submit_public_rating(request, contractor_id):
             comment=comment
         )
         
-        # Recalculate contractor's average rating
-        all_ratings = Rating.objects.filter(contractor=contractor)
-        avg_rating = sum(r.rating_value for r in all_ratings) / len(all_ratings) if all_ratings else 5.0
-        
-        contractor.current_rating = avg_rating
-        contractor.save()
+        # Fold the rating into the contractor's running sum/count atomically
+        avg_rating = record_rating(contractor, rating_value)
+        record_scorecard_rating(contractor, rating_value)
+        record_rollup_rating(contractor, rating_value)
+        invalidate_contractor(contractor)
         
         return Response({
             'message': 'Rating submitted successfully',
@@ -424,28 +419,37 @@ def submit_public_complaint(request, contractor_id):
         
         if not description:
             return Response({'error': 'Description is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create complaint
-        complaint = Complaint.objects.create(
-            contractor=contractor,
+        try:
+            severity = parse_severity(request.data.get('severity'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Complaints belong to a road: use the scanned road if given, else the latest project
+        projects = RoadProject.objects.filter(contractor=contractor).select_related('contractor')
+        if request.data.get('roadId'):
+            projects = projects.filter(road_id=request.data['roadId'])
+        road_project = projects.order_by('-created_at').first()
+        if road_project is None:
+            return Response({'error': 'No road project found for this contractor'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        complaint, rating_job = create_complaint(
+            road_project,
             user_email='public@feedback.com',
             user_id='public',
-            description=description,
-            location=location,
+            damage_type=request.data.get('damageType', 'Other'),
+            description=f"{description}\n\nLocation: {location}" if location else description,
+            severity=severity,
             status='Open'
         )
         
-        # Increment contractor's complaint count
-        contractor.total_complaints += 1
-        contractor.save()
-        
         return Response({
             'message': 'Complaint submitted successfully',
-            'complaintId': complaint.complaint_id
+            'complaintId': complaint.complaint_id,
+            'ratingJobId': rating_job.pk.hex
         }, status=status.HTTP_201_CREATED)
         
     except Contractor.DoesNotExist:
         return Response({'error': 'Contractor not found'}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception:
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -0,0 +1,124 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Complaint, RoadProject, Rating
+from .permissions import IsAdminUser
+
+
+# Rows are read this many at a time; on PostgreSQL this is a server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# dataset -> (model, [(output column, ORM field)])
+EXPORT_DATASETS = {
+    'complaints': (Complaint, [
+        ('id', 'id'),
+        ('complaintId', 'complaint_id'),
+        ('roadId', 'road__road_id'),
+        ('userId', 'user_id'),
+        ('userEmail', 'user_email'),
+        ('userPhone', 'user_phone'),
+        ('damageType', 'damage_type'),
+        ('description', 'description'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('status', 'status'),
+        ('severity', 'severity'),
+        ('resolvedDate', 'resolved_date'),
+        ('resolutionDescription', 'resolution_description'),
+        ('createdAt', 'created_at'),
+        ('updatedAt', 'updated_at'),
+    ]),
+    'roads': (RoadProject, [
+        ('id', 'id'),
+        ('roadId', 'road_id'),
+        ('roadName', 'road_name'),
+        ('contractorId', 'contractor_id'),
+        ('contractorName', 'contractor_name'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('address', 'address'),
+        ('constructionDate', 'construction_date'),
+        ('completionDate', 'completion_date'),
+        ('warrantyPeriodYears', 'warranty_period_years'),
+        ('warrantyEndDate', 'warranty_end_date'),
+        ('projectCost', 'project_cost'),
+        ('roadLength', 'road_length'),
+        ('status', 'status'),
+        ('createdAt', 'created_at'),
+        ('updatedAt', 'updated_at'),
+    ]),
+    'ratings': (Rating, [
+        ('id', 'id'),
+        ('contractorId', 'contractor_id'),
+        ('roadId', 'road_id'),
+        ('userId', 'user_id'),
+        ('userEmail', 'user_email'),
+        ('ratingValue', 'rating_value'),
+        ('comment', 'comment'),
+        ('createdAt', 'created_at'),
+    ]),
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(dataset):
+    """Yield tuples for every row of a dataset without materializing the table"""
+    model, columns = EXPORT_DATASETS[dataset]
+    fields = [field for _, field in columns]
+    queryset = model.objects.order_by('id').values_list(*fields)
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_ndjson(dataset):
+    """One JSON object per line"""
+    names = [name for name, _ in EXPORT_DATASETS[dataset][1]]
+    encoder = JSONEncoder(ensure_ascii=False)
+    for row in _export_rows(dataset):
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def stream_csv(dataset):
+    """Header line followed by one CSV record per row"""
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_DATASETS[dataset][1]])
+    for row in _export_rows(dataset):
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        ])
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_dataset(request, dataset):
+    """Stream a full dump of complaints, roads or ratings (?as=ndjson|csv)"""
+    if dataset not in EXPORT_DATASETS:
+        return Response({'error': f'Unknown dataset. Choose one of: {", ".join(EXPORT_DATASETS)}'},
+                        status=status.HTTP_404_NOT_FOUND)
+
+    export_format = request.GET.get('as', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response({'error': 'Format must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+
+    stream = stream_ndjson if export_format == 'ndjson' else stream_csv
+    response = StreamingHttpResponse(stream(dataset), content_type=EXPORT_FORMATS[export_format])
+    filename = f"{dataset}-{timezone.now().strftime('%Y%m%d')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
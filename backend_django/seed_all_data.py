@@ -14,6 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_road_system.settings')
 django.setup()
 
 from api.models import Admin, Contractor, RoadProject, Complaint, Rating
+from api.counters import rebuild_rating_totals
 from django.utils import timezone
 
 
@@ -189,6 +190,9 @@ def seed_ratings():
             contractor.current_rating = round(avg_rating, 2)
             contractor.save()
             print(f"✓ Updated {contractor.name} rating to {contractor.current_rating}")
+    
+    # Keep the running sum/count used by new submissions in step
+    rebuild_rating_totals()
 
 
 def main():
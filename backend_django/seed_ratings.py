@@ -5,6 +5,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_road_system.settings')
 django.setup()
 
 from api.models import Contractor, RoadProject, Rating
+from api.counters import rebuild_rating_totals
 from datetime import datetime
 
 # Get all contractors
@@ -39,5 +40,8 @@ for contractor in contractors:
             contractor.save()
             print(f"Updated {contractor.name} average rating to {contractor.current_rating}")
 
+# Keep the running sum/count used by new submissions in step
+rebuild_rating_totals()
+
 print("\nRatings seeded successfully!")
 print(f"Total ratings created: {Rating.objects.count()}")
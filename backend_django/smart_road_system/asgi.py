@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_road_system.settings')
+# Under ASGI every request runs its database work on a thread of its own, so
+# a connection kept for reuse would never be seen again by a later request;
+# close it after each request instead (pool with PgBouncer on PostgreSQL)
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
+# Serve the read endpoints in api/views_async.py on the event loop
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,49 @@
+"""
+SQLite backend with connection tuning
+
+Django 4.2's SQLite backend opens connections with the library defaults and
+starts every transaction with a deferred BEGIN. This subclass understands
+the two OPTIONS that Django 5.1 added for the same purpose, so the settings
+carry over unchanged after an upgrade (switch ENGINE back to
+django.db.backends.sqlite3 then):
+
+- init_command: ';'-separated statements run on each new connection, used
+  for the PRAGMAs in settings.py
+- transaction_mode: DEFERRED, IMMEDIATE or EXCLUSIVE. With IMMEDIATE an
+  atomic block takes the write lock when it starts. A deferred transaction
+  that reads and then writes cannot wait for another writer (SQLite fails
+  it with "database is locked" at once to avoid a deadlock), while an
+  immediate one queues for up to busy_timeout.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Ours, not sqlite3.connect()'s
+        params.pop('init_command', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        init_command = self.settings_dict['OPTIONS'].get('init_command') or ''
+        for statement in init_command.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}")
+        self.cursor().execute(f'BEGIN {mode.upper()}')
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import LogoutModal from './LogoutModal';
+import { fetchComplaintSummary } from '../utils/helpers';
 
 // StatCard Component for Dashboard Statistics
 const StatCard = ({ icon, title, value, subtitle, gradient, trend }) => {
@@ -27,7 +28,7 @@ const StatCard = ({ icon, title, value, subtitle, gradient, trend }) => {
 const AdminDashboard = () => {
   const [roads, setRoads] = useState([]);
   const [contractors, setContractors] = useState([]);
-  const [complaints, setComplaints] = useState([]);
+  const [complaintSummary, setComplaintSummary] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
@@ -75,8 +76,7 @@ const AdminDashboard = () => {
 
   const fetchComplaints = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/api/complaints');
-      setComplaints(response.data.complaints || []);
+      setComplaintSummary(await fetchComplaintSummary());
     } catch (err) {
       console.error('Failed to fetch complaints:', err);
     }
@@ -260,8 +260,8 @@ const AdminDashboard = () => {
   const stats = {
     totalRoads: roads.length,
     activeContractors: contractors.filter(c => c.currentRating > 0).length,
-    openComplaints: complaints.filter(c => c.status !== 'resolved').length,
-    resolvedIssues: complaints.filter(c => c.status === 'resolved').length
+    openComplaints: complaintSummary?.unresolved || 0,
+    resolvedIssues: complaintSummary?.resolved || 0
   };
 
   return (
@@ -66,16 +66,17 @@ const ComplaintForm = ({ roadData }) => {
     }
 
     try {
-      let photoUrl = '';
+      let photoId = null;
 
-      // If photo is uploaded, convert to base64
+      // If photo is uploaded, send the file first and reference it by id
       if (formData.photoFile) {
-        const reader = new FileReader();
-        photoUrl = await new Promise((resolve, reject) => {
-          reader.onloadend = () => resolve(reader.result);
-          reader.onerror = reject;
-          reader.readAsDataURL(formData.photoFile);
-        });
+        const photoData = new FormData();
+        photoData.append('photo', formData.photoFile);
+        const photoResponse = await axios.post(
+          'http://localhost:8000/api/complaints/photos',
+          photoData
+        );
+        photoId = photoResponse.data.photoId;
       }
 
       const complaintPayload = {
@@ -86,7 +87,7 @@ const ComplaintForm = ({ roadData }) => {
         damageType: formData.damageType,
         description: formData.description,
         severity: formData.severity,
-        photoUrl: photoUrl,
+        photoId: photoId,
         location: {
           latitude: roadData.latitude || 0,
           longitude: roadData.longitude || 0
@@ -133,8 +134,9 @@ const ComplaintForm = ({ roadData }) => {
       });
       setPhotoPreview(null);
 
-      // Show contractor rating impact
+      // Show contractor rating impact; a background job folds this complaint in
       console.log('Updated Contractor Rating:', response.data.updatedRating);
+      console.log('Rating recalculation job:', response.data.ratingJobId);
 
     } catch (error) {
       setErrorMessage(error.response?.data?.error || 'Failed to submit complaint. Please try again.');
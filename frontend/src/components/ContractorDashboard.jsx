@@ -1,6 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 
+// Longest wait for the bulk QR job before giving up
+const QR_JOB_TIMEOUT_MS = 5 * 60 * 1000;
+
 const ContractorDashboard = () => {
   const [contractors, setContractors] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -41,7 +44,16 @@ const ContractorDashboard = () => {
     try {
       setGeneratingAll(true);
       const response = await axios.post('http://localhost:8000/api/contractors/generate-all-qr');
-      alert(`Successfully generated QR codes for ${response.data.generated} contractors!`);
+      // Generation runs in the background; poll until it finishes
+      const deadline = Date.now() + QR_JOB_TIMEOUT_MS;
+      let task = { status: 'queued' };
+      while (task.status === 'queued' || task.status === 'running') {
+        if (Date.now() > deadline) throw new Error('Timed out waiting for QR generation');
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        task = (await axios.get(response.data.statusUrl)).data;
+      }
+      if (task.status !== 'completed') throw new Error(task.error || 'QR generation failed');
+      alert(`Successfully generated QR codes for ${task.result.generated} contractors!`);
       fetchContractors();
     } catch (error) {
       console.error('Error generating QR codes:', error);
@@ -1,10 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { fetchComplaintsPage, fetchComplaintSummary } from '../utils/helpers';
 
 const GovernmentDashboard = () => {
   const [contractors, setContractors] = useState([]);
   const [complaints, setComplaints] = useState([]);
+  const [totalComplaints, setTotalComplaints] = useState(0);
   const [loading, setLoading] = useState(false);
   const navigate = useNavigate();
 
@@ -15,12 +17,15 @@ const GovernmentDashboard = () => {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [contractorsRes, complaintsRes] = await Promise.all([
+      // Only the ten latest reports are shown; the total comes from the summary counts
+      const [contractorsRes, recent, summary] = await Promise.all([
         axios.get('http://localhost:8000/api/contractors'),
-        axios.get('http://localhost:8000/api/complaints')
+        fetchComplaintsPage({ limit: 10 }),
+        fetchComplaintSummary()
       ]);
       setContractors(contractorsRes.data.contractors || []);
-      setComplaints(complaintsRes.data.complaints || []);
+      setComplaints(recent.complaints);
+      setTotalComplaints(summary.total);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -66,7 +71,7 @@ const GovernmentDashboard = () => {
         <div className="grid md:grid-cols-4 gap-4 mb-10">
           <DashboardStat label="Total Contractors" value={contractors.length} icon="🏢" />
           <DashboardStat label="Avg Rating" value={(contractors.reduce((a, b) => a + b.currentRating, 0) / contractors.length || 0).toFixed(1)} icon="⭐" />
-          <DashboardStat label="Total Complaints" value={complaints.length} icon="📝" />
+          <DashboardStat label="Total Complaints" value={totalComplaints} icon="📝" />
           <DashboardStat label="Total Projects" value={contractors.reduce((a, b) => a + b.totalProjects, 0)} icon="🛣️" />
         </div>
 
@@ -147,7 +152,7 @@ const GovernmentDashboard = () => {
                   </tr>
                 </thead>
                 <tbody className="divide-y">
-                  {complaints.slice(0, 10).map((complaint, idx) => (
+                  {complaints.map((complaint, idx) => (
                     <tr key={complaint.id || idx} className="hover:bg-yellow-50 transition duration-200">
                       <td className="px-6 py-4 font-semibold text-gray-800">{complaint.complaintId}</td>
                       <td className="px-6 py-4 text-gray-700">{complaint.road?.roadName || 'N/A'}</td>
@@ -169,7 +174,7 @@ const GovernmentDashboard = () => {
             </div>
           )}
           <div className="bg-gray-50 px-8 py-4 text-sm text-gray-600 border-t">
-            Showing {Math.min(complaints.length, 10)} of {complaints.length} complaints
+            Showing {complaints.length} of {totalComplaints} complaints
           </div>
         </div>
       </div>
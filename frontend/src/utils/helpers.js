@@ -2,6 +2,8 @@
  * Utility functions for the Smart Road System Frontend
  */
 
+import axios from 'axios';
+
 // Format rating for display
 export const formatRating = (rating) => {
   return parseFloat(rating).toFixed(2);
@@ -141,3 +143,18 @@ export const getSeverityEmoji = (severity) => {
   };
   return emojiMap[severity] || '❓';
 };
+
+// Fetch one page of the complaints feed, newest first (params: limit, cursor, status, severity, ...)
+export const fetchComplaintsPage = async (params = {}, url = 'http://localhost:8000/api/complaints') => {
+  const response = await axios.get(url, { params });
+  return {
+    complaints: response.data.complaints || [],
+    nextCursor: response.data.nextCursor
+  };
+};
+
+// Fetch complaint counts by status and severity without loading any complaints
+export const fetchComplaintSummary = async (url = 'http://localhost:8000/api/complaints/summary') => {
+  const response = await axios.get(url);
+  return response.data;
+};